@@ -0,0 +1,23 @@
+import pytest
+from django.core.cache import cache
+
+from tests.utils import max_queries
+
+QUERY_BUDGET = 6
+
+
+class TestQueryBudget:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_feeds_query_budget(self, user_client, mixer, user, group):
+        authors = mixer.cycle(15).blend('auth.User')
+        for author in authors:
+            mixer.blend('posts.Follow', user=user, author=author)
+            mixer.blend('posts.Post', author=author, group=group, image=None)
+        cache.clear()
+        for url in ('/', f'/group/{group.slug}/', f'/profile/{authors[0].username}/', '/follow/'):
+            with max_queries(QUERY_BUDGET):
+                response = user_client.get(url)
+            assert response.status_code == 200, (
+                f'Страница `{url}` работает неправильно'
+            )
@@ -0,0 +1,92 @@
+"""
+Поля ресурсов API.
+
+Строки читаются через .values(): модели не создаются, а на каждую
+строку ответа строится ровно один словарь из запрошенных полей.
+Поле описано путём в ORM и, если нужно, функцией преобразования
+значения.
+"""
+from posts.models import Post
+
+
+class FieldsError(ValueError):
+    pass
+
+
+def image_url(name):
+    if not name:
+        return None
+    return Post._meta.get_field('image').storage.url(name)
+
+
+POST_FIELDS = {
+    'id': ('id', None),
+    'text': ('text', None),
+    'pub_date': ('pub_date', None),
+    'author': ('author__username', None),
+    'group': ('group__slug', None),
+    'image': ('image', image_url),
+    'comments_count': ('comments_count', None),
+    'views_count': ('views_count', None),
+}
+
+COMMENT_FIELDS = {
+    'id': ('id', None),
+    'post': ('post_id', None),
+    'parent': ('parent_id', None),
+    'author': ('author__username', None),
+    'text': ('text', None),
+    'created': ('created', None),
+    'replies_count': ('replies_count', None),
+}
+
+GROUP_FIELDS = {
+    'id': ('id', None),
+    'title': ('title', None),
+    'slug': ('slug', None),
+    'description': ('description', None),
+    'posts_count': ('posts_count', None),
+}
+
+AUTHOR_FIELDS = {
+    'id': ('id', None),
+    'username': ('username', None),
+    'first_name': ('first_name', None),
+    'last_name': ('last_name', None),
+    'posts_count': ('stats__posts_count', None),
+    'followers_count': ('stats__followers_count', None),
+    'following_count': ('stats__following_count', None),
+}
+
+
+def select(spec, requested):
+    """
+    Имена полей из параметра ?fields=; без параметра — все поля.
+
+    Неизвестное поле — ошибка, а не молча пропущенный ключ.
+    """
+    if requested is None:
+        return list(spec)
+    names = [name.strip() for name in requested.split(',') if name.strip()]
+    unknown = [name for name in names if name not in spec]
+    if not names or unknown:
+        raise FieldsError(
+            f'Неизвестные поля: {", ".join(unknown) or requested!r}. '
+            f'Доступны: {", ".join(spec)}.')
+    return list(dict.fromkeys(names))
+
+
+def paths(spec, names, required=('id',)):
+    """Столбцы для .values(): запрошенные и нужные курсору."""
+    return list(dict.fromkeys(
+        [*required, *(spec[name][0] for name in names)]))
+
+
+def project(spec, names, rows):
+    """Оставляет в строках .values() только запрошенные поля."""
+    plan = [(name, *spec[name]) for name in names]
+    return [
+        {name: convert(row[path]) if convert else row[path]
+         for name, path, convert in plan}
+        for row in rows
+    ]
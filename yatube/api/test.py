@@ -0,0 +1,128 @@
+from http import HTTPStatus
+
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post, User
+
+
+class ApiTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(title='Группа', slug='group',
+                                         description='Описание')
+        cls.posts = [
+            Post.objects.create(text=f'Пост {number}', author=cls.author,
+                                group=cls.group)
+            for number in range(3)
+        ]
+        cls.comment = Comment.objects.create(post=cls.posts[0],
+                                             author=cls.reader, text='Ура')
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def test_feed_is_paged_by_cursor(self):
+        url = reverse('api:index')
+        data = self.client.get(url, {'limit': 2}).json()
+        self.assertEqual([post['id'] for post in data['results']],
+                         [self.posts[2].id, self.posts[1].id])
+        self.assertIsNone(data['previous'])
+        data = self.client.get(url, {'limit': 2,
+                                     'after': data['next']}).json()
+        self.assertEqual([post['id'] for post in data['results']],
+                         [self.posts[0].id])
+        self.assertEqual(data['results'][0]['author'], 'author')
+        self.assertEqual(data['results'][0]['group'], 'group')
+        self.assertEqual(data['results'][0]['comments_count'], 1)
+
+    def test_sparse_fieldsets(self):
+        url = reverse('api:group_list', kwargs={'slug': 'group'})
+        data = self.client.get(url, {'fields': 'id,text'}).json()
+        self.assertEqual(data['group']['slug'], 'group')
+        self.assertEqual(set(data['results'][0]), {'id', 'text'})
+        response = self.client.get(url, {'fields': 'id,password'})
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+        self.assertIn('password', response.json()['detail'])
+
+    def test_conditional_get(self):
+        url = reverse('api:post_detail',
+                      kwargs={'post_id': self.posts[0].id})
+        response = self.client.get(url)
+        self.assertEqual(response.json()['text'], 'Пост 0')
+        etag = response['ETag']
+        self.assertNotIn('Last-Modified', response)
+        # Валидатор — версия и счётчики поста, тело не строится.
+        with self.assertNumQueries(2):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+        Comment.objects.create(post=self.posts[0], author=self.reader,
+                               text='Ещё')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_edited_post_is_not_modified_no_more(self):
+        url = reverse('api:post_detail',
+                      kwargs={'post_id': self.posts[1].id})
+        detail_etag = self.client.get(url)['ETag']
+        feed_etag = self.client.get(reverse('api:index'))['ETag']
+        post = Post.objects.get(pk=self.posts[1].pk)
+        post.text = 'Правка'
+        post.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=detail_etag)
+        self.assertEqual(response.json()['text'], 'Правка')
+        response = self.client.get(reverse('api:index'),
+                                   HTTP_IF_NONE_MATCH=feed_etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_cached_feed_answers_not_modified_without_queries(self):
+        url = reverse('api:profile', kwargs={'username': 'author'})
+        response = self.client.get(url)
+        self.assertEqual(response.json()['author']['posts_count'], 3)
+        with self.assertNumQueries(0):
+            response = self.client.get(url,
+                                       HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+        Post.objects.create(text='Новый', author=self.author)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.json()['author']['posts_count'], 4)
+
+    def test_comments_and_replies(self):
+        reply = Comment.objects.create(post=self.posts[0], parent=self.comment,
+                                       author=self.author, text='Ответ')
+        data = self.client.get(reverse(
+            'api:comments', kwargs={'post_id': self.posts[0].id})).json()
+        self.assertEqual([comment['id'] for comment in data['results']],
+                         [self.comment.id])
+        self.assertEqual(data['results'][0]['replies_count'], 1)
+        data = self.client.get(reverse(
+            'api:comment_replies',
+            kwargs={'post_id': self.posts[0].id,
+                    'comment_id': self.comment.id})).json()
+        self.assertEqual(data['results'][0]['id'], reply.id)
+        self.assertEqual(data['results'][0]['parent'], self.comment.id)
+
+    def test_follow_feed_requires_login(self):
+        url = reverse('api:follow_index')
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, HTTPStatus.UNAUTHORIZED)
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.client.force_login(self.reader)
+        response = self.client.get(url)
+        self.assertEqual(len(response.json()['results']), 3)
+        self.assertIn('private', response['Cache-Control'])
+
+    def test_missing_objects_and_unsafe_methods(self):
+        response = self.client.get(reverse('api:post_detail',
+                                           kwargs={'post_id': 0}))
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        response = self.client.post(reverse('api:index'))
+        self.assertEqual(response.status_code,
+                         HTTPStatus.METHOD_NOT_ALLOWED)
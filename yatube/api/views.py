@@ -0,0 +1,239 @@
+"""
+JSON API только для чтения: ленты, посты, группы и профили.
+
+Адреса повторяют posts/urls.py. Ленты листаются тем же курсором, что
+и HTML-страницы (?after= / ?before=, размер страницы — ?limit=), а
+?fields= оставляет в ответе только перечисленные поля ресурса.
+
+Повторный запрос с If-None-Match получает 304. Публичные ленты
+кэшируются до смены версии своей области (см. posts.caching), их ETag
+— хеш закэшированного тела: и 304, и полный ответ отдаются без
+запросов к базе. ETag поста и комментариев собирается, как в
+posts.conditional, из версии поста и его счётчиков, так что 304
+обходится без выборки и сериализации ответа. Last-Modified не
+отдаётся: правка и удаление поста не сдвигают ни одной даты.
+"""
+import hashlib
+import json
+from functools import partial, wraps
+from http import HTTPStatus
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Max
+from django.http import Http404, HttpResponse
+from django.shortcuts import get_object_or_404
+from django.utils.cache import (get_conditional_response, patch_cache_control,
+                                quote_etag)
+from django.views.decorators.http import require_safe
+
+from core import routers
+from posts import caching, hits, threads
+from posts.conditional import make_etag
+from posts.models import Comment, Group, Post, User
+from posts import timeline
+from posts.utils import get_page
+
+from .serializers import (AUTHOR_FIELDS, COMMENT_FIELDS, GROUP_FIELDS,
+                          POST_FIELDS, FieldsError, paths, project, select)
+
+
+class ApiError(Exception):
+    def __init__(self, status, detail):
+        super().__init__(detail)
+        self.status = status
+        self.detail = detail
+
+
+def _dumps(data):
+    return json.dumps(data, cls=DjangoJSONEncoder, ensure_ascii=False,
+                      separators=(',', ':')).encode()
+
+
+def _error(status, detail):
+    response = HttpResponse(_dumps({'detail': detail}), status=status,
+                            content_type='application/json')
+    patch_cache_control(response, no_store=True)
+    return response
+
+
+def _render(view, request, *args, **kwargs):
+    """Тело ответа и его ETag — хеш тела."""
+    body = _dumps(view(request, *args, **kwargs))
+    return body, f'"{hashlib.sha1(body).hexdigest()}"'
+
+
+def _cache_key(scope, request, kwargs):
+    name = scope(**kwargs) if callable(scope) else scope
+    path = request.get_full_path().encode()
+    return (caching.versioned_key('api', name) + ':'
+            + hashlib.md5(path).hexdigest())
+
+
+def _respond(request, etag, private, body=None):
+    """Ответ с ETag; body=None — только проверка If-None-Match."""
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        if body is None:
+            return None
+        response = HttpResponse(body, content_type='application/json')
+    response['ETag'] = etag
+    # Клиент обязан перепроверять ответ; перепроверка дешёвая.
+    patch_cache_control(response, max_age=0, private=private)
+    return response
+
+
+def _serve(view, options, request, args, kwargs):
+    scope, private, etag = options
+    validator = etag and etag(request, *args, **kwargs)
+    if validator is not None:
+        validator = quote_etag(validator)
+        response = _respond(request, validator, private)
+        if response is not None:
+            return response
+    key = rendered = None
+    if scope is not None:
+        key = _cache_key(scope, request, kwargs)
+        rendered = cache.get(key)
+    if rendered is None:
+        timeout = routers.cache_timeout(settings.FEED_CACHE_TIMEOUT)
+        rendered = _render(view, request, *args, **kwargs)
+        if key is not None:
+            cache.set(key, rendered, timeout)
+    body, body_etag = rendered
+    return _respond(request, validator or body_etag, private, body)
+
+
+def api_view(scope=None, private=False, etag=None):
+    """
+    Отдаёт JSON из view с условными заголовками.
+
+    scope — как у cache_feed: ответ кэшируется до смены версии
+    области. private — ответ зависит от пользователя и не кэшируется
+    промежуточными прокси. etag — функция с аргументами view,
+    дешёвый валидатор вместо хеша тела: при совпадении view не
+    вызывается.
+    """
+    def decorator(view):
+        @require_safe
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            try:
+                return _serve(view, (scope, private, etag), request,
+                              args, kwargs)
+            except Http404:
+                return _error(HTTPStatus.NOT_FOUND, 'Не найдено.')
+            except FieldsError as error:
+                return _error(HTTPStatus.BAD_REQUEST, str(error))
+            except ApiError as error:
+                return _error(error.status, error.detail)
+        return wrapper
+    return decorator
+
+
+def _limit(request):
+    value = request.GET.get('limit')
+    if value is None:
+        return settings.API_PAGE_SIZE
+    if not value.isdigit() or not 0 < int(value) <= settings.API_MAX_PAGE:
+        raise ApiError(HTTPStatus.BAD_REQUEST,
+                       f'limit — число от 1 до {settings.API_MAX_PAGE}.')
+    return int(value)
+
+
+def _post_etag(request, post_id, **kwargs):
+    # Версия поста растёт с каждой правкой, счётчики — с новыми
+    # комментариями и просмотрами.
+    row = (Post.objects.filter(id=post_id)
+           .values_list('version', 'comments_count', 'views_count').first())
+    if row is None:
+        # Несуществующему посту валидатор не нужен: будет 404.
+        return None
+    latest = (Comment.objects.filter(post_id=post_id)
+              .aggregate(latest=Max('created'))['latest'])
+    return make_etag(request, *row, latest)
+
+
+def _page(page, spec, names):
+    paginator = page.paginator
+    return {
+        'results': project(spec, names, page.object_list),
+        'next': paginator.next_cursor,
+        'previous': paginator.previous_cursor,
+    }
+
+
+def _posts(request, post_roster, paginate=get_page, **extra):
+    names = select(POST_FIELDS, request.GET.get('fields'))
+    rows = post_roster.values(*paths(POST_FIELDS, names, ('id', 'pub_date')))
+    page = paginate(request, rows, per_page=_limit(request))
+    return dict(extra, **_page(page, POST_FIELDS, names))
+
+
+def _one(spec, queryset, **lookup):
+    row = get_object_or_404(queryset.values(*paths(spec, spec)), **lookup)
+    return project(spec, spec, [row])[0]
+
+
+@api_view(caching.INDEX_SCOPE)
+def index(request):
+    return _posts(request, Post.objects.all())
+
+
+@api_view(caching.group_scope)
+def group_posts(request, slug):
+    group = _one(GROUP_FIELDS, Group.objects.all(), slug=slug)
+    return _posts(request, Post.objects.filter(group_id=group['id']),
+                  group=group)
+
+
+@api_view(caching.author_scope)
+def profile(request, username):
+    author = _one(AUTHOR_FIELDS, User.objects.all(), username=username)
+    return _posts(request, Post.objects.filter(author_id=author['id']),
+                  author=author)
+
+
+@hits.counted
+@api_view(etag=_post_etag)
+def post_detail(request, post_id):
+    names = select(POST_FIELDS, request.GET.get('fields'))
+    row = get_object_or_404(Post.objects.values(*paths(POST_FIELDS, names)),
+                            id=post_id)
+    return project(POST_FIELDS, names, [row])[0]
+
+
+@api_view(etag=_post_etag)
+def comments(request, post_id):
+    """Корневые комментарии поста, от старых к новым."""
+    if not Post.objects.filter(id=post_id).exists():
+        raise Http404
+    names = select(COMMENT_FIELDS, request.GET.get('fields'))
+    rows = (Comment.objects.filter(post_id=post_id, parent=None)
+            .values(*paths(COMMENT_FIELDS, names, ('id', 'created'))))
+    page = get_page(request, rows, field='created', per_page=_limit(request))
+    return _page(page, COMMENT_FIELDS, names)
+
+
+@api_view(etag=_post_etag)
+def comment_replies(request, post_id, comment_id):
+    """Ответы на комментарий в порядке обхода ветки."""
+    root = get_object_or_404(Comment, id=comment_id, post=post_id)
+    names = select(COMMENT_FIELDS, request.GET.get('fields'))
+    limit = _limit(request)
+    rows = list(threads.subtree(root, request.GET.get('after'))
+                .values(*paths(COMMENT_FIELDS, names, ('id', 'path')))
+                [:limit + 1])
+    return {
+        'results': project(COMMENT_FIELDS, names, rows[:limit]),
+        'next': rows[limit - 1]['path'] if len(rows) > limit else None,
+    }
+
+
+@api_view(private=True)
+def follow_index(request):
+    if not request.user.is_authenticated:
+        raise ApiError(HTTPStatus.UNAUTHORIZED, 'Нужна авторизация.')
+    return _posts(request, Post.objects.all(),
+                  partial(timeline.get_page, user=request.user))
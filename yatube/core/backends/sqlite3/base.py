@@ -0,0 +1,27 @@
+"""
+SQLite, настроенный для одновременных чтения и записи.
+
+Каждое новое соединение получает PRAGMA из SQLITE_PRAGMAS, так что
+с постоянными соединениями (CONN_MAX_AGE) они стоят один раз на
+соединение. В режиме WAL запись не блокирует читателей; журнал
+переносится в файл базы командой sqlite_maintenance.
+
+Транзакции начинаются с BEGIN IMMEDIATE. Отложенная транзакция,
+которая сначала читала, а потом пишет, получает «database is locked»
+сразу, без ожидания busy_timeout, если другой писатель успел
+зафиксировать свою. Блокировка записи, взятая в начале, заставляет
+писателей дождаться друг друга; читателей в WAL она не задерживает.
+"""
+from django.conf import settings
+from django.db.backends.sqlite3 import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def get_new_connection(self, conn_params):
+        connection = super().get_new_connection(conn_params)
+        for name, value in settings.SQLITE_PRAGMAS.items():
+            connection.execute(f'PRAGMA {name} = {value}')
+        return connection
+
+    def _start_transaction_under_autocommit(self):
+        self.cursor().execute('BEGIN IMMEDIATE')
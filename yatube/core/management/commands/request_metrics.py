@@ -0,0 +1,45 @@
+import json
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core import metrics
+
+
+class Command(BaseCommand):
+    help = 'Перцентили времени запросов по view из журнала замеров.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--file', default=None,
+                            help='журнал замеров в формате JSON Lines')
+        parser.add_argument('--json', action='store_true',
+                            help='вывести сводку в JSON')
+        parser.add_argument('--clear', action='store_true',
+                            help='очистить журнал после вывода')
+
+    def handle(self, *args, **options):
+        path = options['file'] or settings.REQUEST_METRICS_FILE
+        summary = metrics.summarize(metrics.load(path))
+        if options['json']:
+            self.stdout.write(json.dumps(summary, ensure_ascii=False,
+                                         indent=2))
+        else:
+            self.write_table(summary)
+        if options['clear'] and os.path.exists(path):
+            os.remove(path)
+
+    def write_table(self, summary):
+        if not summary:
+            self.stdout.write('Замеров нет.')
+            return
+        for view, data in summary.items():
+            self.stdout.write(f'{view} ({data["count"]} запросов)')
+            for metric in ('total_ms', 'sql_ms', 'template_ms', 'queries'):
+                values = data[metric]
+                self.stdout.write(
+                    f'  {metric:<12} p50={values["p50"]} '
+                    f'p95={values["p95"]} p99={values["p99"]}'
+                )
+            for query in data['slowest']:
+                self.stdout.write(f'  {query["ms"]} ms: {query["sql"]}')
@@ -0,0 +1,45 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+
+class Command(BaseCommand):
+    help = ('Переносит журнал WAL в файлы баз SQLite и обновляет '
+            'статистику планировщика; с --interval повторяет.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=0,
+                            help='секунд между запусками; 0 — один раз')
+        parser.add_argument('--vacuum', action='store_true',
+                            help='ещё и пересобрать файлы баз')
+
+    def handle(self, *args, **options):
+        while True:
+            for connection in connections.all():
+                if connection.vendor == 'sqlite':
+                    self.maintain(connection, options['vacuum'])
+                connection.close()
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
+
+    def maintain(self, connection, vacuum):
+        start = time.perf_counter()
+        with connection.cursor() as cursor:
+            # PASSIVE не ждёт читателей: журнал, который сейчас читают,
+            # перенесётся в следующий раз.
+            cursor.execute('PRAGMA wal_checkpoint(PASSIVE)')
+            busy, wal_pages, moved = cursor.fetchone()
+            cursor.execute('PRAGMA optimize')
+            if vacuum:
+                cursor.execute('VACUUM')
+        if wal_pages < 0:
+            report = 'не в режиме WAL'
+        else:
+            report = f'перенесено {moved} из {wal_pages} страниц журнала'
+            if busy:
+                report += ' (база занята)'
+        self.stdout.write(
+            f'{connection.alias}: {report}, '
+            f'{(time.perf_counter() - start) * 1000:.0f} мс')
@@ -0,0 +1,43 @@
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+class Command(BaseCommand):
+    help = ('Копирует основную базу SQLite в реплики; с --interval '
+            'повторяет копирование, имитируя отставание реплик.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=0,
+                            help='секунд между копированиями; 0 — один раз')
+
+    def handle(self, *args, **options):
+        if not settings.DATABASE_REPLICAS:
+            raise CommandError('Реплики не настроены (YATUBE_REPLICAS).')
+        if connections[DEFAULT_DB_ALIAS].vendor != 'sqlite':
+            raise CommandError('Реплики других СУБД обновляет сама СУБД.')
+        while True:
+            start = time.perf_counter()
+            for alias in settings.DATABASE_REPLICAS:
+                self.copy(settings.DATABASES[alias]['NAME'])
+            self.stdout.write(
+                f'Реплики обновлены за '
+                f'{(time.perf_counter() - start) * 1000:.0f} мс')
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
+
+    def copy(self, target):
+        source = sqlite3.connect(
+            settings.DATABASES[DEFAULT_DB_ALIAS]['NAME'])
+        replica = sqlite3.connect(target)
+        try:
+            # backup() копирует согласованный снимок, даже если в основную
+            # базу в это время пишут.
+            source.backup(replica)
+        finally:
+            replica.close()
+            source.close()
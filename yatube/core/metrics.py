@@ -0,0 +1,128 @@
+"""
+Замеры запросов: число и время SQL, время шаблонов, самые медленные
+запросы. Замер текущего запроса хранится в contextvar, чтобы до него
+могли дотянуться обёртки БД и шаблонов.
+"""
+import json
+import math
+import os
+import threading
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+
+_current = ContextVar('request_metrics', default=None)
+_write_lock = threading.Lock()
+
+
+def current():
+    """Замер текущего запроса или None, если запрос не замеряется."""
+    return _current.get()
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.sql_time = 0.0
+        self.template_time = 0.0
+        self.slowest = []
+        self.total_time = None
+
+    def activate(self):
+        return _current.set(self)
+
+    @staticmethod
+    def deactivate(token):
+        _current.reset(token)
+
+    def record_query(self, execute, sql, params, many, context):
+        """Обёртка для connection.execute_wrapper."""
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            self.queries += 1
+            self.sql_time += duration
+            self.slowest.append((duration, sql))
+            self.slowest.sort(key=lambda item: item[0], reverse=True)
+            del self.slowest[settings.REQUEST_METRICS_SLOWEST:]
+
+    def add_template_time(self, duration):
+        self.template_time += duration
+
+    def finish(self):
+        self.total_time = time.perf_counter() - self.started
+
+    def server_timing(self):
+        return ', '.join((
+            f'db;desc="{self.queries} queries";dur={self.sql_time * 1000:.1f}',
+            f'tpl;dur={self.template_time * 1000:.1f}',
+            f'total;dur={self.total_time * 1000:.1f}',
+        ))
+
+    def as_dict(self, view_name, status):
+        return {
+            'view': view_name,
+            'status': status,
+            'time': time.time(),
+            'total_ms': round(self.total_time * 1000, 3),
+            'sql_ms': round(self.sql_time * 1000, 3),
+            'template_ms': round(self.template_time * 1000, 3),
+            'queries': self.queries,
+            'slowest': [
+                {'ms': round(duration * 1000, 3), 'sql': sql[:500]}
+                for duration, sql in self.slowest
+            ],
+        }
+
+
+def save(record):
+    """Дописывает замер строкой JSON в REQUEST_METRICS_FILE."""
+    path = settings.REQUEST_METRICS_FILE
+    line = json.dumps(record, ensure_ascii=False) + '\n'
+    with _write_lock:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'a', encoding='utf-8') as log:
+            log.write(line)
+
+
+def load(path=None):
+    path = path or settings.REQUEST_METRICS_FILE
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding='utf-8') as log:
+        return [json.loads(line) for line in log if line.strip()]
+
+
+def percentile(values, share):
+    """Перцентиль методом ближайшего ранга."""
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    # Ранг — ceil(share * n); округление до 9 знаков гасит ошибку
+    # float вроде 0.07 * 100 = 7.000000000000001.
+    rank = math.ceil(round(share * len(ordered), 9)) - 1
+    return ordered[max(0, min(len(ordered) - 1, rank))]
+
+
+def summarize(records):
+    """Сводка по view: число замеров и p50/p95/p99 по каждой метрике."""
+    by_view = {}
+    for record in records:
+        by_view.setdefault(record['view'], []).append(record)
+    summary = {}
+    for view, samples in sorted(by_view.items(), key=lambda x: str(x[0])):
+        summary[view] = {'count': len(samples)}
+        for metric in ('total_ms', 'sql_ms', 'template_ms', 'queries'):
+            values = [sample[metric] for sample in samples]
+            summary[view][metric] = {
+                f'p{int(share * 100)}': percentile(values, share)
+                for share in (0.5, 0.95, 0.99)
+            }
+        slowest = [query for sample in samples for query in sample['slowest']]
+        slowest.sort(key=lambda query: query['ms'], reverse=True)
+        summary[view]['slowest'] = slowest[:settings.REQUEST_METRICS_SLOWEST]
+    return summary
@@ -0,0 +1,79 @@
+import random
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from . import metrics, routers
+
+PRIMARY_COOKIE = 'primary_until'
+
+
+class RequestMetricsMiddleware:
+    """
+    Замеряет выборку запросов: SQL, шаблоны и общее время по view.
+
+    Выключенная (REQUEST_METRICS_ENABLED = False) убирает себя из цепочки
+    middleware и ничего не стоит; частота замеров задаётся
+    REQUEST_METRICS_SAMPLE_RATE.
+    """
+
+    def __init__(self, get_response):
+        if not settings.REQUEST_METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.sample_rate = settings.REQUEST_METRICS_SAMPLE_RATE
+
+    def __call__(self, request):
+        if random.random() >= self.sample_rate:
+            return self.get_response(request)
+        measure = metrics.RequestMetrics()
+        token = measure.activate()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(measure.record_query))
+                response = self.get_response(request)
+        finally:
+            metrics.RequestMetrics.deactivate(token)
+        measure.finish()
+        match = request.resolver_match
+        view_name = match.view_name if match else None
+        response['Server-Timing'] = measure.server_timing()
+        metrics.save(measure.as_dict(view_name, response.status_code))
+        return response
+
+
+class ReplicaMiddleware:
+    """
+    Разрешает запросам читать из реплик (см. core.routers).
+
+    После запроса, который писал в модели REPLICA_APPS, ставит cookie:
+    пока она жива, запросы этого браузера читают из основной базы. Без
+    реплик (DATABASE_REPLICAS пуст) убирает себя из цепочки.
+    """
+
+    def __init__(self, get_response):
+        if not settings.DATABASE_REPLICAS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        try:
+            sticky = float(request.COOKIES.get(PRIMARY_COOKIE, 0))
+        except ValueError:
+            sticky = 0
+        state, token = routers.begin(pinned=sticky > time.time())
+        try:
+            response = self.get_response(request)
+        finally:
+            routers.end(token)
+        if state.wrote:
+            seconds = settings.REPLICA_STICKY_SECONDS
+            response.set_cookie(PRIMARY_COOKIE, str(time.time() + seconds),
+                                max_age=seconds, httponly=True,
+                                samesite='Lax')
+        return response
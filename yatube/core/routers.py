@@ -0,0 +1,77 @@
+"""
+Чтение из реплик и запись в основную базу.
+
+Реплики используются только внутри запроса, который прошёл через
+core.middleware.ReplicaMiddleware: фоновые задачи и команды читают то,
+что потом сами же пишут, и остаются на основной базе. Запрос
+переходит на основную базу, как только записал в модель из
+REPLICA_APPS, а сессия, которая недавно писала, читает из неё
+REPLICA_STICKY_SECONDS секунд, чтобы автор сразу видел свой пост.
+Запись сессии или пользователя при входе реплики не отключает: эти
+модели и так читаются из основной базы.
+"""
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+_state = ContextVar('replica_state', default=None)
+
+
+class ReplicaState:
+    """Маршрутизация текущего запроса."""
+
+    def __init__(self, pinned=False):
+        self.pinned = pinned
+        self.wrote = False
+
+
+def begin(pinned=False):
+    state = ReplicaState(pinned)
+    return state, _state.set(state)
+
+
+def end(token):
+    _state.reset(token)
+
+
+def cache_timeout(timeout):
+    """
+    Срок кэширования ответа, который строит текущий запрос.
+
+    Ответ из реплики может отставать от версии, под которой ляжет в
+    кэш, поэтому живёт не дольше REPLICA_STICKY_SECONDS.
+    """
+    state = _state.get()
+    if state is None or state.pinned or not settings.DATABASE_REPLICAS:
+        return timeout
+    return min(timeout, settings.REPLICA_STICKY_SECONDS)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if (state is None or state.pinned
+                or not settings.DATABASE_REPLICAS
+                or model._meta.app_label not in settings.REPLICA_APPS
+                # Внутри транзакции читаются её же записи.
+                or connections[DEFAULT_DB_ALIAS].in_atomic_block):
+            return None
+        return random.choice(settings.DATABASE_REPLICAS)
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if (state is not None
+                and model._meta.app_label in settings.REPLICA_APPS):
+            state.pinned = state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # В репликах те же данные, что и в основной базе.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
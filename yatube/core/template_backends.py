@@ -0,0 +1,33 @@
+import time
+
+from django.template import TemplateDoesNotExist
+from django.template.backends import django
+from django.template.backends.django import reraise
+
+from . import metrics
+
+
+class Template(django.Template):
+    """Шаблон, время отрисовки которого попадает в замер запроса."""
+
+    def render(self, context=None, request=None):
+        measure = metrics.current()
+        if measure is None:
+            return super().render(context, request)
+        start = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            measure.add_template_time(time.perf_counter() - start)
+
+
+class DjangoTemplates(django.DjangoTemplates):
+
+    def from_string(self, template_code):
+        return Template(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return Template(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
@@ -1,4 +1,23 @@
-from django.test import TestCase, Client
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.http import HttpResponse
+from django.template import engines
+from django.test import (Client, RequestFactory, SimpleTestCase, TestCase,
+                         TransactionTestCase, override_settings)
+
+from core import metrics, routers, uploads, warmup
+from core.middleware import PRIMARY_COOKIE, ReplicaMiddleware
+from posts.models import Post, User
+from yatube import settings_production
 
 
 class ViewTestClass(TestCase):
@@ -11,3 +30,172 @@ class ViewTestClass(TestCase):
         response = self.client.get('/nonexists_page/')
         self.assertEqual(response.status_code, 404)
         self.assertTemplateUsed(response, 'core/404.html')
+
+
+class RequestMetricsTest(TestCase):
+    def setUp(self):
+        self.metrics_dir = tempfile.mkdtemp()
+        self.metrics_file = os.path.join(self.metrics_dir, 'requests.jsonl')
+
+    def tearDown(self):
+        shutil.rmtree(self.metrics_dir, ignore_errors=True)
+
+    def test_disabled_middleware_adds_nothing(self):
+        response = Client().get('/about/author/')
+        self.assertNotIn('Server-Timing', response)
+        self.assertFalse(os.path.exists(self.metrics_file))
+
+    def test_request_is_measured(self):
+        with override_settings(REQUEST_METRICS_ENABLED=True,
+                               REQUEST_METRICS_FILE=self.metrics_file):
+            response = Client().get('/')
+            records = metrics.load()
+        self.assertIn('db;desc=', response['Server-Timing'])
+        self.assertEqual(len(records), 1)
+        record = records[0]
+        self.assertEqual(record['view'], 'posts:index')
+        self.assertGreater(record['queries'], 0)
+        self.assertGreater(record['template_ms'], 0)
+        self.assertLessEqual(len(record['slowest']), 3)
+
+    def test_sampling_skips_requests(self):
+        with override_settings(REQUEST_METRICS_ENABLED=True,
+                               REQUEST_METRICS_SAMPLE_RATE=0,
+                               REQUEST_METRICS_FILE=self.metrics_file):
+            response = Client().get('/about/author/')
+        self.assertNotIn('Server-Timing', response)
+        self.assertFalse(os.path.exists(self.metrics_file))
+
+    def test_percentile_is_nearest_rank(self):
+        self.assertEqual(metrics.percentile([5, 1, 4, 2, 3], 0.5), 3)
+        self.assertEqual(metrics.percentile([1, 2, 3, 4], 0.5), 2)
+        self.assertEqual(metrics.percentile(range(1, 21), 0.95), 19)
+        self.assertEqual(metrics.percentile(range(1, 101), 0.07), 7)
+        self.assertIsNone(metrics.percentile([], 0.5))
+
+    def test_report_command(self):
+        with override_settings(REQUEST_METRICS_ENABLED=True,
+                               REQUEST_METRICS_FILE=self.metrics_file):
+            client = Client()
+            for _ in range(3):
+                client.get('/about/author/')
+            out = StringIO()
+            call_command('request_metrics', '--json', stdout=out)
+        summary = json.loads(out.getvalue())
+        self.assertEqual(summary['about:author']['count'], 3)
+        self.assertIn('p95', summary['about:author']['total_ms'])
+
+
+@override_settings(TEMPLATES=settings_production.TEMPLATES)
+class UploadLimitTest(SimpleTestCase):
+    @override_settings(FILE_UPLOAD_MAX_BYTES=1000)
+    def test_oversized_upload_stops_reading_body(self):
+        request = RequestFactory().post('/', {
+            'text': 'Пост',
+            'image': SimpleUploadedFile('big.gif', b'\0' * 10 ** 6),
+            'group': '',
+        })
+        files = uploads.files(request)
+        self.assertEqual(request.POST['text'], 'Пост')
+        self.assertNotIn('group', request.POST)
+        self.assertGreater(files['image'].size, 1000)
+        self.assertNotIn('image', request.FILES)
+        # Остаток тела не прочитан.
+        self.assertGreater(request._stream.remaining, 900 * 1000)
+
+
+class WarmupTest(TestCase):
+    def test_templates_are_compiled_into_cached_loader(self):
+        self.assertGreater(warmup.templates(), 0)
+        loader = engines.all()[0].engine.template_loaders[0]
+        cached = {template.origin.template_name
+                  for template in loader.get_template_cache.values()}
+        self.assertTrue({'base.html', 'includes/post_card.html',
+                         'posts/index.html'} <= cached)
+
+    def test_url_names_are_resolved(self):
+        self.assertGreater(warmup.urls(), 0)
+
+
+@override_settings(DATABASE_REPLICAS=['replica1'])
+class ReplicaRouterTest(SimpleTestCase):
+    def setUp(self):
+        self.router = routers.ReplicaRouter()
+
+    def through_middleware(self, view, **cookies):
+        request = RequestFactory().get('/')
+        request.COOKIES.update(cookies)
+        return ReplicaMiddleware(view)(request)
+
+    def test_reads_go_to_replicas_only_inside_requests(self):
+        self.assertIsNone(self.router.db_for_read(Post))
+        reads = []
+
+        def view(request):
+            reads.append(self.router.db_for_read(Post))
+            reads.append(self.router.db_for_read(User))
+            return HttpResponse()
+
+        self.assertNotIn(PRIMARY_COOKIE, self.through_middleware(view).cookies)
+        self.assertEqual(reads, ['replica1', None])
+
+    def test_writing_session_sticks_to_primary(self):
+        reads = []
+
+        def writing_view(request):
+            self.assertEqual(self.router.db_for_write(Post), 'default')
+            reads.append(self.router.db_for_read(Post))
+            return HttpResponse()
+
+        def reading_view(request):
+            reads.append(self.router.db_for_read(Post))
+            return HttpResponse()
+
+        cookie = self.through_middleware(writing_view).cookies[PRIMARY_COOKIE]
+        self.through_middleware(reading_view,
+                                **{PRIMARY_COOKIE: cookie.value})
+        self.through_middleware(reading_view, **{PRIMARY_COOKIE: '0'})
+        self.assertEqual(reads, [None, None, 'replica1'])
+
+    def test_login_does_not_stick_to_primary(self):
+        def login_view(request):
+            self.assertEqual(self.router.db_for_write(Session), 'default')
+            self.assertEqual(self.router.db_for_write(User), 'default')
+            return HttpResponse()
+
+        self.assertNotIn(PRIMARY_COOKIE,
+                         self.through_middleware(login_view).cookies)
+
+    def test_pages_from_replica_are_cached_briefly(self):
+        timeouts = []
+
+        def view(request):
+            timeouts.append(routers.cache_timeout(3600))
+            self.router.db_for_write(Post)
+            timeouts.append(routers.cache_timeout(3600))
+            return HttpResponse()
+
+        self.through_middleware(view)
+        self.assertEqual(timeouts, [settings.REPLICA_STICKY_SECONDS, 3600])
+        self.assertEqual(routers.cache_timeout(3600), 3600)
+
+    def test_replicas_are_not_migrated(self):
+        self.assertFalse(self.router.allow_migrate('replica1', 'posts'))
+        self.assertIsNone(self.router.allow_migrate('default', 'posts'))
+
+
+class SQLiteBackendTest(TestCase):
+    def test_connection_gets_pragmas(self):
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(cursor.fetchone()[0], 5000)
+            cursor.execute('PRAGMA synchronous')
+            # 1 — NORMAL.
+            self.assertEqual(cursor.fetchone()[0], 1)
+
+
+class SQLiteMaintenanceTest(TransactionTestCase):
+    def test_maintenance_command(self):
+        out = StringIO()
+        call_command('sqlite_maintenance', stdout=out)
+        self.assertIn('default:', out.getvalue())
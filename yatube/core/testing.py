@@ -0,0 +1,36 @@
+from contextlib import contextmanager
+
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+@contextmanager
+def max_queries(budget, using='default'):
+    """
+    Падает, если блок выполнил больше budget SQL-запросов.
+
+    В сообщении перечисляются все запросы, чтобы N+1 было видно сразу.
+    """
+    with CaptureQueriesContext(connections[using]) as context:
+        yield context
+    executed = len(context.captured_queries)
+    if executed > budget:
+        queries = '\n'.join(
+            f'{number}. {query["sql"]}'
+            for number, query in enumerate(context.captured_queries, 1)
+        )
+        raise QueryBudgetExceeded(
+            f'Выполнено {executed} запросов при бюджете {budget}:\n'
+            f'{queries}'
+        )
+
+
+class QueryBudgetMixin:
+    """Добавляет в TestCase assertMaxQueries(budget)."""
+
+    def assertMaxQueries(self, budget, using='default'):
+        return max_queries(budget, using)
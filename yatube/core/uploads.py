@@ -0,0 +1,47 @@
+"""
+Обработчик загрузок с ограничением размера файла.
+
+Файл всегда пишется во временный файл по частям, поэтому память
+процесса не зависит от размера загрузки. Как только файл превышает
+FILE_UPLOAD_MAX_BYTES, разбор тела прекращается: остаток запроса не
+читается, и большая загрузка не держит воркер всю передачу. Вместо
+файла files() отдаёт форме OversizedUpload с уже полученным размером,
+и форма отклоняет его обычной проверкой размера.
+"""
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import (StopUpload,
+                                             TemporaryFileUploadHandler)
+
+
+class OversizedUpload(UploadedFile):
+    """Файл, отброшенный при загрузке; size — сколько байт успело прийти."""
+
+    def __init__(self, name, content_type, size):
+        super().__init__(BytesIO(), name, content_type, size)
+
+
+class LimitedTemporaryFileUploadHandler(TemporaryFileUploadHandler):
+    def receive_data_chunk(self, raw_data, start):
+        received = start + len(raw_data)
+        if received > settings.FILE_UPLOAD_MAX_BYTES:
+            # Поля после файла тоже не будут прочитаны.
+            if not hasattr(self.request, 'oversized_uploads'):
+                self.request.oversized_uploads = {}
+            self.request.oversized_uploads[self.field_name] = OversizedUpload(
+                self.file_name, self.content_type, received)
+            raise StopUpload(connection_reset=True)
+        return super().receive_data_chunk(raw_data, start)
+
+
+def files(request):
+    """request.FILES вместе с файлами, отброшенными из-за размера."""
+    uploaded = request.FILES
+    oversized = getattr(request, 'oversized_uploads', None)
+    if not oversized:
+        return uploaded
+    uploaded = uploaded.copy()
+    uploaded.update(oversized)
+    return uploaded
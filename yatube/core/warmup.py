@@ -0,0 +1,76 @@
+"""
+Прогрев процесса перед первым запросом.
+
+templates() компилирует все шаблоны из каталогов движков Django:
+с кэширующим загрузчиком они остаются в памяти процесса, и первый
+запрос после деплоя не разбирает base.html, includes/* и страницы
+приложений. urls() заполняет таблицы reverse() всех пространств имён
+URL, которые иначе строятся при первом {% url %}.
+"""
+import logging
+import os
+import time
+
+from django.template import TemplateSyntaxError, engines
+from django.template.backends.django import DjangoTemplates
+from django.urls import get_resolver
+
+logger = logging.getLogger(__name__)
+
+
+def _template_dirs(loaders):
+    """Каталоги загрузчиков, включая вложенные в кэширующий."""
+    for loader in loaders:
+        yield from _template_dirs(getattr(loader, 'loaders', ()))
+        if hasattr(loader, 'get_dirs'):
+            yield from loader.get_dirs()
+
+
+def _template_names(directory):
+    for root, _, files in os.walk(directory):
+        for name in files:
+            path = os.path.relpath(os.path.join(root, name), directory)
+            yield path.replace(os.sep, '/')
+
+
+def templates():
+    """Компилирует шаблоны; возвращает число скомпилированных."""
+    compiled = 0
+    for backend in engines.all():
+        if not isinstance(backend, DjangoTemplates):
+            continue
+        engine = backend.engine
+        for directory in dict.fromkeys(
+                _template_dirs(engine.template_loaders)):
+            for name in _template_names(directory):
+                try:
+                    engine.get_template(name)
+                except (TemplateSyntaxError, UnicodeDecodeError):
+                    # Не шаблон Django (например, картинка в каталоге
+                    # шаблонов) или шаблон стороннего приложения для
+                    # другого окружения; он разберётся, если понадобится.
+                    logger.debug('Шаблон %s не скомпилирован', name,
+                                 exc_info=True)
+                else:
+                    compiled += 1
+    return compiled
+
+
+def _populate(resolver):
+    count = len(resolver.reverse_dict)
+    for _, namespace_resolver in resolver.namespace_dict.values():
+        count += _populate(namespace_resolver)
+    return count
+
+
+def urls():
+    """Строит таблицы reverse(); возвращает число имён."""
+    return _populate(get_resolver())
+
+
+def run():
+    start = time.perf_counter()
+    compiled, names = templates(), urls()
+    logger.info('Прогрев: %d шаблонов, %d имён URL за %.0f мс',
+                compiled, names, (time.perf_counter() - start) * 1000)
+    return {'templates': compiled, 'urls': names}
@@ -0,0 +1,20 @@
+from django.contrib import admin
+
+from . import queue
+from .models import Job
+
+
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'name', 'status', 'attempts', 'run_at', 'created')
+    list_filter = ('status', 'name')
+    readonly_fields = ('name', 'payload', 'attempts', 'locked_until',
+                       'last_error', 'created')
+    actions = ('retry',)
+
+    def retry(self, request, queryset):
+        count = queue.retry(queryset)
+        self.message_user(request, f'Возвращено в очередь: {count}')
+    retry.short_description = 'Повторить невыполненные задачи'
+
+
+admin.site.register(Job, JobAdmin)
@@ -0,0 +1,48 @@
+import multiprocessing
+import signal
+import threading
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from jobs import worker
+
+
+class Command(BaseCommand):
+    help = ('Запускает воркеры очереди фоновых задач; SIGTERM или Ctrl+C '
+            'дают дождаться текущих задач.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=1,
+                            help='число процессов-воркеров')
+        parser.add_argument('--burst', action='store_true',
+                            help='выйти, когда очередь опустеет')
+
+    def handle(self, *args, **options):
+        processes = max(options['processes'], 1)
+        if processes == 1:
+            stop = threading.Event()
+            self.stop_on_signals(stop)
+            done = worker.work(stop, burst=options['burst'])
+            self.stdout.write(f'Выполнено задач: {done}')
+            return
+        # Дочерние процессы не должны унаследовать открытые соединения.
+        connections.close_all()
+        context = multiprocessing.get_context('fork')
+        stop = context.Event()
+        workers = [
+            context.Process(target=worker.work, args=(stop, options['burst']),
+                            name=f'jobs-{number}')
+            for number in range(processes)
+        ]
+        for process in workers:
+            process.start()
+        self.stop_on_signals(stop)
+        for process in workers:
+            process.join()
+
+    def stop_on_signals(self, stop):
+        def handler(signum, frame):
+            stop.set()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, handler)
@@ -0,0 +1,155 @@
+"""
+Очередь фоновых задач в базе.
+
+Задача — функция, помеченная @task; enqueue() записывает её вызов в
+таблицу Job и сразу возвращается. Внутри транзакции задача
+фиксируется вместе с данными, которые её породили, и не выполнится,
+если транзакция откатится. Воркеры (manage.py run_jobs) забирают
+задачи условным UPDATE, так что одну задачу не выполнят дважды.
+Упавшая задача повторяется с экспоненциальной задержкой, после
+JOB_MAX_ATTEMPTS попыток остаётся в таблице со статусом dead — это
+список необработанных задач, который видно в админке.
+"""
+import json
+import logging
+import random
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+CLAIM_BATCH = 10
+
+
+class UnknownTask(Exception):
+    pass
+
+
+def task(func):
+    """Разрешает ставить функцию в очередь."""
+    func.is_task = True
+    return func
+
+
+def task_name(func):
+    return f'{func.__module__}.{func.__qualname__}'
+
+
+def resolve(name):
+    try:
+        func = import_string(name)
+    except ImportError as error:
+        raise UnknownTask(name) from error
+    if not getattr(func, 'is_task', False):
+        raise UnknownTask(name)
+    return func
+
+
+def enqueue(func, delay=0, **kwargs):
+    """Ставит вызов func(**kwargs) в очередь; аргументы — JSON."""
+    return Job.objects.create(
+        name=task_name(func),
+        payload=json.dumps(kwargs, cls=DjangoJSONEncoder),
+        run_at=timezone.now() + timedelta(seconds=delay),
+    )
+
+
+def _stale(now):
+    # Задача воркера, который упал, не завершив её.
+    return Q(status=Job.RUNNING, locked_until__lt=now)
+
+
+def _ready(now):
+    # Брошенная задача снова доступна после JOB_TIMEOUT, если у неё
+    # остались попытки.
+    return (Q(status=Job.QUEUED, run_at__lte=now)
+            | _stale(now) & Q(attempts__lt=settings.JOB_MAX_ATTEMPTS))
+
+
+def _bury(now):
+    """
+    Помечает dead брошенные задачи без оставшихся попыток.
+
+    _fail() не вызывается, если задача роняет сам воркер, поэтому
+    попытки считаются при выдаче задачи и проверяются здесь.
+    """
+    buried = Job.objects.filter(
+        _stale(now), attempts__gte=settings.JOB_MAX_ATTEMPTS,
+    ).update(status=Job.DEAD, locked_until=None,
+             last_error='Воркер не завершил задачу за JOB_TIMEOUT.')
+    if buried:
+        logger.error('Брошенных задач без попыток: %s', buried)
+
+
+def claim(now=None):
+    """Забирает следующую готовую задачу или возвращает None."""
+    now = now or timezone.now()
+    _bury(now)
+    ready = _ready(now)
+    candidates = (Job.objects.filter(ready).order_by('run_at', 'id')
+                  .values_list('id', flat=True)[:CLAIM_BATCH])
+    for job_id in candidates:
+        # Задачу получает тот воркер, чей UPDATE её изменил.
+        taken = Job.objects.filter(ready, id=job_id).update(
+            status=Job.RUNNING,
+            attempts=F('attempts') + 1,
+            locked_until=now + timedelta(seconds=settings.JOB_TIMEOUT),
+        )
+        if taken:
+            return Job.objects.get(id=job_id)
+    return None
+
+
+def backoff(attempts):
+    """Задержка перед повтором в секундах, с разбросом ±10%."""
+    delay = min(settings.JOB_RETRY_DELAY * 2 ** (attempts - 1),
+                settings.JOB_RETRY_MAX_DELAY)
+    return delay * random.uniform(0.9, 1.1)
+
+
+def _fail(job, error, final=False):
+    job.last_error = ''.join(traceback.format_exception(
+        type(error), error, error.__traceback__))
+    job.locked_until = None
+    if final or job.attempts >= settings.JOB_MAX_ATTEMPTS:
+        job.status = Job.DEAD
+        logger.error('Задача %s не выполнена: %s', job, error)
+    else:
+        job.status = Job.QUEUED
+        job.run_at = timezone.now() + timedelta(
+            seconds=backoff(job.attempts))
+        logger.warning('Задача %s упала, повтор в %s', job, job.run_at)
+    job.save(update_fields=['status', 'run_at', 'locked_until',
+                            'last_error'])
+
+
+def run(job):
+    """Выполняет забранную задачу; возвращает True при успехе."""
+    try:
+        func = resolve(job.name)
+        kwargs = json.loads(job.payload)
+    except (UnknownTask, ValueError) as error:
+        # Повтор не поможет.
+        _fail(job, error, final=True)
+        return False
+    try:
+        func(**kwargs)
+    except Exception as error:
+        _fail(job, error)
+        return False
+    Job.objects.filter(id=job.id).delete()
+    return True
+
+
+def retry(jobs):
+    """Возвращает задачи из списка невыполненных в очередь."""
+    return jobs.filter(status=Job.DEAD).update(
+        status=Job.QUEUED, attempts=0, run_at=timezone.now())
@@ -0,0 +1,102 @@
+import threading
+from datetime import timedelta
+
+from django.core import mail
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from jobs import queue, worker
+from jobs.models import Job
+from posts.models import User
+
+calls = []
+
+
+@queue.task
+def remember(value):
+    calls.append(value)
+
+
+@queue.task
+def explode():
+    raise RuntimeError('Сбой')
+
+
+def not_a_task():
+    pass
+
+
+def run_queue():
+    return worker.work(threading.Event(), burst=True)
+
+
+class JobQueueTest(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_job_runs_and_is_removed(self):
+        queue.enqueue(remember, value=42)
+        self.assertEqual(run_queue(), 1)
+        self.assertEqual(calls, [42])
+        self.assertFalse(Job.objects.exists())
+
+    def test_claimed_job_is_not_taken_twice(self):
+        queue.enqueue(remember, value=1)
+        job = queue.claim()
+        self.assertEqual(job.status, Job.RUNNING)
+        self.assertIsNone(queue.claim())
+        # Воркер пропал: после таймаута задачу заберёт другой.
+        later = timezone.now() + timedelta(hours=1)
+        self.assertEqual(queue.claim(later), job)
+
+    @override_settings(JOB_MAX_ATTEMPTS=2, JOB_RETRY_DELAY=10)
+    def test_failing_job_is_retried_then_dead(self):
+        queue.enqueue(explode)
+        with self.assertLogs('jobs.queue', 'WARNING'):
+            self.assertEqual(run_queue(), 0)
+        job = Job.objects.get()
+        self.assertEqual((job.status, job.attempts), (Job.QUEUED, 1))
+        self.assertGreater(job.run_at, timezone.now() + timedelta(seconds=8))
+        self.assertIn('Сбой', job.last_error)
+        with self.assertLogs('jobs.queue', 'ERROR'):
+            self.assertFalse(queue.run(queue.claim(job.run_at)))
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.DEAD)
+        self.assertIsNone(queue.claim(timezone.now() + timedelta(days=1)))
+        self.assertEqual(queue.retry(Job.objects.all()), 1)
+        self.assertEqual(Job.objects.get().status, Job.QUEUED)
+
+    @override_settings(JOB_MAX_ATTEMPTS=2)
+    def test_job_crashing_worker_ends_dead(self):
+        queue.enqueue(remember, value=1)
+        now = timezone.now()
+        # Каждый воркер падает, не вернув задачу в очередь.
+        for _ in range(2):
+            now += timedelta(hours=1)
+            self.assertIsNotNone(queue.claim(now))
+        with self.assertLogs('jobs.queue', 'ERROR'):
+            self.assertIsNone(queue.claim(now + timedelta(hours=1)))
+        job = Job.objects.get()
+        self.assertEqual((job.status, job.attempts), (Job.DEAD, 2))
+        self.assertEqual(queue.retry(Job.objects.all()), 1)
+
+    def test_only_tasks_can_run(self):
+        Job.objects.create(name=f'{__name__}.not_a_task')
+        with self.assertLogs('jobs.queue', 'ERROR'):
+            run_queue()
+        self.assertEqual(Job.objects.get().status, Job.DEAD)
+
+
+class QueuedPasswordResetTest(TestCase):
+    def test_reset_email_is_sent_by_worker(self):
+        User.objects.create_user(username='gleb', email='gleb@example.com',
+                                 password='secret-password')
+        response = Client().post(reverse('users:password_reset'),
+                                 {'email': 'gleb@example.com'})
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(mail.outbox, [])
+        run_queue()
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['gleb@example.com'])
+        self.assertIn('/reset/', mail.outbox[0].body)
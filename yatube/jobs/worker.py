@@ -0,0 +1,30 @@
+"""Цикл воркера очереди задач."""
+import logging
+
+from django.conf import settings
+from django.db import close_old_connections
+
+from . import queue
+
+logger = logging.getLogger(__name__)
+
+
+def work(stop, burst=False):
+    """
+    Выполняет задачи, пока не выставлен stop.
+
+    burst — выйти, как только очередь опустела. Возвращает число
+    выполненных задач.
+    """
+    done = 0
+    while not stop.is_set():
+        close_old_connections()
+        job = queue.claim()
+        if job is None:
+            if burst:
+                break
+            stop.wait(settings.JOB_POLL_INTERVAL)
+            continue
+        if queue.run(job):
+            done += 1
+    return done
@@ -0,0 +1,20 @@
+from django.contrib import admin
+
+from .models import Digest, Inbox
+
+
+class InboxAdmin(admin.ModelAdmin):
+    list_display = ('user', 'unread_count', 'pending', 'last_sent',
+                    'email_digests')
+    list_filter = ('pending', 'email_digests')
+    raw_id_fields = ('user',)
+
+
+class DigestAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'user', 'posts_count', 'comments_count', 'read',
+                    'created')
+    raw_id_fields = ('user',)
+
+
+admin.site.register(Inbox, InboxAdmin)
+admin.site.register(Digest, DigestAdmin)
@@ -0,0 +1,12 @@
+from django.utils.functional import SimpleLazyObject
+
+from .digests import unread_count
+
+
+def unread(request):
+    """Число непрочитанных дайджестов для шапки, читается лениво."""
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        return {}
+    return {'unread_notifications': SimpleLazyObject(
+        lambda: unread_count(user))}
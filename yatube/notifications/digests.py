@@ -0,0 +1,223 @@
+"""
+Дайджесты уведомлений о новых постах и комментариях.
+
+Сигналы пишут одну строку Event на новый пост или комментарий, сколько
+бы подписчиков ни было у автора. build() запускается периодически
+(manage.py send_digests):
+
+1. События после курсора отмечают получателей — подписчиков автора
+   поста и автора поста, который прокомментировали: пачки массовых
+   INSERT и UPDATE на запуск вместо записи на каждую пару событие —
+   получатель.
+2. Отмеченные получатели, которым последний дайджест пришёл раньше
+   чем NOTIFICATION_DIGEST_INTERVAL секунд назад, ждут; остальные
+   получают один дайджест со счётчиками и последними событиями, а
+   письма уходят пачкой через очередь задач.
+
+Счётчик непрочитанных виден в шапке каждой страницы, поэтому build()
+и read_all() поднимают версию области получателя (viewer_scope): его
+закэшированные ленты и их ETag устаревают.
+"""
+import json
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, Max, Q
+from django.utils import timezone
+
+from jobs.queue import enqueue
+from posts import caching
+from posts.models import Follow
+
+from .models import Digest, Event, EventCursor, Inbox
+from .tasks import send_digest_emails
+
+CURSOR = 'digests'
+CHUNK = 500
+
+
+def _chunks(ids):
+    ids = list(ids)
+    for start in range(0, len(ids), CHUNK):
+        yield ids[start:start + CHUNK]
+
+
+def _recipients(rows):
+    """Получатели событий: подписчики авторов и авторы постов."""
+    authors = {actor for kind, actor, _ in rows if kind == Event.POST}
+    recipients = set(Follow.objects.filter(author_id__in=authors)
+                     .values_list('user_id', flat=True).iterator())
+    recipients.update(post_author for kind, actor, post_author in rows
+                      if kind == Event.COMMENT and actor != post_author)
+    return recipients
+
+
+def mark():
+    """Отмечает получателей новых событий; возвращает id последнего."""
+    cursor, _ = EventCursor.objects.get_or_create(name=CURSOR)
+    rows = list(Event.objects.filter(id__gt=cursor.position).order_by('id')
+                .values_list('id', 'kind', 'actor_id', 'post__author_id'))
+    if not rows:
+        return cursor.position
+    for chunk in _chunks(_recipients([row[1:] for row in rows])):
+        # Новый получатель узнаёт только о событиях с этого запуска.
+        Inbox.objects.bulk_create(
+            (Inbox(user_id=user_id, digested=cursor.position)
+             for user_id in chunk),
+            ignore_conflicts=True,
+        )
+        Inbox.objects.filter(user_id__in=chunk).update(pending=True)
+    cursor.position = rows[-1][0]
+    cursor.save()
+    return cursor.position
+
+
+def _item(event):
+    text = event.comment.text if event.comment_id else event.post.text
+    return {
+        'kind': event.kind,
+        'post': event.post_id,
+        'actor': event.actor.username,
+        'text': (text or '')[:100],
+        'created': event.created.isoformat(),
+    }
+
+
+def _recipients_of(row, followers, inboxes):
+    event_id, kind, actor_id, post_author_id = row
+    if kind == Event.POST:
+        users = followers.get(actor_id, ())
+    else:
+        users = (post_author_id,) if post_author_id in inboxes else ()
+    return [user_id for user_id in users
+            if user_id != actor_id and event_id > inboxes[user_id].digested]
+
+
+def _digests(inboxes, upto):
+    """
+    Дайджесты пачки получателей, у кого есть что показать.
+
+    Запросов три на всю пачку: подписки получателей, события пачки
+    (только id и получатели) и подробности отобранных событий.
+    """
+    inboxes = {inbox.user_id: inbox for inbox in inboxes}
+    if not inboxes:
+        return {}
+    followers = defaultdict(list)
+    follows = Follow.objects.filter(user_id__in=list(inboxes))
+    for user_id, author_id in follows.values_list('user_id', 'author_id'):
+        followers[author_id].append(user_id)
+    since = min(inbox.digested for inbox in inboxes.values())
+    rows = (Event.objects.filter(id__gt=since, id__lte=upto)
+            .filter(Q(kind=Event.POST,
+                      actor_id__in=follows.values('author_id'))
+                    | Q(kind=Event.COMMENT,
+                        post__author_id__in=list(inboxes)))
+            .order_by('-id')
+            .values_list('id', 'kind', 'actor_id', 'post__author_id'))
+    counts = defaultdict(Counter)
+    picked = defaultdict(list)
+    for row in rows.iterator():
+        for user_id in _recipients_of(row, followers, inboxes):
+            counts[user_id][row[1]] += 1
+            if len(picked[user_id]) < settings.NOTIFICATION_DIGEST_ITEMS:
+                picked[user_id].append(row[0])
+    events = Event.objects.select_related('actor', 'post', 'comment').in_bulk(
+        [event_id for ids in picked.values() for event_id in ids])
+    return {
+        user_id: Digest(
+            user_id=user_id, posts_count=count[Event.POST],
+            comments_count=count[Event.COMMENT],
+            items=json.dumps([_item(events[event_id])
+                              for event_id in picked[user_id]],
+                             ensure_ascii=False))
+        for user_id, count in counts.items()
+    }
+
+
+def _due(now):
+    recent = now - timedelta(seconds=settings.NOTIFICATION_DIGEST_INTERVAL)
+    return (Inbox.objects.filter(pending=True)
+            .filter(Q(last_sent__isnull=True) | Q(last_sent__lte=recent))
+            .select_related('user')
+            .order_by('last_sent')[:settings.NOTIFICATION_BATCH])
+
+
+@transaction.atomic
+def build(now=None):
+    """Собирает дайджесты; возвращает их число."""
+    now = now or timezone.now()
+    upto = mark()
+    due = list(_due(now))
+    digests = _digests(due, upto)
+    Digest.objects.bulk_create(digests.values(), batch_size=CHUNK)
+    sent = list(digests)
+    empty = [inbox.pk for inbox in due if inbox.pk not in digests]
+    mail_to = [inbox.pk for inbox in due if inbox.pk in digests
+               and inbox.email_digests and inbox.user.email]
+    mailed = []
+    for chunk in _chunks(sent):
+        Inbox.objects.filter(user_id__in=chunk).update(
+            pending=False, digested=upto, last_sent=now,
+            unread_count=F('unread_count') + 1)
+    for chunk in _chunks(empty):
+        Inbox.objects.filter(user_id__in=chunk).update(
+            pending=False, digested=upto)
+    for chunk in _chunks(mail_to):
+        # bulk_create в SQLite не возвращает id; дайджест получателя,
+        # только что созданный, — последний у него.
+        mailed.extend(Digest.objects.filter(user_id__in=chunk)
+                      .values('user_id').annotate(last=Max('id'))
+                      .values_list('last', flat=True))
+    transaction.on_commit(lambda: _changed(sent))
+    # Одна задача на запуск: письма уходят через одно соединение.
+    if mailed:
+        enqueue(send_digest_emails, digest_ids=mailed)
+    prune(now)
+    return len(sent)
+
+
+def prune(now):
+    """Удаляет разобранные события старше NOTIFICATION_RETENTION дней."""
+    cursor = EventCursor.objects.get(name=CURSOR)
+    old = now - timedelta(days=settings.NOTIFICATION_RETENTION)
+    return Event.objects.filter(id__lte=cursor.position,
+                                created__lt=old).delete()[0]
+
+
+def _unread_key(user_id):
+    return f'unread:{user_id}'
+
+
+def _changed(user_ids):
+    """Сбрасывает счётчик в кэше и закэшированные страницы получателей."""
+    cache.delete_many([_unread_key(user_id) for user_id in user_ids])
+    caching.bump(*(caching.viewer_scope(user_id) for user_id in user_ids))
+
+
+def unread_count(user):
+    """
+    Число непрочитанных дайджестов.
+
+    Счётчик показывается в шапке каждой страницы, поэтому берётся из
+    кэша; при промахе — одна строка Inbox по первичному ключу. build()
+    и read_all() сбрасывают кэш получателей, чей счётчик изменился;
+    процессы с другим кэшем увидят изменение через
+    NOTIFICATION_UNREAD_TIMEOUT.
+    """
+    key = _unread_key(user.pk)
+    count = cache.get(key)
+    if count is None:
+        count = (Inbox.objects.filter(user_id=user.pk)
+                 .values_list('unread_count', flat=True).first() or 0)
+        cache.set(key, count, settings.NOTIFICATION_UNREAD_TIMEOUT)
+    return count
+
+
+def read_all(user):
+    Digest.objects.filter(user=user, read=False).update(read=True)
+    Inbox.objects.filter(user_id=user.pk).update(unread_count=0)
+    transaction.on_commit(lambda: _changed([user.pk]))
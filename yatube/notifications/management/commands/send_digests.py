@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from notifications import digests
+
+
+class Command(BaseCommand):
+    help = ('Собирает дайджесты уведомлений по событиям с прошлого '
+            'запуска и ставит письма в очередь. Запускается '
+            'периодически, например из cron.')
+
+    def handle(self, *args, **options):
+        self.stdout.write(f'Дайджестов: {digests.build()}')
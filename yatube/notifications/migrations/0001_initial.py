@@ -0,0 +1,92 @@
+# Generated by Django 2.2.16 on 2026-10-18 17:53
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('auth', '0011_update_proxy_permissions'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0020_post_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Digest',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')),
+                ('posts_count', models.PositiveIntegerField(default=0, verbose_name='Новых постов')),
+                ('comments_count', models.PositiveIntegerField(default=0, verbose_name='Новых комментариев')),
+                ('items', models.TextField(default='[]', verbose_name='События')),
+                ('read', models.BooleanField(default=False, verbose_name='Прочитан')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Event',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')),
+                ('kind', models.CharField(choices=[('post', 'Пост'), ('comment', 'Комментарий')], max_length=10, verbose_name='Тип')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='EventCursor',
+            fields=[
+                ('name', models.CharField(max_length=50, primary_key=True, serialize=False, verbose_name='Имя')),
+                ('position', models.BigIntegerField(default=0, verbose_name='Последний id')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Inbox',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='inbox', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('unread_count', models.PositiveIntegerField(default=0, verbose_name='Непрочитанных')),
+                ('pending', models.BooleanField(default=False, verbose_name='Ждёт дайджеста')),
+                ('digested', models.BigIntegerField(default=0, verbose_name='Учтено до события')),
+                ('last_sent', models.DateTimeField(null=True, verbose_name='Последний дайджест')),
+                ('email_digests', models.BooleanField(default=True, verbose_name='Дайджесты на почту')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='inbox',
+            index=models.Index(fields=['pending', 'last_sent'], name='inbox_pending_idx'),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='actor',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notification_events', to=settings.AUTH_USER_MODEL, verbose_name='Автор'),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='comment',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='notification_events', to='posts.Comment', verbose_name='Комментарий'),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='post',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notification_events', to='posts.Post', verbose_name='Пост'),
+        ),
+        migrations.AddField(
+            model_name='digest',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='digests', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['actor', 'created'], name='event_actor_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['post', 'created'], name='event_post_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='digest',
+            index=models.Index(fields=['user', '-created', '-id'], name='digest_user_created_idx'),
+        ),
+    ]
@@ -0,0 +1,87 @@
+from django.contrib.auth import get_user_model
+from django.db import models
+
+from core.models import CreatedModel
+from posts.models import Comment, Post
+
+User = get_user_model()
+
+
+class Event(CreatedModel):
+    """Новый пост или комментарий; один на событие, не на получателя."""
+    POST = 'post'
+    COMMENT = 'comment'
+    KINDS = (
+        (POST, 'Пост'),
+        (COMMENT, 'Комментарий'),
+    )
+
+    kind = models.CharField('Тип', max_length=10, choices=KINDS)
+    actor = models.ForeignKey(User,
+                              related_name='notification_events',
+                              on_delete=models.CASCADE,
+                              verbose_name='Автор')
+    post = models.ForeignKey(Post,
+                             related_name='notification_events',
+                             on_delete=models.CASCADE,
+                             verbose_name='Пост')
+    comment = models.ForeignKey(Comment,
+                                related_name='notification_events',
+                                on_delete=models.CASCADE,
+                                null=True,
+                                blank=True,
+                                verbose_name='Комментарий')
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['actor', 'created'],
+                         name='event_actor_created_idx'),
+            models.Index(fields=['post', 'created'],
+                         name='event_post_created_idx'),
+        ]
+
+
+class EventCursor(models.Model):
+    """Докуда рассылка дайджестов разобрала события."""
+    name = models.CharField('Имя', max_length=50, primary_key=True)
+    position = models.BigIntegerField('Последний id', default=0)
+
+
+class Inbox(models.Model):
+    """Состояние уведомлений пользователя."""
+    user = models.OneToOneField(User,
+                                primary_key=True,
+                                related_name='inbox',
+                                on_delete=models.CASCADE)
+    unread_count = models.PositiveIntegerField('Непрочитанных', default=0)
+    # Есть события, ещё не попавшие в дайджест.
+    pending = models.BooleanField('Ждёт дайджеста', default=False)
+    # События с id до этого включительно уже разобраны.
+    digested = models.BigIntegerField('Учтено до события', default=0)
+    last_sent = models.DateTimeField('Последний дайджест', null=True)
+    email_digests = models.BooleanField('Дайджесты на почту', default=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['pending', 'last_sent'],
+                         name='inbox_pending_idx'),
+        ]
+
+
+class Digest(CreatedModel):
+    """Сводка событий для одного пользователя."""
+    user = models.ForeignKey(User,
+                             related_name='digests',
+                             on_delete=models.CASCADE)
+    posts_count = models.PositiveIntegerField('Новых постов', default=0)
+    comments_count = models.PositiveIntegerField('Новых комментариев',
+                                                 default=0)
+    # JSON: последние события сводки, см. notifications.digests.
+    items = models.TextField('События', default='[]')
+    read = models.BooleanField('Прочитан', default=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', '-created', '-id'],
+                         name='digest_user_created_idx'),
+        ]
@@ -0,0 +1,21 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from posts.models import Comment, Post
+
+from .models import Event
+
+
+@receiver(post_save, sender=Post)
+def record_post(sender, instance, created, **kwargs):
+    if created:
+        Event.objects.create(kind=Event.POST, actor_id=instance.author_id,
+                             post=instance)
+
+
+@receiver(post_save, sender=Comment)
+def record_comment(sender, instance, created, **kwargs):
+    if created and instance.post_id:
+        Event.objects.create(kind=Event.COMMENT,
+                             actor_id=instance.author_id,
+                             post_id=instance.post_id, comment=instance)
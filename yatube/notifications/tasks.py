@@ -0,0 +1,30 @@
+import json
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.template import loader
+
+from jobs.queue import task
+
+from .models import Digest
+
+
+def _message(digest):
+    context = {'digest': digest, 'items': json.loads(digest.items)}
+    subject = loader.render_to_string('notifications/digest_subject.txt',
+                                      context)
+    return EmailMessage(
+        ''.join(subject.splitlines()),
+        loader.render_to_string('notifications/digest_email.txt', context),
+        settings.DEFAULT_FROM_EMAIL,
+        [digest.user.email],
+    )
+
+
+@task
+def send_digest_emails(digest_ids):
+    """Отправляет письма с дайджестами через одно соединение."""
+    digests = Digest.objects.filter(pk__in=digest_ids).select_related('user')
+    messages = [_message(digest) for digest in digests if digest.user.email]
+    with get_connection() as connection:
+        connection.send_messages(messages)
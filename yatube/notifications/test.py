@@ -0,0 +1,117 @@
+import threading
+import time
+from datetime import timedelta
+from unittest import mock
+
+from django.core import mail
+from django.core.cache import cache
+from django.core.cache.backends.locmem import LocMemCache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from jobs import worker
+from notifications import digests
+from notifications.models import Digest, Event, Inbox
+from posts.models import Comment, Follow, Post, User
+
+
+class DigestTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user('author')
+        cls.reader = User.objects.create_user('reader',
+                                              email='reader@example.com')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_events_are_coalesced_into_one_digest(self):
+        for number in range(3):
+            Post.objects.create(author=self.author, text=f'Пост {number}')
+        post = Post.objects.create(author=self.reader, text='Свой пост')
+        Comment.objects.create(post=post, author=self.author, text='Ответ')
+        # Одна строка на событие, а не на получателя.
+        self.assertEqual(Event.objects.count(), 5)
+        now = timezone.now()
+        self.assertEqual(digests.build(now), 1)
+        digest = Digest.objects.get(user=self.reader)
+        self.assertEqual((digest.posts_count, digest.comments_count), (3, 1))
+        self.assertEqual(digests.unread_count(self.reader), 1)
+        # Автор не получает уведомлений о своих постах.
+        self.assertFalse(Digest.objects.filter(user=self.author).exists())
+
+        worker.work(threading.Event(), burst=True)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['reader@example.com'])
+
+    def test_digests_are_rate_limited(self):
+        now = timezone.now()
+        Post.objects.create(author=self.author, text='Первый')
+        digests.build(now)
+        Post.objects.create(author=self.author, text='Второй')
+        self.assertEqual(digests.build(now + timedelta(minutes=1)), 0)
+        self.assertTrue(Inbox.objects.get(user=self.reader).pending)
+        self.assertEqual(digests.build(now + timedelta(hours=2)), 1)
+        latest = Digest.objects.filter(user=self.reader).latest('created')
+        self.assertEqual(latest.posts_count, 1)
+
+    def test_inbox_is_marked_read_by_post(self):
+        Post.objects.create(author=self.author, text='Новость')
+        digests.build()
+        client = Client()
+        client.force_login(self.reader)
+        url = reverse('notifications:inbox')
+        self.assertContains(client.get(url), 'Новость')
+        # Просмотр ничего не меняет: отметка — отдельный POST.
+        self.assertEqual(digests.unread_count(self.reader), 1)
+        with mock.patch('django.db.transaction.on_commit', lambda f: f()):
+            response = client.post(reverse('notifications:read'))
+        self.assertRedirects(response, url)
+        self.assertEqual(digests.unread_count(self.reader), 0)
+        self.assertFalse(Digest.objects.filter(read=False).exists())
+
+    def test_cached_pages_show_new_unread_count(self):
+        client = Client()
+        client.force_login(self.reader)
+        url = reverse('posts:profile', kwargs={'username': 'author'})
+        response = client.get(url)
+        self.assertNotContains(response, 'Уведомления (1)')
+        Post.objects.create(author=self.author, text='Новость')
+        response = client.get(url)
+        etag = response['ETag']
+        with mock.patch('django.db.transaction.on_commit', lambda f: f()):
+            digests.build()
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertContains(response, 'Уведомления (1)')
+
+    @override_settings(FEED_CACHE_TIMEOUT=60, NOTIFICATION_UNREAD_TIMEOUT=60)
+    def test_count_from_other_process_shows_up(self):
+        """Дайджест, собранный с чужим кэшем, виден после таймаутов."""
+        client = Client()
+        client.force_login(self.reader)
+        url = reverse('posts:profile', kwargs={'username': 'author'})
+        Post.objects.create(author=self.author, text='Новость')
+        self.assertNotContains(client.get(url), 'Уведомления (1)')
+        # send_digests работает в своём процессе и сбрасывает свой кэш.
+        cron_cache = LocMemCache('send_digests', {})
+        with mock.patch('notifications.digests.cache', cron_cache), \
+                mock.patch('posts.caching.cache', cron_cache), \
+                mock.patch('django.db.transaction.on_commit', lambda f: f()):
+            digests.build()
+        self.assertNotContains(client.get(url), 'Уведомления (1)')
+        with mock.patch('time.time', return_value=time.time() + 61):
+            self.assertContains(client.get(url), 'Уведомления (1)')
+
+    def test_batch_is_built_in_constant_queries(self):
+        readers = [User.objects.create_user(f'reader{number}')
+                   for number in range(5)]
+        Follow.objects.bulk_create(Follow(user=reader, author=self.author)
+                                   for reader in readers)
+        Post.objects.create(author=self.author, text='Всем')
+        upto = digests.mark()
+        due = list(Inbox.objects.select_related('user'))
+        with self.assertNumQueries(3):
+            built = digests._digests(due, upto)
+        self.assertEqual(len(built), 6)
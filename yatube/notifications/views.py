@@ -0,0 +1,32 @@
+import json
+
+from django.contrib.auth.decorators import login_required
+from django.db import transaction
+from django.shortcuts import redirect, render
+from django.views.decorators.http import require_POST
+
+from posts.utils import get_page
+
+from . import digests
+from .models import Digest
+
+
+@login_required
+def inbox(request):
+    page_obj = get_page(request, Digest.objects.filter(user=request.user),
+                        field='-created')
+    for digest in page_obj:
+        digest.entries = json.loads(digest.items)
+    context = {
+        'page_obj': page_obj,
+        'unread': any(not digest.read for digest in page_obj),
+    }
+    return render(request, 'notifications/inbox.html', context)
+
+
+@login_required
+@require_POST
+@transaction.atomic
+def read(request):
+    digests.read_all(request.user)
+    return redirect('notifications:inbox')
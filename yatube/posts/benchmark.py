@@ -0,0 +1,355 @@
+"""
+Воспроизводимый нагрузочный стенд для приложения posts.
+
+seed() заполняет базу реалистичными данными: авторы с
+популярностью по степенному закону, граф подписок с
+предпочтительным присоединением, посты и комментарии. run() замеряет
+страницы через тестовый клиент и возвращает перцентили в виде словаря,
+пригодного для сохранения в JSON и сравнения между коммитами.
+"""
+import bisect
+import functools
+import itertools
+import random
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.db import DatabaseError, connection, connections, transaction
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+from faker import Faker
+from mixer.backend.django import mixer
+
+from core.metrics import percentile
+
+from . import counters, search, threads, timeline
+from .models import Comment, Follow, Group, Post, User
+
+BATCH_SIZE = 2000
+TEXTS = 1000
+VIEWS = ('index', 'group_posts', 'profile', 'post_detail', 'follow_index',
+         'post_create', 'api_index', 'api_group_posts', 'api_profile',
+         'api_post_detail', 'api_follow_index')
+
+
+class PowerLaw:
+    """Выбор индексов 0..size-1 с весами 1 / (rank + 1) ** alpha."""
+
+    def __init__(self, size, alpha, rng):
+        self.rng = rng
+        self.cumulative = list(itertools.accumulate(
+            1 / (rank + 1) ** alpha for rank in range(size)))
+
+    def choice(self):
+        point = self.rng.random() * self.cumulative[-1]
+        return bisect.bisect_left(self.cumulative, point)
+
+
+@contextmanager
+def explicit_pub_date():
+    """Позволяет bulk_create сохранить заданные pub_date и created."""
+    fields = (Post._meta.get_field('pub_date'),
+              Comment._meta.get_field('created'))
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def _batches(objects):
+    batch = []
+    for obj in objects:
+        batch.append(obj)
+        if len(batch) == BATCH_SIZE:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _bulk(model, objects):
+    for batch in _batches(objects):
+        model.objects.bulk_create(batch)
+
+
+@transaction.atomic
+def seed(users, posts, comments, groups, follows_per_user=20, days=365,
+         alpha=1.1, random_seed=42, log=print):
+    """Заполняет базу; счётчики и ленты пересобираются в конце."""
+    rng = random.Random(random_seed)
+    fake = Faker('ru_RU')
+    Faker.seed(random_seed)
+    texts = [fake.paragraph(nb_sentences=3) for _ in range(TEXTS)]
+    now = timezone.now()
+    password = make_password(None)
+    first_user = (User.objects.order_by('-id')
+                  .values_list('id', flat=True).first() or 0) + 1
+
+    log(f'Пользователи: {users}')
+    _bulk(User, (
+        User(username=f'bench{first_user + number}', password=password,
+             first_name=fake.first_name(), last_name=fake.last_name())
+        for number in range(users)
+    ))
+    user_ids = list(User.objects.filter(id__gte=first_user)
+                    .order_by('id').values_list('id', flat=True))
+    popularity = PowerLaw(len(user_ids), alpha, rng)
+
+    log(f'Группы: {groups}')
+    group_ids = [
+        mixer.blend(Group, slug=f'bench-{first_user}-{number}',
+                    title=fake.word(), description=fake.sentence()).id
+        for number in range(groups)
+    ]
+    group_popularity = PowerLaw(len(group_ids), alpha, rng)
+
+    log('Подписки')
+    # Пользователи приходят по очереди и подписываются на уже пришедших
+    # с вероятностью, пропорциональной текущему числу подписчиков
+    # плюс один: каждый автор лежит в attachment столько же раз.
+    pairs = set()
+    attachment = []
+    for user_id in user_ids:
+        wanted = min(int(rng.paretovariate(1.5) * follows_per_user / 3),
+                     len(attachment))
+        chosen = {rng.choice(attachment) for _ in range(wanted)}
+        pairs.update((user_id, author_id) for author_id in chosen)
+        attachment.extend(chosen)
+        attachment.append(user_id)
+    _bulk(Follow, (Follow(user_id=user_id, author_id=author_id)
+                   for user_id, author_id in pairs))
+
+    def moment():
+        return now - timedelta(seconds=rng.random() * days * 86400)
+
+    with explicit_pub_date():
+        log(f'Посты: {posts}')
+        _bulk(Post, (
+            Post(text=rng.choice(texts),
+                 author_id=user_ids[popularity.choice()],
+                 group_id=(group_ids[group_popularity.choice()]
+                           if group_ids and rng.random() < 0.6 else None),
+                 pub_date=moment())
+            for _ in range(posts)
+        ))
+        last_post = (Post.objects.order_by('-id')
+                     .values_list('id', flat=True).first())
+        post_popularity = PowerLaw(posts, alpha, rng)
+        log(f'Комментарии: {comments}')
+        _bulk(Comment, (
+            Comment(text=rng.choice(texts),
+                    post_id=last_post - post_popularity.choice(),
+                    author_id=rng.choice(user_ids),
+                    created=moment())
+            for _ in range(comments)
+        ))
+
+    Comment.objects.filter(path='').update(path=threads.root_path())
+
+    log('Счётчики, ленты и поисковый индекс')
+    counters.reconcile()
+    timeline.rebuild()
+    search.rebuild()
+    return {'users': users, 'posts': posts, 'comments': comments,
+            'groups': groups, 'follows': len(pairs)}
+
+
+class _QueryCounter:
+    def __init__(self):
+        self.queries = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.queries += 1
+        return execute(sql, params, many, context)
+
+
+def _targets(rng):
+    """Случайные адреса для каждой замеряемой страницы."""
+    last_post = Post.objects.order_by('-id').values_list('id', flat=True)[0]
+    last_user = User.objects.order_by('-id').values_list('id', flat=True)[0]
+    slugs = list(Group.objects.values_list('slug', flat=True))
+
+    def user():
+        return User.objects.filter(id__lte=rng.randint(1, last_user)).order_by(
+            '-id').first()
+
+    def post_id():
+        return (Post.objects.filter(id__lte=rng.randint(1, last_post))
+                .order_by('-id').values_list('id', flat=True).first())
+
+    pages = {
+        'index': lambda namespace: reverse(f'{namespace}:index'),
+        'group_posts': lambda namespace: reverse(
+            f'{namespace}:group_list', kwargs={'slug': rng.choice(slugs)}),
+        'profile': lambda namespace: reverse(
+            f'{namespace}:profile', kwargs={'username': user().username}),
+        'post_detail': lambda namespace: reverse(
+            f'{namespace}:post_detail', kwargs={'post_id': post_id()}),
+        'follow_index': lambda namespace: reverse(
+            f'{namespace}:follow_index'),
+    }
+    # JSON API замеряется на тех же адресах, что и HTML-страницы.
+    targets = {'post_create': lambda: reverse('posts:post_create')}
+    for view, page in pages.items():
+        targets[view] = functools.partial(page, 'posts')
+        targets[f'api_{view}'] = functools.partial(page, 'api')
+    return targets, user
+
+
+def _request(client, view, url):
+    if view != 'post_create':
+        return client.get(url)
+    # Созданные посты откатываются, чтобы не менять набор данных.
+    with transaction.atomic():
+        response = client.post(url, {'text': 'Пост из нагрузочного теста'})
+        transaction.set_rollback(True)
+    return response
+
+
+def run(iterations=100, warmup=5, views=VIEWS, warm_cache=False,
+        random_seed=42):
+    """Замеряет страницы и возвращает перцентили в миллисекундах."""
+    rng = random.Random(random_seed)
+    targets, pick_user = _targets(rng)
+    client = Client()
+    results = {}
+    for view in views:
+        timings, queries = [], []
+        for number in range(warmup + iterations):
+            client.force_login(pick_user())
+            url = targets[view]()
+            if not warm_cache:
+                cache.clear()
+            counter = _QueryCounter()
+            with connection.execute_wrapper(counter):
+                start = time.perf_counter()
+                response = _request(client, view, url)
+                duration = (time.perf_counter() - start) * 1000
+            if response.status_code >= 400:
+                raise RuntimeError(f'{url}: {response.status_code}')
+            if number >= warmup:
+                timings.append(duration)
+                queries.append(counter.queries)
+        results[view] = {
+            'p50': percentile(timings, 0.5),
+            'p95': percentile(timings, 0.95),
+            'p99': percentile(timings, 0.99),
+            'mean': sum(timings) / len(timings),
+            'queries_p50': percentile(queries, 0.5),
+        }
+    return {
+        'commit': _commit(),
+        'time': timezone.now().isoformat(),
+        'iterations': iterations,
+        'warm_cache': warm_cache,
+        'dataset': {
+            'users': User.objects.count(),
+            'posts': Post.objects.count(),
+            'comments': Comment.objects.count(),
+            'follows': Follow.objects.count(),
+        },
+        'views': results,
+    }
+
+
+MARKER = 'Комментарий из нагрузочного теста'
+
+
+def _worker(deadline, write_share, seed, pick_post, pick_user):
+    rng = random.Random(seed)
+    client = Client()
+    client.force_login(pick_user())
+    timings, errors = [], 0
+    try:
+        while time.perf_counter() < deadline:
+            post_url = pick_post()
+            write = rng.random() < write_share
+            start = time.perf_counter()
+            try:
+                if write:
+                    response = client.post(post_url + 'comment/',
+                                           {'text': MARKER})
+                else:
+                    response = client.get(post_url)
+            except DatabaseError:
+                errors += 1
+                continue
+            if response.status_code >= 400:
+                errors += 1
+                continue
+            timings.append((time.perf_counter() - start) * 1000)
+    finally:
+        connections.close_all()
+    return timings, errors
+
+
+def throughput(threads=8, duration=5.0, write_share=0.2, random_seed=42):
+    """
+    Пропускная способность при одновременных чтении и записи.
+
+    Потоки открывают страницы постов, а доля write_share запросов
+    добавляет комментарий: запись проходит настоящую фиксацию
+    транзакции. Комментарии удаляются после замера.
+    """
+    rng = random.Random(random_seed)
+    lock = threading.Lock()
+    targets, pick_user = _targets(rng)
+
+    def locked(function):
+        # Общий генератор случайных чисел не потокобезопасен.
+        def wrapper():
+            with lock:
+                return function()
+        return wrapper
+
+    deadline = time.perf_counter() + duration
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        futures = [
+            executor.submit(_worker, deadline, write_share,
+                            random_seed + number,
+                            locked(targets['post_detail']), locked(pick_user))
+            for number in range(threads)
+        ]
+        results = [future.result() for future in futures]
+    Comment.objects.filter(text=MARKER).delete()
+    timings = [timing for part, _ in results for timing in part]
+    return {
+        'threads': threads,
+        'duration': duration,
+        'write_share': write_share,
+        'requests': len(timings),
+        'rps': len(timings) / duration,
+        'errors': sum(errors for _, errors in results),
+        'p95': percentile(timings, 0.95),
+    }
+
+
+def compare(baseline, current, metric='p95'):
+    """Относительное изменение метрики по каждой странице."""
+    changes = {}
+    for view, values in current['views'].items():
+        before = baseline.get('views', {}).get(view, {}).get(metric)
+        if before:
+            changes[view] = (values[metric] - before) / before
+    return changes
+
+
+def _commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
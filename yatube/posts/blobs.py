@@ -0,0 +1,104 @@
+"""
+Учёт ссылок на картинки постов.
+
+Картинки лежат в core.storage.ContentAddressedStorage под именем
+posts/<ab>/<sha256>.<ext>: одинаковые загрузки попадают в один файл,
+а варианты, нарезанные из него, — в один каталог
+posts/variants/<sha256>/. Сколько постов ссылается на файл, считает
+ImageBlob; когда ссылок не остаётся, файл и его варианты удаляются
+после фиксации транзакции.
+"""
+import logging
+
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.storage import default_storage
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+
+from . import thumbnails
+from .models import ImageBlob, Post
+
+logger = logging.getLogger(__name__)
+
+
+def retain(name, upload=None):
+    """
+    Добавляет ссылку на файл.
+
+    upload — только что загруженный файл с этим содержимым. Если ссылок
+    не было, collect() мог удалить файл уже после того, как хранилище
+    нашло его и не стало записывать заново; тогда файл пишется из upload.
+    """
+    if not name:
+        return
+    if ImageBlob.objects.filter(name=name).update(refs=F('refs') + 1):
+        return
+    try:
+        with transaction.atomic():
+            ImageBlob.objects.create(name=name, refs=1)
+    except IntegrityError:
+        ImageBlob.objects.filter(name=name).update(refs=F('refs') + 1)
+        return
+    field = Post._meta.get_field('image')
+    if upload is not None and not field.storage.exists(name):
+        field.storage.save(field.generate_filename(None, upload.name),
+                           upload)
+
+
+def release(name):
+    """Убирает ссылку на файл; осиротевший файл удаляется после коммита."""
+    if not name:
+        return
+    ImageBlob.objects.filter(name=name, refs__gt=0).update(
+        refs=F('refs') - 1)
+    transaction.on_commit(lambda: collect(name))
+
+
+def _delete_files(name):
+    directory = thumbnails.variants_dir(name)
+    try:
+        if default_storage.exists(directory):
+            for filename in default_storage.listdir(directory)[1]:
+                default_storage.delete(f'{directory}/{filename}')
+            default_storage.delete(directory)
+        Post._meta.get_field('image').storage.delete(name)
+    except (OSError, SuspiciousFileOperation):
+        # Вызывается после коммита: ошибка файловой системы не должна
+        # доходить до запроса, удалившего пост.
+        logger.exception('Не удалось удалить картинку %s', name)
+
+
+def collect(name):
+    """
+    Удаляет файл и его варианты, если на него никто не ссылается.
+
+    Файлы удаляются под блокировкой строки ImageBlob, пока строка ещё
+    есть: retain() той же картинки либо поднимет счётчик раньше и файл
+    останется, либо дождётся удаления строки и запишет файл заново.
+    """
+    with transaction.atomic():
+        blob = (ImageBlob.objects.select_for_update()
+                .filter(name=name, refs=0).first())
+        if blob is None:
+            return False
+        _delete_files(name)
+        blob.delete()
+    return True
+
+
+def reconcile():
+    """Пересчитывает ссылки по постам и собирает осиротевшие файлы."""
+    refs = dict(Post.objects.exclude(image='').order_by().values('image')
+                .annotate(total=Count('pk')).values_list('image', 'total'))
+    ImageBlob.objects.bulk_create(
+        (ImageBlob(name=name, refs=total) for name, total in refs.items()),
+        batch_size=500,
+        ignore_conflicts=True,
+    )
+    for blob in ImageBlob.objects.iterator():
+        if blob.refs != refs.get(blob.name, 0):
+            ImageBlob.objects.filter(name=blob.name).update(
+                refs=refs.get(blob.name, 0))
+    orphans = ImageBlob.objects.filter(refs=0).values_list('name', flat=True)
+    return {'referenced': len(refs),
+            'collected': sum(collect(name) for name in list(orphans))}
@@ -0,0 +1,122 @@
+"""
+Версионированный кэш страниц лент.
+
+Каждая лента привязана к области (scope): общая лента, группа или
+автор. Ключ страницы содержит текущую версию области, а сигналы
+Post/Group/Follow поднимают версию, поэтому страница живёт в кэше,
+пока её содержимое действительно не изменится. Страница вошедшего
+пользователя зависит ещё и от него самого — от его подписок и
+непрочитанных уведомлений, — поэтому её ключ содержит версию его
+области viewer_scope.
+"""
+import hashlib
+import uuid
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.auth import SESSION_KEY
+from django.core.cache import cache
+from django.utils.cache import patch_cache_control
+from django.views.decorators.cache import cache_page
+from django.views.decorators.vary import vary_on_cookie
+
+from core import routers
+
+INDEX_SCOPE = 'posts'
+TRENDING_SCOPE = 'trending'
+
+
+def group_scope(slug):
+    return f'group:{slug}'
+
+
+def author_scope(username):
+    return f'author:{username}'
+
+
+def viewer_scope(user_id):
+    """Подписки и уведомления пользователя, видимые на его страницах."""
+    return f'viewer:{user_id}'
+
+
+def post_scopes(post):
+    """Области лент, в которых виден пост."""
+    scopes = [INDEX_SCOPE, author_scope(post.author.username)]
+    if post.group_id:
+        scopes.append(group_scope(post.group.slug))
+    return scopes
+
+
+def _scope_key(scope):
+    # Слаги и имена пользователей могут содержать символы,
+    # недопустимые в ключах memcached.
+    return hashlib.md5(scope.encode()).hexdigest()
+
+
+def _new_version():
+    # Случайная версия не повторяет старую и после вытеснения ключа,
+    # поэтому старые страницы не воскреснут. Сброс записывает новое
+    # значение, а не делает incr: в файловом кэше incr — чтение и
+    # запись, и два одновременных сброса дали бы одну версию.
+    return uuid.uuid4().hex
+
+
+def get_version(scope):
+    key = f'feed_version:{_scope_key(scope)}'
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _new_version(), settings.FEED_VERSION_TIMEOUT)
+        version = cache.get(key)
+    return version
+
+
+def bump(*scopes):
+    """Сбрасывает кэш лент перечисленных областей."""
+    cache.set_many({f'feed_version:{_scope_key(scope)}': _new_version()
+                    for scope in scopes}, settings.FEED_VERSION_TIMEOUT)
+
+
+def versioned_key(prefix, scope):
+    """Ключ кэша, который устаревает вместе с версией области."""
+    return f'{prefix}:{_scope_key(scope)}:{get_version(scope)}'
+
+
+def viewer_versions(request):
+    """
+    Версии областей, от которых зависит страница вошедшего пользователя.
+
+    id берётся из сессии, а не из request.user: запрос пользователя
+    не нужен, а без cookie сессии нет и обращения к базе.
+    """
+    user_id = request.session.get(SESSION_KEY)
+    if user_id is None:
+        return ()
+    return (get_version(viewer_scope(user_id)),)
+
+
+def cache_feed(scope):
+    """
+    Кэширует ленту до смены версии её области.
+
+    scope — имя области или функция, получающая kwargs view.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            name = scope(**kwargs) if callable(scope) else scope
+            prefix = ':'.join(map(str, (versioned_key('feed', name),
+                                        *viewer_versions(request))))
+            # Шапка страницы зависит от пользователя, поэтому ключ
+            # учитывает cookie так же, как и версию области.
+            cached_view = cache_page(
+                routers.cache_timeout(settings.FEED_CACHE_TIMEOUT),
+                key_prefix=prefix)(vary_on_cookie(view))
+            response = cached_view(request, *args, **kwargs)
+            # Срок жизни в кэше не должен попадать в кэш браузера:
+            # браузер обязан перепроверять страницу.
+            if 'Expires' in response:
+                del response['Expires']
+            patch_cache_control(response, max_age=0)
+            return response
+        return wrapper
+    return decorator
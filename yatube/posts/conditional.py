@@ -0,0 +1,55 @@
+"""
+Валидаторы условных GET-запросов для HTML-страниц.
+
+ETag страницы строится из дешёвых данных, не из разметки, поэтому
+ответ 304 обходится без рендеринга шаблона. Лента и так живёт в кэше
+до смены версии своей области (см. posts.caching), и её ETag — это
+версия: проверка не делает ни одного запроса к базе. У страницы поста
+ETag собирается из одной строки поста, даты последнего комментария и
+версий областей, которые поднимает правка поста.
+
+Разметка зависит от пользователя и содержит его CSRF-токен, поэтому
+в ETag входят cookie запроса и версия области вошедшего пользователя
+(подписки и уведомления в шапке). Last-Modified не отдаётся: у поста
+нет даты изменения, и правка его бы не сдвинула.
+"""
+import hashlib
+
+from django.db.models import Max
+
+from . import caching
+from .models import Comment, Post
+
+
+def make_etag(request, *parts):
+    raw = repr((request.get_full_path(), request.META.get('HTTP_COOKIE'),
+                parts))
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+def feed_etag(scope):
+    """etag_func для ленты, закэшированной через cache_feed(scope)."""
+    def etag(request, **kwargs):
+        name = scope(**kwargs) if callable(scope) else scope
+        return make_etag(request, caching.get_version(name),
+                         *caching.viewer_versions(request))
+    return etag
+
+
+def post_etag(request, post_id):
+    post = (Post.objects.filter(id=post_id)
+            .values_list('author__username', 'group__slug',
+                         'comments_count', 'views_count')
+            .first())
+    if post is None:
+        # Несуществующему посту валидатор не нужен: будет 404.
+        return None
+    username, slug, *counters = post
+    scopes = [caching.author_scope(username)]
+    if slug:
+        scopes.append(caching.group_scope(slug))
+    latest = (Comment.objects.filter(post_id=post_id)
+              .aggregate(latest=Max('created'))['latest'])
+    return make_etag(request, *counters, latest,
+                     *(caching.get_version(scope) for scope in scopes),
+                     *caching.viewer_versions(request))
@@ -0,0 +1,93 @@
+"""
+Денормализованные счётчики постов, комментариев и подписок.
+
+Счётчики меняются атомарными UPDATE ... SET n = n + d в сигналах
+моделей, а reconcile() пересчитывает их из исходных таблиц.
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Concat, Greatest
+
+from .models import Comment, Follow, Group, Post, User, UserStats
+
+
+def _changes(deltas):
+    return {field: Greatest(F(field) + delta, Value(0))
+            for field, delta in deltas.items()}
+
+
+def change_group(group_id, delta):
+    if group_id:
+        Group.objects.filter(pk=group_id).update(**_changes(
+            {'posts_count': delta}))
+
+
+def change_post(post_id, delta):
+    if post_id:
+        Post.objects.filter(pk=post_id).update(**_changes(
+            {'comments_count': delta}))
+
+
+def change_comments(comment_ids, delta):
+    if comment_ids:
+        Comment.objects.filter(pk__in=comment_ids).update(**_changes(
+            {'replies_count': delta}))
+
+
+def change_user(user_id, **deltas):
+    """
+    Меняет счётчики пользователя.
+
+    Строки нет — значит счётчики ещё не заводились: при увеличении
+    она создаётся пересчётом, уменьшать же нечего (пользователь
+    может как раз удаляться).
+    """
+    if UserStats.objects.filter(user_id=user_id).update(**_changes(deltas)):
+        return
+    if max(deltas.values()) > 0:
+        try:
+            with transaction.atomic():
+                UserStats.objects.create(user_id=user_id)
+        except IntegrityError:
+            UserStats.objects.filter(user_id=user_id).update(
+                **_changes(deltas))
+            return
+        reconcile_users(UserStats.objects.filter(user_id=user_id))
+
+
+def _count(model, field, outer='pk'):
+    counts = (model.objects.filter(**{field: OuterRef(outer)}).order_by()
+              .values(field).annotate(total=Count('pk')).values('total'))
+    return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+
+def reconcile_users(stats):
+    return stats.update(
+        posts_count=_count(Post, 'author', 'user_id'),
+        followers_count=_count(Follow, 'author', 'user_id'),
+        following_count=_count(Follow, 'user', 'user_id'),
+    )
+
+
+def reconcile():
+    """Пересчитывает все счётчики из исходных таблиц."""
+    UserStats.objects.bulk_create(
+        (UserStats(user_id=user_id)
+         for user_id in User.objects.values_list('pk', flat=True)
+         .iterator()),
+        batch_size=500,
+        ignore_conflicts=True,
+    )
+    subtree = (Comment.objects.filter(
+        post=OuterRef('post'),
+        path__startswith=Concat(OuterRef('path'), Value('/')),
+    ).order_by().values('post').annotate(total=Count('pk')).values('total'))
+    return {
+        'comments': Comment.objects.update(replies_count=Coalesce(
+            Subquery(subtree, output_field=IntegerField()), 0)),
+        'users': reconcile_users(UserStats.objects.all()),
+        'groups': Group.objects.update(
+            posts_count=_count(Post, 'group')),
+        'posts': Post.objects.update(
+            comments_count=_count(Comment, 'post')),
+    }
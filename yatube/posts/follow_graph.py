@@ -0,0 +1,106 @@
+"""
+Граф подписок в кэше.
+
+Для каждого пользователя в кэше лежит отсортированный массив id
+авторов, на которых он подписан: проверка подписки — двоичный поиск,
+разметка целой страницы ленты — одно чтение из кэша. При промахе
+массив читается из уникального индекса (user, author) одним запросом
+без соединений. Подписка и отписка удаляют массив пользователя и
+поднимают версию его области viewer_scope, от которой зависят
+закэшированные ленты (см. posts.caching). Сброс виден другим
+процессам только через общий кэш, поэтому массивы живут не дольше
+FOLLOW_GRAPH_TIMEOUT.
+
+Рекомендации «кого почитать» — авторы, на которых подписаны авторы
+из подписок пользователя; массивы друзей читаются пачкой из кэша.
+"""
+from array import array
+from bisect import bisect_left
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from . import caching
+from .models import Follow
+
+TYPECODE = 'q'
+
+
+def _key(user_id):
+    return f'follow_graph:{user_id}'
+
+
+def _load(user_ids):
+    """Массивы подписок из базы одним запросом."""
+    graph = {user_id: array(TYPECODE) for user_id in user_ids}
+    rows = (Follow.objects.filter(user_id__in=user_ids)
+            .order_by('user_id', 'author_id')
+            .values_list('user_id', 'author_id'))
+    for user_id, author_id in rows.iterator():
+        graph[user_id].append(author_id)
+    cache.set_many({_key(user_id): ids for user_id, ids in graph.items()},
+                   settings.FOLLOW_GRAPH_TIMEOUT)
+    return graph
+
+
+def following_many(user_ids):
+    """Словарь id пользователя — отсортированный массив его подписок."""
+    user_ids = list(user_ids)
+    cached = cache.get_many([_key(user_id) for user_id in user_ids])
+    graph = {user_id: cached[_key(user_id)] for user_id in user_ids
+             if _key(user_id) in cached}
+    missing = [user_id for user_id in user_ids if user_id not in graph]
+    if missing:
+        graph.update(_load(missing))
+    return graph
+
+
+def following(user_id):
+    if user_id is None:
+        return array(TYPECODE)
+    return following_many([user_id])[user_id]
+
+
+def contains(ids, author_id):
+    position = bisect_left(ids, author_id)
+    return position < len(ids) and ids[position] == author_id
+
+
+def is_following(user_id, author_id):
+    return contains(following(user_id), author_id)
+
+
+def mark(user, posts):
+    """Отмечает посты авторов, на которых подписан пользователь."""
+    ids = following(user.id)
+    for post in posts:
+        post.author_followed = contains(ids, post.author_id)
+    return posts
+
+
+def forget(user_id):
+    """Сбрасывает подписки пользователя после подписки или отписки."""
+    def drop():
+        cache.delete(_key(user_id))
+        caching.bump(caching.viewer_scope(user_id))
+    drop()
+    # Параллельный запрос мог успеть закэшировать старый массив до
+    # фиксации транзакции.
+    transaction.on_commit(drop)
+
+
+def suggestions(user_id, limit):
+    """
+    id авторов, на которых чаще всего подписаны авторы из подписок.
+
+    Просматривается не больше FOLLOW_SUGGESTIONS_SCAN подписок.
+    """
+    own = following(user_id)
+    friends = own[:settings.FOLLOW_SUGGESTIONS_SCAN]
+    counts = Counter()
+    for ids in following_many(friends).values():
+        counts.update(author_id for author_id in ids
+                      if author_id != user_id and not contains(own, author_id))
+    return [author_id for author_id, _ in counts.most_common(limit)]
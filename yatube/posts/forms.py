@@ -1,5 +1,63 @@
+import warnings
+from io import BytesIO
+
 from django import forms
-from .models import Post, Comment
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile, UploadedFile
+from django.template.defaultfilters import filesizeformat
+from PIL import Image, ImageOps
+
+from .models import Group, Post, Comment
+
+
+def check_image_limits(upload):
+    """
+    Сообщение об ошибке, если картинка больше допустимого, иначе None.
+
+    Число пикселей берётся из заголовка: Image.open не декодирует
+    изображение.
+    """
+    if upload.size > settings.FILE_UPLOAD_MAX_BYTES:
+        return ('Файл больше '
+                f'{filesizeformat(settings.FILE_UPLOAD_MAX_BYTES)}.')
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', Image.DecompressionBombWarning)
+            with Image.open(upload) as image:
+                width, height = image.size
+    except Image.DecompressionBombError:
+        width = height = float('inf')
+    except Exception:
+        # Битый файл отклонит само поле ImageField.
+        return None
+    finally:
+        upload.seek(0)
+    if width * height > settings.POST_IMAGE_MAX_PIXELS:
+        return 'Слишком большое разрешение картинки.'
+    return None
+
+
+def strip_exif(upload):
+    """
+    Поворачивает картинку по EXIF Orientation и удаляет EXIF.
+
+    Картинка без EXIF возвращается как есть, без перекодирования.
+    """
+    with Image.open(upload) as image:
+        if not image.getexif():
+            upload.seek(0)
+            return upload
+        image_format = image.format
+        icc_profile = image.info.get('icc_profile')
+        normalized = ImageOps.exif_transpose(image)
+    normalized.info.pop('exif', None)
+    options = {'icc_profile': icc_profile} if icc_profile else {}
+    if image_format == 'JPEG':
+        options['quality'] = 90
+    content = BytesIO()
+    normalized.save(content, image_format, **options)
+    return SimpleUploadedFile(upload.name, content.getvalue(),
+                              upload.content_type)
 
 
 class PostForm(forms.ModelForm):
@@ -7,8 +65,42 @@ class PostForm(forms.ModelForm):
         model = Post
         fields = ('text', 'group', 'image')
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Пределы проверяются раньше, чем ImageField прочитает файл:
+        # отклонённый файл полю просто не достаётся.
+        self.image_error = None
+        upload = self.files.get('image') if self.files else None
+        if upload is not None:
+            self.image_error = check_image_limits(upload)
+            if self.image_error:
+                self.files = self.files.copy()
+                del self.files['image']
+
+    def clean_image(self):
+        if self.image_error:
+            raise forms.ValidationError(self.image_error)
+        image = self.cleaned_data['image']
+        if isinstance(image, UploadedFile):
+            image = strip_exif(image)
+        return image
+
 
 class CommentForm(forms.ModelForm):
     class Meta:
         model = Comment
         fields = ('text',)
+
+
+class SearchForm(forms.Form):
+    q = forms.CharField(label='Запрос', max_length=200)
+    group = forms.ModelChoiceField(Group.objects.all(), required=False,
+                                   label='Группа')
+    author = forms.CharField(label='Автор', max_length=150, required=False,
+                             help_text='Имя пользователя')
+    date_from = forms.DateField(
+        label='С', required=False,
+        widget=forms.DateInput(attrs={'type': 'date'}))
+    date_to = forms.DateField(
+        label='По', required=False,
+        widget=forms.DateInput(attrs={'type': 'date'}))
@@ -0,0 +1,95 @@
+"""
+Счётчик просмотров постов с буфером в памяти процесса.
+
+record() только увеличивает число в словаре. Раз в
+POST_VIEWS_FLUSH_INTERVAL секунд или при POST_VIEWS_FLUSH_SIZE
+разных постов в буфере запрос, заметивший это, сбрасывает буфер одной
+транзакцией: UPDATE сразу для многих постов и пачка ViewBatch для
+популярного. При остановке воркера буфер сбрасывается через atexit
+(см. yatube/wsgi.py), так что при падении теряется не больше одного
+интервала просмотров.
+"""
+import logging
+import threading
+import time
+from collections import Counter
+from functools import wraps
+
+from django.conf import settings
+from django.db import DatabaseError, transaction
+from django.db.models import Case, F, IntegerField, Value, When
+
+from .models import Post, ViewBatch
+
+logger = logging.getLogger(__name__)
+
+CHUNK = 250
+
+_lock = threading.Lock()
+_buffer = Counter()
+_flushed_at = time.monotonic()
+
+
+def record(post_id):
+    """Учитывает просмотр; в базу он попадёт со следующим сбросом."""
+    with _lock:
+        _buffer[post_id] += 1
+        due = (len(_buffer) >= settings.POST_VIEWS_FLUSH_SIZE
+               or time.monotonic() - _flushed_at
+               >= settings.POST_VIEWS_FLUSH_INTERVAL)
+    if due:
+        flush()
+
+
+def _take():
+    global _buffer, _flushed_at
+    with _lock:
+        views, _buffer = _buffer, Counter()
+        _flushed_at = time.monotonic()
+    return views
+
+
+def _write(views):
+    with transaction.atomic():
+        # Пост мог быть удалён, пока просмотры лежали в буфере.
+        ids = list(Post.objects.filter(pk__in=list(views))
+                   .values_list('pk', flat=True))
+        if not ids:
+            return 0
+        # Пачками, чтобы не упереться в лимит параметров SQLite.
+        for start in range(0, len(ids), CHUNK):
+            chunk = ids[start:start + CHUNK]
+            increments = Case(
+                *(When(pk=pk, then=Value(views[pk])) for pk in chunk),
+                output_field=IntegerField(),
+            )
+            Post.objects.filter(pk__in=chunk).update(
+                views_count=F('views_count') + increments)
+        ViewBatch.objects.bulk_create(
+            ViewBatch(post_id=pk, count=views[pk]) for pk in ids)
+    return len(ids)
+
+
+def flush():
+    """Записывает накопленные просмотры; возвращает число постов."""
+    views = _take()
+    if not views:
+        return 0
+    try:
+        return _write(views)
+    except DatabaseError:
+        # База занята: просмотры вернутся в буфер до следующего сброса.
+        logger.exception('Не удалось записать просмотры постов')
+        with _lock:
+            _buffer.update(views)
+        return 0
+
+
+def counted(view):
+    """Учитывает просмотр поста, даже если страница ответит 304."""
+    @wraps(view)
+    def wrapper(request, post_id, *args, **kwargs):
+        if request.method == 'GET':
+            record(post_id)
+        return view(request, post_id, *args, **kwargs)
+    return wrapper
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from posts import thumbnails
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = 'Нарезает варианты картинок постов, у которых их нет.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true',
+                            help='пересоздать варианты всех картинок')
+
+    def handle(self, *args, **options):
+        names = set()
+        posts = Post.objects.exclude(image='').only('image', 'image_variants')
+        for post in posts.iterator():
+            if options['all'] or thumbnails.variants(post) is None:
+                names.add(post.image.name)
+        for name in sorted(names):
+            thumbnails.generate(name, force=options['all'])
+        self.stdout.write(f'Картинок обработано: {len(names)}')
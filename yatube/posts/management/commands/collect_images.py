@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from posts import blobs
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает ссылки на картинки постов и удаляет файлы, '
+            'на которые никто не ссылается.')
+
+    def handle(self, *args, **options):
+        for name, value in blobs.reconcile().items():
+            self.stdout.write(f'{name}: {value}')
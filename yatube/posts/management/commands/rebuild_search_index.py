@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+
+from posts import search
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает поисковый индекс постов с нуля.'
+
+    def handle(self, *args, **options):
+        self.stdout.write(f'Постов в индексе: {search.rebuild()}')
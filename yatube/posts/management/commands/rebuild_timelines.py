@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from posts import timeline
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает материализованные ленты подписок с нуля.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, action='append',
+                            dest='users', help='id пользователя')
+
+    def handle(self, *args, **options):
+        rebuilt = timeline.rebuild(options['users'])
+        self.stdout.write(f'Лент пересобрано: {rebuilt}')
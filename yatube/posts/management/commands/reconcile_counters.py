@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from posts import counters
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает денормализованные счётчики из исходных таблиц.'
+
+    def handle(self, *args, **options):
+        for name, updated in counters.reconcile().items():
+            self.stdout.write(f'{name}: {updated}')
@@ -0,0 +1,85 @@
+import json
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import benchmark
+
+
+class Command(BaseCommand):
+    help = ('Замеряет страницы posts и сохраняет p50/p95/p99 в JSON; '
+            'с --compare сравнивает с прошлым прогоном.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=100)
+        parser.add_argument('--warmup', type=int, default=5)
+        parser.add_argument('--view', action='append', dest='views',
+                            choices=benchmark.VIEWS)
+        parser.add_argument('--warm-cache', action='store_true',
+                            help='не очищать кэш перед каждым запросом')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--threads', type=int, default=0,
+                            help='ещё замерить пропускную способность '
+                                 'при стольких потоках')
+        parser.add_argument('--duration', type=float, default=5.0,
+                            help='секунд на замер пропускной способности')
+        parser.add_argument('--write-share', type=float, default=0.2,
+                            help='доля пишущих запросов в этом замере')
+        parser.add_argument('--output', default=None)
+        parser.add_argument('--compare', default=None,
+                            help='JSON прошлого прогона')
+        parser.add_argument('--max-regression', type=float, default=0.2,
+                            help='допустимый рост p95, доля')
+
+    def handle(self, *args, **options):
+        result = benchmark.run(
+            iterations=options['iterations'],
+            warmup=options['warmup'],
+            views=options['views'] or benchmark.VIEWS,
+            warm_cache=options['warm_cache'],
+            random_seed=options['seed'],
+        )
+        if options['threads']:
+            result['throughput'] = benchmark.throughput(
+                threads=options['threads'],
+                duration=options['duration'],
+                write_share=options['write_share'],
+                random_seed=options['seed'],
+            )
+        output = options['output'] or os.path.join(
+            settings.BASE_DIR, 'benchmarks',
+            f'{result["commit"] or "results"}.json')
+        os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+        with open(output, 'w', encoding='utf-8') as file:
+            json.dump(result, file, ensure_ascii=False, indent=2)
+        for view, values in result['views'].items():
+            self.stdout.write(
+                f'{view:<16} p50={values["p50"]:.2f} p95={values["p95"]:.2f} '
+                f'p99={values["p99"]:.2f} ms, '
+                f'запросов {values["queries_p50"]}'
+            )
+        if 'throughput' in result:
+            values = result['throughput']
+            self.stdout.write(
+                f'{values["threads"]} потоков: '
+                f'{values["rps"]:.0f} запросов/с, '
+                f'p95={values["p95"] or 0:.2f} ms, '
+                f'ошибок {values["errors"]}')
+        self.stdout.write(f'Результаты: {output}')
+        if options['compare']:
+            self.compare(options['compare'], result,
+                         options['max_regression'])
+
+    def compare(self, path, result, max_regression):
+        with open(path, encoding='utf-8') as file:
+            baseline = json.load(file)
+        regressions = []
+        for view, change in benchmark.compare(baseline, result).items():
+            self.stdout.write(f'{view:<16} p95 {change:+.1%}')
+            if change > max_regression:
+                regressions.append(view)
+        if regressions:
+            raise CommandError(
+                f'p95 вырос больше чем на {max_regression:.0%}: '
+                f'{", ".join(regressions)}')
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import benchmark
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = 'Заполняет базу данными для нагрузочного стенда.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100_000)
+        parser.add_argument('--posts', type=int, default=5_000_000)
+        parser.add_argument('--comments', type=int, default=1_000_000)
+        parser.add_argument('--groups', type=int, default=100)
+        parser.add_argument('--follows-per-user', type=int, default=20)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--append', action='store_true',
+                            help='дописать данные в непустую базу')
+
+    def handle(self, *args, **options):
+        if min(options['users'], options['posts'], options['groups']) < 1:
+            raise CommandError('Нужны хотя бы один автор, пост и группа.')
+        if Post.objects.exists() and not options['append']:
+            raise CommandError('База не пуста, используйте --append.')
+        created = benchmark.seed(
+            users=options['users'],
+            posts=options['posts'],
+            comments=options['comments'],
+            groups=options['groups'],
+            follows_per_user=options['follows_per_user'],
+            random_seed=options['seed'],
+            log=self.stdout.write,
+        )
+        self.stdout.write(f'Готово: {created}')
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from posts import trending
+
+
+class Command(BaseCommand):
+    help = ('Обновляет популярные посты и группы по событиям с прошлого '
+            'запуска. Запускается периодически, например из cron.')
+
+    def handle(self, *args, **options):
+        for source, count in trending.update().items():
+            self.stdout.write(f'{source}: {count}')
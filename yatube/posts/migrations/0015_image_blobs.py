@@ -0,0 +1,37 @@
+# Generated by Django 2.2.16 on 2026-10-18 17:24
+
+import core.storage
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def fill_refs(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    ImageBlob = apps.get_model('posts', 'ImageBlob')
+    refs = (Post.objects.exclude(image='').order_by().values('image')
+            .annotate(total=Count('pk')).values_list('image', 'total'))
+    ImageBlob.objects.bulk_create(
+        ImageBlob(name=name, refs=total) for name, total in refs)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0014_post_image_variants'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImageBlob',
+            fields=[
+                ('name', models.CharField(max_length=100, primary_key=True, serialize=False, verbose_name='Файл')),
+                ('refs', models.PositiveIntegerField(default=0, verbose_name='Ссылок')),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='post',
+            name='image',
+            field=models.ImageField(blank=True, storage=core.storage.ContentAddressedStorage(), upload_to='posts/', verbose_name='Картинка'),
+        ),
+        migrations.RunPython(fill_refs, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,47 @@
+from django.db import migrations
+
+
+def split_comments(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute('DROP TABLE IF EXISTS posts_search')
+    schema_editor.execute(
+        "CREATE VIRTUAL TABLE posts_search USING fts5("
+        "post_id UNINDEXED, text, comments, "
+        "tokenize = 'unicode61 remove_diacritics 2')"
+    )
+    schema_editor.execute(
+        "INSERT INTO posts_search (rowid, post_id, text, comments) "
+        "SELECT p.id, p.id, p.text, '' FROM posts_post p"
+    )
+    schema_editor.execute(
+        "INSERT INTO posts_search (rowid, post_id, text, comments) "
+        "SELECT -c.id, c.post_id, '', c.text FROM posts_comment c"
+    )
+
+
+def join_comments(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute('DROP TABLE IF EXISTS posts_search')
+    schema_editor.execute(
+        "CREATE VIRTUAL TABLE posts_search USING fts5("
+        "text, comments, tokenize = 'unicode61 remove_diacritics 2')"
+    )
+    schema_editor.execute(
+        "INSERT INTO posts_search (rowid, text, comments) "
+        "SELECT p.id, p.text, COALESCE((SELECT group_concat(c.text, ' ') "
+        "FROM posts_comment c WHERE c.post_id = p.id), '') "
+        "FROM posts_post p"
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0021_timeline_pub_date'),
+    ]
+
+    operations = [
+        migrations.RunPython(split_comments, join_comments),
+    ]
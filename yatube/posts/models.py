@@ -1,6 +1,9 @@
 from django.db import models
 from django.contrib.auth import get_user_model
 
+from core.models import CreatedModel
+from core.storage import ContentAddressedStorage
+
 
 User = get_user_model()
 
@@ -9,6 +12,7 @@ class Group(models.Model):
     title = models.CharField(max_length=200)
     slug = models.SlugField(unique=True)
     description = models.TextField()
+    posts_count = models.PositiveIntegerField('Постов', default=0)
 
     def __str__(self) -> str:
         return self.title
@@ -33,8 +37,28 @@ class Post(models.Model):
     image = models.ImageField(
         'Картинка',
         upload_to='posts/',
+        storage=ContentAddressedStorage(),
         blank=True,
     )
+    # JSON с описанием вариантов картинки, см. posts.thumbnails.
+    image_variants = models.TextField(blank=True, editable=False)
+    comments_count = models.PositiveIntegerField('Комментариев', default=0)
+    views_count = models.PositiveIntegerField('Просмотров', default=0)
+    # Растёт при каждом изменении поста; ключ кэша карточки в лентах.
+    version = models.PositiveIntegerField('Версия', default=0,
+                                          editable=False)
+
+    class Meta:
+        # Индексы повторяют сортировку лент: (-pub_date, -id),
+        # целиком и внутри автора или группы.
+        indexes = [
+            models.Index(fields=['-pub_date', '-id'],
+                         name='post_pub_date_idx'),
+            models.Index(fields=['author', '-pub_date', '-id'],
+                         name='post_author_pub_date_idx'),
+            models.Index(fields=['group', '-pub_date', '-id'],
+                         name='post_group_pub_date_idx'),
+        ]
 
     def __str__(self) -> str:
         return self.text[:15]
@@ -53,12 +77,135 @@ class Comment(models.Model):
                             null=True)
     created = models.DateTimeField(verbose_name='Дата публикации',
                                    auto_now_add=True)
+    parent = models.ForeignKey('self',
+                               on_delete=models.CASCADE,
+                               related_name='replies',
+                               blank=True,
+                               null=True,
+                               verbose_name='Ответ на')
+    # Материализованный путь: id предков и самого комментария,
+    # дополненные нулями до одной длины, через «/». Сортировка по пути
+    # даёт ветку в порядке обхода дерева, а поддерево — префикс пути.
+    path = models.CharField('Путь', max_length=255, blank=True,
+                            editable=False)
+    replies_count = models.PositiveIntegerField('Ответов', default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['post', 'created'],
+                         name='comment_post_created_idx'),
+            models.Index(fields=['post', 'parent', 'created'],
+                         name='comment_post_parent_idx'),
+            models.Index(fields=['post', 'path'],
+                         name='comment_post_path_idx'),
+        ]
 
+    @property
+    def depth(self):
+        return self.path.count('/')
 
-class Follow(models.Model):
+
+class Follow(CreatedModel):
     user = models.ForeignKey(User,
                              related_name='follower',
                              on_delete=models.CASCADE)
     author = models.ForeignKey(User,
                                related_name='following',
                                on_delete=models.CASCADE)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'author'],
+                                    name='unique_follow'),
+        ]
+
+
+class TimelineEntry(models.Model):
+    """Пост в материализованной ленте подписок пользователя."""
+    user = models.ForeignKey(User,
+                             related_name='timeline',
+                             on_delete=models.CASCADE)
+    post = models.ForeignKey(Post,
+                             related_name='timeline_entries',
+                             on_delete=models.CASCADE)
+    # Копия Post.pub_date: страница ленты — срез одного индекса.
+    pub_date = models.DateTimeField('Дата публикации')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'post'],
+                                    name='unique_timeline_entry'),
+        ]
+        indexes = [
+            models.Index(fields=['user', '-pub_date', '-post'],
+                         name='timeline_user_pub_date_idx'),
+        ]
+
+
+class UserStats(models.Model):
+    """Счётчики пользователя, чтобы не считать их на каждой странице."""
+    user = models.OneToOneField(User,
+                                primary_key=True,
+                                related_name='stats',
+                                on_delete=models.CASCADE)
+    posts_count = models.PositiveIntegerField('Постов', default=0)
+    followers_count = models.PositiveIntegerField('Подписчиков', default=0)
+    following_count = models.PositiveIntegerField('Подписок', default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['followers_count'],
+                         name='stats_followers_idx'),
+        ]
+
+
+class ImageBlob(models.Model):
+    """Файл картинки и число постов, которые на него ссылаются."""
+    name = models.CharField('Файл', max_length=100, primary_key=True)
+    refs = models.PositiveIntegerField('Ссылок', default=0)
+
+    def __str__(self) -> str:
+        return self.name
+
+
+class TrendingPost(models.Model):
+    """Счёт поста в популярном; затухает со временем."""
+    post = models.OneToOneField(Post,
+                                primary_key=True,
+                                related_name='trending',
+                                on_delete=models.CASCADE)
+    score = models.FloatField('Счёт', default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-score'], name='trending_post_score_idx'),
+        ]
+
+
+class TrendingGroup(models.Model):
+    """Счёт группы в популярном; затухает со временем."""
+    group = models.OneToOneField(Group,
+                                 primary_key=True,
+                                 related_name='trending',
+                                 on_delete=models.CASCADE)
+    score = models.FloatField('Счёт', default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-score'], name='trending_group_score_idx'),
+        ]
+
+
+class TrendingCursor(models.Model):
+    """Докуда агрегатор популярного обработал источник событий."""
+    source = models.CharField('Источник', max_length=50, primary_key=True)
+    position = models.BigIntegerField('Последний id', default=0)
+    updated = models.DateTimeField('Обработано', null=True)
+
+
+class ViewBatch(CreatedModel):
+    """Просмотры поста, записанные из буфера одной пачкой."""
+    post = models.ForeignKey(Post,
+                             related_name='view_batches',
+                             on_delete=models.CASCADE)
+    count = models.PositiveIntegerField('Просмотров')
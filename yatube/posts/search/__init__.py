@@ -0,0 +1,108 @@
+"""
+Полнотекстовый поиск по постам и комментариям.
+
+Индекс обновляется сигналами при сохранении постов и комментариев;
+реализация выбирается настройкой POST_SEARCH_BACKEND.
+"""
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.html import escape
+from django.utils.module_loading import import_string
+from django.utils.safestring import mark_safe
+
+from ..models import Post
+from .base import MARK_END, MARK_START, parse_query
+
+_backends = {}
+
+
+def get_backend():
+    path = settings.POST_SEARCH_BACKEND
+    if path not in _backends:
+        _backends[path] = import_string(path)()
+    return _backends[path]
+
+
+def index(post_ids):
+    get_backend().index(post_ids)
+
+
+def remove(post_ids):
+    get_backend().remove(post_ids)
+
+
+def index_comments(comment_ids):
+    get_backend().index_comments(comment_ids)
+
+
+def remove_comments(comment_ids):
+    get_backend().remove_comments(comment_ids)
+
+
+def rebuild():
+    return get_backend().rebuild()
+
+
+def highlight(snippet):
+    """Экранирует сниппет и размечает совпадения тегом <mark>."""
+    return mark_safe(escape(snippet).replace(MARK_START, '<mark>')
+                     .replace(MARK_END, '</mark>'))
+
+
+def _start_of(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+class SearchResults:
+    """
+    Выдача для Paginator.
+
+    Считает совпадения и читает только запрошенную страницу; посты
+    приходят в порядке релевантности с атрибутом snippet.
+    """
+
+    def __init__(self, terms, posts):
+        self.terms = terms
+        self.posts = posts
+        self._count = None
+
+    def count(self):
+        if self._count is None:
+            self._count = (get_backend().count(self.terms, self.posts)
+                           if self.terms else 0)
+        return self._count
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, key):
+        if not self.terms:
+            return []
+        found = get_backend().search(self.terms, self.posts, key.start,
+                                     key.stop - key.start)
+        posts = (Post.objects.select_related('author', 'group')
+                 .in_bulk([post_id for post_id, _ in found]))
+        page = []
+        for post_id, snippet in found:
+            if post_id in posts:
+                post = posts[post_id]
+                post.snippet = highlight(snippet)
+                page.append(post)
+        return page
+
+
+def search(query, group=None, author=None, date_from=None, date_to=None):
+    """Посты по запросу с фильтрами по группе, автору и датам."""
+    posts = Post.objects.all()
+    if group is not None:
+        posts = posts.filter(group=group)
+    if author:
+        posts = posts.filter(author__username=author)
+    if date_from:
+        posts = posts.filter(pub_date__gte=_start_of(date_from))
+    if date_to:
+        posts = posts.filter(
+            pub_date__lt=_start_of(date_to + timedelta(days=1)))
+    return SearchResults(parse_query(query), posts)
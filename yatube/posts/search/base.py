@@ -0,0 +1,42 @@
+import re
+
+# Границы подсветки в сниппетах: управляющие символы не встречаются в
+# тексте постов и переживают экранирование HTML.
+MARK_START = '\x02'
+MARK_END = '\x03'
+MAX_TERMS = 10
+
+
+def parse_query(text):
+    """Слова запроса в нижнем регистре, без синтаксиса поискового движка."""
+    return re.findall(r'\w+', text.lower())[:MAX_TERMS]
+
+
+class SearchBackend:
+    """
+    Поисковый индекс постов вместе с их комментариями.
+
+    search() получает уже отфильтрованный queryset постов и возвращает
+    пары (id поста, сниппет) в порядке релевантности.
+    """
+
+    def index(self, post_ids):
+        raise NotImplementedError
+
+    def remove(self, post_ids):
+        raise NotImplementedError
+
+    def index_comments(self, comment_ids):
+        raise NotImplementedError
+
+    def remove_comments(self, comment_ids):
+        raise NotImplementedError
+
+    def rebuild(self):
+        raise NotImplementedError
+
+    def count(self, terms, posts):
+        raise NotImplementedError
+
+    def search(self, terms, posts, offset, limit):
+        raise NotImplementedError
@@ -0,0 +1,56 @@
+"""
+Запасной индекс для баз без полнотекстового поиска.
+
+Ищет через icontains по тексту постов и комментариев, то есть
+просматривает таблицы целиком; годится для разработки, но не для
+больших баз.
+"""
+import re
+
+from django.db.models import Q
+
+from .base import MARK_END, MARK_START, SearchBackend
+
+SNIPPET_CHARS = 80
+
+
+class DatabaseBackend(SearchBackend):
+    def index(self, post_ids):
+        pass
+
+    def remove(self, post_ids):
+        pass
+
+    def index_comments(self, comment_ids):
+        pass
+
+    def remove_comments(self, comment_ids):
+        pass
+
+    def rebuild(self):
+        return 0
+
+    @staticmethod
+    def _filter(terms, posts):
+        for term in terms:
+            posts = posts.filter(Q(text__icontains=term)
+                                 | Q(comments__text__icontains=term))
+        return posts.distinct()
+
+    def count(self, terms, posts):
+        return self._filter(terms, posts).count()
+
+    def search(self, terms, posts, offset, limit):
+        found = (self._filter(terms, posts).order_by('-pub_date', '-id')
+                 .values_list('id', 'text')[offset:offset + limit])
+        return [(post_id, self._snippet(terms, text))
+                for post_id, text in found]
+
+    @staticmethod
+    def _snippet(terms, text):
+        pattern = re.compile('|'.join(map(re.escape, terms)), re.IGNORECASE)
+        match = pattern.search(text)
+        start = max(match.start() - SNIPPET_CHARS // 2, 0) if match else 0
+        snippet = text[start:start + SNIPPET_CHARS]
+        return pattern.sub(
+            lambda found: f'{MARK_START}{found.group()}{MARK_END}', snippet)
@@ -0,0 +1,135 @@
+"""
+Индекс на виртуальной таблице SQLite FTS5.
+
+Пост и каждый его комментарий — отдельные строки индекса: у поста
+rowid совпадает с его id, у комментария rowid — id комментария со
+знаком минус. Колонка post_id связывает строку с постом, поэтому запись
+комментария меняет одну строку, а не весь текст обсуждения. Таблицу
+создаёт миграция 0022_search_comment_rows.
+"""
+from django.db import connection
+from django.db.models.expressions import RawSQL
+
+from ..models import Comment, Post
+from .base import MARK_END, MARK_START, SearchBackend
+
+TABLE = 'posts_search'
+SNIPPET_TOKENS = 16
+# Веса колонок для bm25 (post_id, text, comments): совпадение в тексте
+# поста важнее, чем в комментариях.
+WEIGHTS = (0.0, 1.0, 0.4)
+
+
+def _marks(ids):
+    return ', '.join(['%s'] * len(ids))
+
+
+class SQLiteBackend(SearchBackend):
+    def _fill_posts(self, cursor, where='', params=()):
+        cursor.execute(
+            f'INSERT INTO {TABLE} (rowid, post_id, text, comments) '
+            f"SELECT p.id, p.id, p.text, '' "
+            f'FROM {Post._meta.db_table} p {where}',
+            params,
+        )
+
+    def _fill_comments(self, cursor, where='', params=()):
+        cursor.execute(
+            f'INSERT INTO {TABLE} (rowid, post_id, text, comments) '
+            f"SELECT -c.id, c.post_id, '', c.text "
+            f'FROM {Comment._meta.db_table} c {where}',
+            params,
+        )
+
+    def index(self, post_ids):
+        post_ids = list(post_ids)
+        marks = _marks(post_ids)
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {TABLE} WHERE rowid IN ({marks})',
+                           post_ids)
+            self._fill_posts(cursor, f'WHERE p.id IN ({marks})', post_ids)
+
+    def remove(self, post_ids):
+        # Комментарии удаляются каскадом раньше поста и к этому моменту
+        # уже убраны из индекса своими сигналами.
+        post_ids = list(post_ids)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {TABLE} WHERE rowid IN ({_marks(post_ids)})',
+                post_ids)
+
+    def index_comments(self, comment_ids):
+        comment_ids = list(comment_ids)
+        marks = _marks(comment_ids)
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {TABLE} WHERE rowid IN ({marks})',
+                           [-comment_id for comment_id in comment_ids])
+            self._fill_comments(cursor, f'WHERE c.id IN ({marks})',
+                                comment_ids)
+
+    def remove_comments(self, comment_ids):
+        comment_ids = list(comment_ids)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {TABLE} WHERE rowid IN ({_marks(comment_ids)})',
+                [-comment_id for comment_id in comment_ids])
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {TABLE}')
+            self._fill_posts(cursor)
+            self._fill_comments(cursor)
+            cursor.execute(f"INSERT INTO {TABLE} ({TABLE}) "
+                           f"VALUES ('optimize')")
+            cursor.execute(f'SELECT count(*) FROM {TABLE} WHERE rowid > 0')
+            return cursor.fetchone()[0]
+
+    @staticmethod
+    def _match(terms):
+        # Каждое слово в кавычках, последнее — префиксом: «пост ред»
+        # найдёт «редакция».
+        quoted = [f'"{term}"' for term in terms]
+        quoted[-1] += '*'
+        return ' '.join(quoted)
+
+    def _where(self, terms, posts):
+        where = f'{TABLE} MATCH %s'
+        params = [self._match(terms)]
+        if posts.query.where:
+            # Фильтры проверяются для каждого совпадения поиском по
+            # первичному ключу, а не выборкой всех подходящих постов.
+            matched = posts.filter(id=RawSQL(f'{TABLE}.post_id', ()))
+            exists_sql, exists_params = (matched.values('id').query
+                                         .sql_with_params())
+            where += f' AND EXISTS ({exists_sql})'
+            params.extend(exists_params)
+        return where, params
+
+    def count(self, terms, posts):
+        where, params = self._where(terms, posts)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT count(DISTINCT post_id) FROM {TABLE} WHERE {where}',
+                params)
+            return cursor.fetchone()[0]
+
+    def search(self, terms, posts, offset, limit):
+        where, params = self._where(terms, posts)
+        weights = ', '.join(str(weight) for weight in WEIGHTS)
+        with connection.cursor() as cursor:
+            # Пост находится по лучшей из своих строк: для min() SQLite
+            # берёт сниппет из той же строки, где достигнут минимум.
+            # MATERIALIZED не даёт встроить bm25 в агрегат.
+            cursor.execute(
+                f'WITH hits AS MATERIALIZED ('
+                f'SELECT post_id, snippet({TABLE}, -1, %s, %s, %s, %s) '
+                f'AS snippet, bm25({TABLE}, {weights}) AS rank '
+                f'FROM {TABLE} WHERE {where}) '
+                f'SELECT post_id, snippet, min(rank) AS best FROM hits '
+                f'GROUP BY post_id ORDER BY best, post_id '
+                f'LIMIT %s OFFSET %s',
+                [MARK_START, MARK_END, '…', SNIPPET_TOKENS, *params,
+                 limit, offset],
+            )
+            return [(post_id, snippet)
+                    for post_id, snippet, _ in cursor.fetchall()]
@@ -0,0 +1,170 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import (blobs, caching, counters, follow_graph, search, threads,
+               thumbnails, timeline)
+from .models import Comment, Follow, Group, Post, UserStats
+
+
+@receiver(pre_save, sender=Post)
+def remember_old_values(sender, instance, **kwargs):
+    old = None
+    if instance.pk is not None:
+        old = (Post.objects.filter(pk=instance.pk)
+               .values_list('group_id', 'group__slug', 'image').first())
+    instance._old_group = old[:2] if old else None
+    instance._old_image = old[2] if old else ''
+    # Загруженный файл: после сохранения в поле остаётся только имя.
+    instance._upload = (instance.image.file if instance.image
+                        and not instance.image._committed else None)
+
+
+@receiver(pre_save, sender=Post)
+def bump_post_version(sender, instance, **kwargs):
+    instance.version += 1
+
+
+@receiver(post_save, sender=Post)
+def count_post(sender, instance, created, **kwargs):
+    if created:
+        counters.change_user(instance.author_id, posts_count=1)
+        counters.change_group(instance.group_id, 1)
+        return
+    old_group_id, old_slug = instance._old_group or (None, None)
+    if old_group_id != instance.group_id:
+        counters.change_group(old_group_id, -1)
+        counters.change_group(instance.group_id, 1)
+        if old_slug:
+            caching.bump(caching.group_scope(old_slug))
+
+
+@receiver(post_delete, sender=Post)
+def uncount_post(sender, instance, **kwargs):
+    counters.change_user(instance.author_id, posts_count=-1)
+    counters.change_group(instance.group_id, -1)
+
+
+@receiver(post_save, sender=Post)
+def count_image_refs(sender, instance, **kwargs):
+    if instance._old_image != instance.image.name:
+        blobs.release(instance._old_image)
+        blobs.retain(instance.image.name, instance._upload)
+
+
+@receiver(post_delete, sender=Post)
+def release_image(sender, instance, **kwargs):
+    blobs.release(instance.image.name)
+
+
+@receiver(post_save, sender=Post)
+def index_post(sender, instance, **kwargs):
+    search.index([instance.pk])
+
+
+@receiver(post_delete, sender=Post)
+def unindex_post(sender, instance, **kwargs):
+    search.remove([instance.pk])
+
+
+@receiver(post_save, sender=Comment)
+def index_comment(sender, instance, **kwargs):
+    search.index_comments([instance.pk])
+
+
+@receiver(post_delete, sender=Comment)
+def unindex_comment(sender, instance, **kwargs):
+    search.remove_comments([instance.pk])
+
+
+@receiver(post_save, sender=Post)
+def fan_out_post(sender, instance, created, **kwargs):
+    if created:
+        timeline.fan_out(instance)
+
+
+@receiver(post_save, sender=Post)
+def prepare_thumbnail(sender, instance, **kwargs):
+    if instance.image and thumbnails.variants(instance) is None:
+        # Нарезка обновляет строку поста: до фиксации транзакции
+        # воркер её бы не увидел.
+        name = instance.image.name
+        transaction.on_commit(lambda: thumbnails.schedule(name))
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post_feeds(sender, instance, **kwargs):
+    caching.bump(*caching.post_scopes(instance))
+
+
+@receiver(post_save, sender=Group)
+def invalidate_group_feed(sender, instance, **kwargs):
+    caching.bump(caching.group_scope(instance.slug))
+
+
+@receiver(post_save, sender=Comment)
+def set_comment_path(sender, instance, created, **kwargs):
+    if created and not instance.path:
+        instance.path = threads.build_path(instance)
+        Comment.objects.filter(pk=instance.pk).update(path=instance.path)
+
+
+@receiver(post_save, sender=Comment)
+def count_comment(sender, instance, created, **kwargs):
+    if created:
+        counters.change_post(instance.post_id, 1)
+        counters.change_comments(threads.ancestor_ids(instance.path), 1)
+
+
+@receiver(post_delete, sender=Comment)
+def uncount_comment(sender, instance, **kwargs):
+    counters.change_post(instance.post_id, -1)
+    counters.change_comments(threads.ancestor_ids(instance.path), -1)
+
+
+@receiver(post_save, sender=Follow)
+def count_follow(sender, instance, created, **kwargs):
+    if created:
+        counters.change_user(instance.author_id, followers_count=1)
+        counters.change_user(instance.user_id, following_count=1)
+
+
+@receiver(post_delete, sender=Follow)
+def uncount_follow(sender, instance, **kwargs):
+    counters.change_user(instance.author_id, followers_count=-1)
+    counters.change_user(instance.user_id, following_count=-1)
+
+
+@receiver(post_save, sender=Follow)
+def backfill_timeline(sender, instance, created, **kwargs):
+    if created:
+        timeline.backfill(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def purge_timeline(sender, instance, **kwargs):
+    timeline.purge(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def end_fanout_limit(sender, instance, **kwargs):
+    followers = (UserStats.objects.filter(user_id=instance.author_id)
+                 .values_list('followers_count', flat=True).first())
+    if followers == settings.TIMELINE_FANOUT_LIMIT:
+        timeline.fanout_ended(instance.author_id)
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def invalidate_profile(sender, instance, **kwargs):
+    # Профиль автора показывает подписчиков, профиль читателя — подписки.
+    caching.bump(caching.author_scope(instance.author.username))
+    caching.bump(caching.author_scope(instance.user.username))
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def invalidate_follow_graph(sender, instance, **kwargs):
+    follow_graph.forget(instance.user_id)
@@ -0,0 +1,33 @@
+from django import template
+
+from posts import thumbnails
+
+register = template.Library()
+
+# Карточка с заглушкой живёт в кэше недолго: после истечения post_picture
+# снова поставит варианты в очередь, если они так и не появились.
+PENDING_TIMEOUT = 30
+
+
+@register.simple_tag
+def post_picture(post):
+    """
+    Данные для <picture> картинки поста или None.
+
+    Оригинал в запросе не масштабируется: недостающие варианты
+    ставятся в очередь, а шаблон выводит заглушку.
+    """
+    if not post.image:
+        return None
+    picture = thumbnails.picture(post)
+    if picture is None:
+        thumbnails.schedule(post.image)
+    return picture
+
+
+@register.simple_tag
+def card_timeout(post):
+    """Срок кэша карточки: без срока, пока картинка не ждёт вариантов."""
+    if post.image and thumbnails.variants(post) is None:
+        return PENDING_TIMEOUT
+    return None
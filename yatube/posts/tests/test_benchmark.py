@@ -0,0 +1,71 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db.models import Count
+from django.test import TestCase
+
+from posts.models import Follow, Post, UserStats
+
+
+class BenchmarkTest(TestCase):
+    def setUp(self):
+        self.results_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.results_dir, ignore_errors=True)
+
+    def test_seed_and_run(self):
+        call_command('seed_benchmark', users=30, posts=300, comments=100,
+                     groups=3, stdout=StringIO())
+        self.assertEqual(Post.objects.count(), 300)
+        self.assertTrue(Follow.objects.exists())
+        self.assertEqual(
+            sum(UserStats.objects.values_list('posts_count', flat=True)),
+            300)
+
+        output = os.path.join(self.results_dir, 'run.json')
+        call_command('run_benchmark', iterations=3, warmup=1,
+                     output=output, stdout=StringIO())
+        with open(output, encoding='utf-8') as file:
+            result = json.load(file)
+        self.assertEqual(set(result['views']),
+                         {'index', 'group_posts', 'profile', 'post_detail',
+                          'follow_index', 'post_create', 'api_index',
+                          'api_group_posts', 'api_profile',
+                          'api_post_detail', 'api_follow_index'})
+        self.assertEqual(result['dataset']['posts'], 300)
+        for values in result['views'].values():
+            self.assertLessEqual(values['p50'], values['p99'])
+
+        baseline = dict(result, views={
+            view: dict(values, p95=values['p95'] / 100)
+            for view, values in result['views'].items()
+        })
+        baseline_path = os.path.join(self.results_dir, 'baseline.json')
+        with open(baseline_path, 'w', encoding='utf-8') as file:
+            json.dump(baseline, file)
+        with self.assertRaises(CommandError):
+            call_command('run_benchmark', iterations=3, warmup=0,
+                         view=['index'], output=output,
+                         compare=baseline_path, stdout=StringIO())
+
+    def test_follows_attach_to_popular_authors(self):
+        """Подписчики копятся у тех, у кого их уже много."""
+        call_command('seed_benchmark', users=300, posts=1, comments=0,
+                     groups=1, stdout=StringIO())
+        followers = sorted(
+            Follow.objects.values('author').annotate(count=Count('id'))
+            .values_list('count', flat=True), reverse=True)
+        self.assertGreater(followers[0], 10 * followers[len(followers) // 2])
+
+    def test_seed_refuses_non_empty_database(self):
+        call_command('seed_benchmark', users=2, posts=2, comments=0,
+                     groups=1, stdout=StringIO())
+        with self.assertRaises(CommandError):
+            call_command('seed_benchmark', users=2, posts=2, comments=0,
+                         groups=1, stdout=StringIO())
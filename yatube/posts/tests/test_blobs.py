@@ -0,0 +1,100 @@
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from posts import blobs, thumbnails
+from posts.models import ImageBlob, Post, User
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp()
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, POST_THUMBNAIL_WORKERS=0)
+class ImageBlobTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='gleb')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def create_post(self, name):
+        return Post.objects.create(
+            text='Пост с картинкой',
+            author=self.user,
+            image=SimpleUploadedFile(name, SMALL_GIF, 'image/gif'),
+        )
+
+    def test_same_bytes_share_one_file(self):
+        first = self.create_post('meme.gif')
+        second = self.create_post('meme (1).gif')
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertEqual(ImageBlob.objects.get(name=first.image.name).refs, 2)
+        second.refresh_from_db()
+        first.refresh_from_db()
+        self.assertEqual(first.image_variants, second.image_variants)
+
+    @mock.patch('django.db.transaction.on_commit', lambda func: func())
+    def test_orphan_is_collected(self):
+        first = self.create_post('meme.gif')
+        second = self.create_post('copy.gif')
+        name = first.image.name
+        variants = thumbnails.variants_dir(name)
+        self.assertTrue(default_storage.exists(variants))
+        first.delete()
+        self.assertTrue(default_storage.exists(name))
+        second.image = ''
+        second.save()
+        self.assertFalse(default_storage.exists(name))
+        self.assertFalse(default_storage.exists(variants))
+        self.assertFalse(ImageBlob.objects.exists())
+
+    def test_upload_survives_pending_collect(self):
+        """Загрузка тех же байтов до сборки отменяет удаление файла."""
+        name = self.create_post('meme.gif').image.name
+        Post.objects.get(image=name).delete()
+        self.create_post('again.gif')
+        self.assertFalse(blobs.collect(name))
+        self.assertTrue(default_storage.exists(name))
+
+    def test_upload_restores_collected_file(self):
+        """Файл, удалённый между сохранением и retain, пишется заново."""
+        name = self.create_post('meme.gif').image.name
+        Post.objects.get(image=name).delete()
+        storage = Post._meta.get_field('image').storage
+        save = storage.save
+
+        def save_then_collect(*args, **kwargs):
+            saved = save(*args, **kwargs)
+            blobs.collect(saved)
+            return saved
+
+        with mock.patch.object(storage, 'save',
+                               side_effect=save_then_collect):
+            self.create_post('again.gif')
+        self.assertTrue(default_storage.exists(name))
+        self.assertEqual(ImageBlob.objects.get(name=name).refs, 1)
+
+    def test_collect_images_command(self):
+        post = self.create_post('meme.gif')
+        ImageBlob.objects.update(refs=5)
+        Post.objects.filter(pk=post.pk).update(image='')
+        call_command('collect_images', stdout=StringIO())
+        self.assertFalse(ImageBlob.objects.exists())
+        self.assertFalse(default_storage.exists(post.image.name))
@@ -0,0 +1,114 @@
+import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts import caching
+from posts.models import Follow, Group, Post, User
+
+
+class FeedCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='gleb')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовый заголовок',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            text='Первый пост',
+            author=cls.user,
+            group=cls.group,
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_feeds_stay_cached_without_changes(self):
+        """Изменение в обход сигналов не видно: страница взята из кэша."""
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': 'test-slug'}),
+            reverse('posts:profile', kwargs={'username': 'gleb'}),
+        )
+        for url in urls:
+            self.guest_client.get(url)
+        Post.objects.filter(pk=self.post.pk).update(text='Тихая правка')
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertContains(response, 'Первый пост')
+
+    def test_new_post_invalidates_feeds(self):
+        """Новый пост сразу виден во всех своих лентах."""
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': 'test-slug'}),
+            reverse('posts:profile', kwargs={'username': 'gleb'}),
+        )
+        for url in urls:
+            self.guest_client.get(url)
+        Post.objects.create(text='Свежий пост', author=self.user,
+                            group=self.group)
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertContains(response, 'Свежий пост')
+
+    def test_edit_invalidates_old_group(self):
+        url = reverse('posts:group_list', kwargs={'slug': 'test-slug'})
+        self.guest_client.get(url)
+        self.post.group = Group.objects.create(title='Другая', slug='other',
+                                               description='-')
+        self.post.save()
+        response = self.guest_client.get(url)
+        self.assertNotContains(response, 'Первый пост')
+
+    def test_profile_is_per_user_and_invalidated_by_follow(self):
+        client = Client()
+        client.force_login(self.reader)
+        url = reverse('posts:profile', kwargs={'username': 'gleb'})
+        self.guest_client.get(url)
+        self.assertContains(client.get(url), 'Подписаться')
+        Follow.objects.create(user=self.reader, author=self.user)
+        self.assertContains(client.get(url), 'Отписаться')
+
+    def test_follow_invalidates_follower_profile(self):
+        """Счётчик подписок в профиле читателя меняется с подпиской."""
+        url = reverse('posts:profile', kwargs={'username': 'reader'})
+        self.assertContains(self.guest_client.get(url), 'подписок: 0')
+        follow = Follow.objects.create(user=self.reader, author=self.user)
+        self.assertContains(self.guest_client.get(url), 'подписок: 1')
+        follow.delete()
+        self.assertContains(self.guest_client.get(url), 'подписок: 0')
+
+    def test_post_card_is_shared_between_feeds(self):
+        """Карточка из кэша общая для лент и меняется с версией поста."""
+        self.guest_client.get(reverse('posts:index'))
+        Post.objects.filter(pk=self.post.pk).update(text='Тихая правка')
+        group_url = reverse('posts:group_list', kwargs={'slug': 'test-slug'})
+        self.assertContains(self.guest_client.get(group_url), 'Первый пост')
+        post = Post.objects.get(pk=self.post.pk)
+        post.text = 'Правка через форму'
+        post.save()
+        profile_url = reverse('posts:profile', kwargs={'username': 'gleb'})
+        self.assertContains(self.guest_client.get(profile_url),
+                            'Правка через форму')
+
+    @override_settings(FEED_VERSION_TIMEOUT=60)
+    def test_version_keys_expire(self):
+        """Ключ версии запрошенной области не остаётся в кэше навсегда."""
+        scope = caching.author_scope('nobody')
+        key = f'feed_version:{caching._scope_key(scope)}'
+        version = caching.get_version(scope)
+        self.assertEqual(cache.get(key), version)
+        later = time.time() + 61
+        with mock.patch('time.time', return_value=later):
+            self.assertIsNone(cache.get(key))
+            self.assertNotEqual(caching.get_version(scope), version)
@@ -0,0 +1,65 @@
+from http import HTTPStatus
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Group, Post, User
+
+
+class ConditionalGetTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='gleb')
+        cls.group = Group.objects.create(title='Группа', slug='test-slug',
+                                         description='Описание')
+        cls.post = Post.objects.create(text='Пост', author=cls.user,
+                                       group=cls.group)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def revalidate(self, url, etag):
+        return self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    def test_unchanged_feeds_answer_not_modified_without_queries(self):
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': 'test-slug'}),
+            reverse('posts:profile', kwargs={'username': 'gleb'}),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                etag = self.client.get(url)['ETag']
+                with self.assertNumQueries(0):
+                    response = self.revalidate(url, etag)
+                self.assertEqual(response.status_code,
+                                 HTTPStatus.NOT_MODIFIED)
+        Post.objects.create(text='Новый', author=self.user, group=self.group)
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.revalidate(url, etag)
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_etag_depends_on_user(self):
+        url = reverse('posts:index')
+        etag = self.client.get(url)['ETag']
+        self.client.force_login(self.user)
+        self.assertEqual(self.revalidate(url, etag).status_code,
+                         HTTPStatus.OK)
+
+    def test_post_detail_changes_with_comments(self):
+        url = reverse('posts:post_detail', kwargs={'post_id': self.post.id})
+        etag = self.client.get(url)['ETag']
+        with mock.patch('posts.hits.record') as record:
+            with mock.patch('posts.views.render') as render:
+                response = self.revalidate(url, etag)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+        render.assert_not_called()
+        record.assert_called_once_with(self.post.id)
+        Comment.objects.create(post=self.post, author=self.user, text='Да')
+        self.assertEqual(self.revalidate(url, etag).status_code,
+                         HTTPStatus.OK)
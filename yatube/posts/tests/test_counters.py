@@ -0,0 +1,82 @@
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post, User, UserStats
+
+
+class CountersTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='gleb')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовый заголовок',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def test_counters_follow_changes(self):
+        post = Post.objects.create(text='Пост', author=self.user,
+                                   group=self.group)
+        Comment.objects.create(text='Коммент', author=self.reader, post=post)
+        self.client.get(reverse('posts:profile_follow',
+                                kwargs={'username': 'gleb'}))
+        post.refresh_from_db()
+        self.group.refresh_from_db()
+        self.assertEqual(post.comments_count, 1)
+        self.assertEqual(self.group.posts_count, 1)
+        self.assertEqual(self.user.stats.posts_count, 1)
+        self.assertEqual(self.user.stats.followers_count, 1)
+        self.assertEqual(UserStats.objects.get(user=self.reader)
+                         .following_count, 1)
+
+        self.client.get(reverse('posts:profile_unfollow',
+                                kwargs={'username': 'gleb'}))
+        post.delete()
+        self.group.refresh_from_db()
+        stats = UserStats.objects.get(user=self.user)
+        self.assertEqual(self.group.posts_count, 0)
+        self.assertEqual(stats.posts_count, 0)
+        self.assertEqual(stats.followers_count, 0)
+
+    def test_reconcile_command(self):
+        post = Post.objects.create(text='Пост', author=self.user,
+                                   group=self.group)
+        Follow.objects.create(user=self.reader, author=self.user)
+        UserStats.objects.all().delete()
+        Group.objects.update(posts_count=7)
+        Post.objects.update(comments_count=7)
+        call_command('reconcile_counters', stdout=StringIO())
+        post.refresh_from_db()
+        self.group.refresh_from_db()
+        self.assertEqual(post.comments_count, 0)
+        self.assertEqual(self.group.posts_count, 1)
+        stats = UserStats.objects.get(user=self.user)
+        self.assertEqual(stats.posts_count, 1)
+        self.assertEqual(stats.followers_count, 1)
+
+    def test_pages_render_counts_without_count_queries(self):
+        post = Post.objects.create(text='Пост', author=self.user)
+        urls = (
+            reverse('posts:profile', kwargs={'username': 'gleb'}),
+            reverse('posts:post_detail', kwargs={'post_id': post.id}),
+            reverse('posts:follow_index'),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                with CaptureQueriesContext(connection) as context:
+                    self.client.get(url)
+                self.assertFalse([query for query in context.captured_queries
+                                  if 'COUNT(' in query['sql']])
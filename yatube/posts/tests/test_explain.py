@@ -0,0 +1,91 @@
+import re
+from unittest import skipUnless
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post, User
+
+# Индексом пользуется только SEARCH; SCAN — обход таблицы или индекса
+# целиком, даже если план называет индекс.
+FULL_SCAN = re.compile(r'\bSCAN\b')
+INDEX_WALK = re.compile(r'\bSCAN (?:TABLE )?\w+ USING (?:COVERING )?INDEX\b')
+TEMP_SORT = 'USE TEMP B-TREE FOR ORDER BY'
+
+
+@skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN из SQLite')
+class QueryPlanTest(TestCase):
+    """Запросы страниц не должны читать таблицы целиком."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='gleb')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовый заголовок',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(text='Пост', author=cls.user,
+                                       group=cls.group)
+        Comment.objects.create(text='Коммент', author=cls.reader,
+                               post=cls.post)
+        Follow.objects.create(user=cls.reader, author=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    @staticmethod
+    def plan(sql):
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            return [row[-1] for row in cursor.fetchall()]
+
+    @staticmethod
+    def full_scans(sql, plan):
+        # Единственный допустимый SCAN — первая страница ленты без
+        # фильтров: обход индекса в порядке сортировки без WHERE
+        # останавливается на LIMIT строк.
+        bounded = ' WHERE ' not in sql and ' LIMIT ' in sql
+        return [line for line in plan if FULL_SCAN.search(line)
+                and not (bounded and INDEX_WALK.search(line))]
+
+    def captured_plans(self, url):
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(url)
+        return [(query['sql'], self.plan(query['sql']))
+                for query in context.captured_queries
+                if query['sql'].startswith('SELECT')]
+
+    def test_view_queries_use_indexes(self):
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': 'test-slug'}),
+            reverse('posts:profile', kwargs={'username': 'gleb'}),
+            reverse('posts:post_detail', kwargs={'post_id': self.post.id}),
+            reverse('posts:follow_index'),
+        )
+        for url in urls:
+            for sql, plan in self.captured_plans(url):
+                with self.subTest(url=url, sql=sql):
+                    self.assertEqual(self.full_scans(sql, plan), [])
+
+    def test_feeds_are_read_in_index_order(self):
+        """Ленты не сортируют выборку во временном B-дереве."""
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': 'test-slug'}),
+            reverse('posts:profile', kwargs={'username': 'gleb'}),
+            reverse('posts:follow_index'),
+        )
+        for url in urls:
+            for sql, plan in self.captured_plans(url):
+                with self.subTest(url=url, sql=sql):
+                    self.assertEqual(
+                        [line for line in plan if TEMP_SORT in line], [])
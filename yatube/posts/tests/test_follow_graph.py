@@ -0,0 +1,72 @@
+import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts import follow_graph
+from posts.models import Follow, Post, User
+
+
+class FollowGraphTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='reader')
+        cls.friend = User.objects.create_user(username='friend')
+        cls.author = User.objects.create_user(username='author')
+        cls.other = User.objects.create_user(username='other')
+        Follow.objects.create(user=cls.reader, author=cls.friend)
+        Follow.objects.create(user=cls.friend, author=cls.author)
+        Follow.objects.create(user=cls.friend, author=cls.reader)
+        cls.post = Post.objects.create(text='Пост друга', author=cls.friend)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def test_follow_checks_come_from_cache(self):
+        follow_graph.following(self.reader.id)
+        with self.assertNumQueries(0):
+            self.assertTrue(
+                follow_graph.is_following(self.reader.id, self.friend.id))
+            self.assertFalse(
+                follow_graph.is_following(self.reader.id, self.other.id))
+
+    def test_graph_follows_follow_and_unfollow(self):
+        self.assertFalse(
+            follow_graph.is_following(self.reader.id, self.other.id))
+        Follow.objects.create(user=self.reader, author=self.other)
+        self.assertTrue(
+            follow_graph.is_following(self.reader.id, self.other.id))
+        Follow.objects.filter(user=self.reader, author=self.other).delete()
+        self.assertFalse(
+            follow_graph.is_following(self.reader.id, self.other.id))
+
+    @override_settings(FOLLOW_GRAPH_TIMEOUT=60)
+    def test_change_in_other_process_expires(self):
+        """Изменение, сброшенное в чужом кэше, видно после таймаута."""
+        follow_graph.following(self.reader.id)
+        # Правка без сигналов: сброс достался кэшу другого процесса.
+        Follow.objects.filter(user=self.reader,
+                              author=self.friend).update(author=self.other)
+        self.assertTrue(
+            follow_graph.is_following(self.reader.id, self.friend.id))
+        with mock.patch('time.time', return_value=time.time() + 61):
+            self.assertFalse(
+                follow_graph.is_following(self.reader.id, self.friend.id))
+
+    def test_suggestions_are_friends_of_friends(self):
+        self.assertEqual(follow_graph.suggestions(self.reader.id, 5),
+                         [self.author.id])
+        response = self.client.get(reverse('posts:follow_index'))
+        self.assertEqual(list(response.context['suggested']), [self.author])
+
+    def test_cached_feed_marks_follow_state(self):
+        url = reverse('posts:index')
+        self.assertContains(self.client.get(url), 'вы подписаны на автора')
+        Follow.objects.filter(user=self.reader, author=self.friend).delete()
+        self.assertNotContains(self.client.get(url),
+                               'вы подписаны на автора')
@@ -1,16 +1,19 @@
+import hashlib
 import shutil
 import tempfile
+from io import BytesIO
+
+from PIL import Image
 from posts.models import Post, Group, User, Comment
 from posts.forms import PostForm
 from django.test import Client, TestCase, override_settings
 from django.urls import reverse
-from django.conf import settings
 from django.core.files.uploadedfile import SimpleUploadedFile
 
-TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+TEMP_MEDIA_ROOT = tempfile.mkdtemp()
 
 
-@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, POST_THUMBNAIL_WORKERS=0)
 class PostCreateFormTest(TestCase):
     @classmethod
     def setUpClass(cls):
@@ -67,10 +70,11 @@ class PostCreateFormTest(TestCase):
         self.assertEqual(Post.objects.count(), post_count + 1)
         self.assertEqual(self.group.id, post_form['group'])
         self.assertEqual(self.post.text, post_form['text'])
+        digest = hashlib.sha256(small_gif).hexdigest()
         self.assertTrue(Post.objects.filter(
             text='Тестовый текст',
             group=self.group,
-            image='posts/small.gif'
+            image=f'posts/{digest[:2]}/{digest}.gif'
         ).exists())
 
     def test_edit_post(self):
@@ -100,3 +104,58 @@ class PostCreateFormTest(TestCase):
         self.assertRedirects(response, reverse('posts:post_detail',
                                                kwargs={'post_id': '1'}))
         self.assertEqual(Comment.objects.count(), comment_count + 1)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, POST_THUMBNAIL_WORKERS=0)
+class PostImageUploadTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='gleb')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.authorizade_user = Client()
+        self.authorizade_user.force_login(self.user)
+
+    @staticmethod
+    def jpeg(size=(40, 20), orientation=None):
+        image = Image.new('RGB', size, 'red')
+        options = {}
+        if orientation:
+            exif = Image.Exif()
+            exif[0x0112] = orientation
+            options['exif'] = exif.tobytes()
+        content = BytesIO()
+        image.save(content, 'JPEG', **options)
+        return SimpleUploadedFile('photo.jpg', content.getvalue(),
+                                  'image/jpeg')
+
+    def create(self, image):
+        return self.authorizade_user.post(
+            reverse('posts:post_create'),
+            data={'text': 'Пост с картинкой', 'image': image})
+
+    @override_settings(FILE_UPLOAD_MAX_BYTES=100)
+    def test_upload_over_byte_limit_is_rejected(self):
+        response = self.create(self.jpeg())
+        self.assertFormError(response, 'form', 'image',
+                             'Файл больше 100\xa0байт.')
+        self.assertFalse(Post.objects.exists())
+
+    @override_settings(POST_IMAGE_MAX_PIXELS=799)
+    def test_upload_over_pixel_limit_is_rejected(self):
+        response = self.create(self.jpeg())
+        self.assertFormError(response, 'form', 'image',
+                             'Слишком большое разрешение картинки.')
+
+    def test_exif_is_applied_and_stripped(self):
+        self.create(self.jpeg(orientation=6))
+        post = Post.objects.get()
+        with Image.open(post.image) as image:
+            self.assertEqual(image.size, (20, 40))
+            self.assertFalse(image.getexif())
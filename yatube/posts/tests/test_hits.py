@@ -0,0 +1,57 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts import hits, trending
+from posts.models import Post, TrendingPost, User, ViewBatch
+
+
+@override_settings(POST_VIEWS_FLUSH_INTERVAL=60 * 60)
+class ViewCounterTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='gleb')
+
+    def setUp(self):
+        cache.clear()
+        hits._take()
+        self.client = Client()
+        self.first = Post.objects.create(text='Первый', author=self.user)
+        self.second = Post.objects.create(text='Второй', author=self.user)
+
+    def test_views_are_buffered_and_flushed_in_one_batch(self):
+        for post in (self.first, self.first, self.second):
+            self.client.get(reverse('posts:post_detail',
+                                    kwargs={'post_id': post.id}))
+        self.first.refresh_from_db()
+        self.assertEqual(self.first.views_count, 0)
+        with CaptureQueriesContext(connection) as context:
+            self.assertEqual(hits.flush(), 2)
+        updates = [query for query in context.captured_queries
+                   if query['sql'].startswith('UPDATE')]
+        self.assertEqual(len(updates), 1)
+        self.first.refresh_from_db()
+        self.second.refresh_from_db()
+        self.assertEqual((self.first.views_count, self.second.views_count),
+                         (2, 1))
+        trending.update()
+        self.assertEqual(list(trending.posts()), [self.first, self.second])
+        self.assertAlmostEqual(
+            TrendingPost.objects.get(post=self.first).score, 0.2, 3)
+        self.assertFalse(ViewBatch.objects.exists())
+
+    def test_views_of_deleted_posts_are_dropped(self):
+        hits.record(self.first.id)
+        hits.record(self.second.id)
+        self.second.delete()
+        self.assertEqual(hits.flush(), 1)
+        self.assertEqual(ViewBatch.objects.get().post, self.first)
+
+    @override_settings(POST_VIEWS_FLUSH_SIZE=2)
+    def test_full_buffer_is_flushed(self):
+        hits.record(self.first.id)
+        hits.record(self.second.id)
+        self.assertEqual(Post.objects.filter(views_count=1).count(), 2)
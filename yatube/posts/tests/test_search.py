@@ -0,0 +1,93 @@
+from datetime import timedelta
+
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from posts import search
+from posts.models import Comment, Group, Post, User
+
+
+class SearchTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='gleb')
+        cls.other = User.objects.create_user(username='other')
+        cls.group = Group.objects.create(
+            title='Тестовый заголовок',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+
+    def setUp(self):
+        self.client = Client()
+
+    def found(self, query, **filters):
+        return [post.id for post in search.search(query, **filters)[0:10]]
+
+    def test_index_follows_posts_and_comments(self):
+        post = Post.objects.create(text='Про рыбалку на Волге',
+                                   author=self.user)
+        self.assertEqual(self.found('рыбалку'), [post.id])
+        self.assertEqual(self.found('рыбал'), [post.id])
+        Comment.objects.create(text='Лещ клюёт', author=self.other,
+                               post=post)
+        self.assertEqual(self.found('лещ'), [post.id])
+        post.text = 'Про охоту'
+        post.save()
+        self.assertEqual(self.found('рыбалку'), [])
+        post.delete()
+        self.assertEqual(self.found('охоту'), [])
+
+    def test_comments_are_indexed_one_by_one(self):
+        post = Post.objects.create(text='Про рыбалку', author=self.user)
+        first = Comment.objects.create(text='Лещ клюёт', author=self.other,
+                                       post=post)
+        Comment.objects.create(text='Лещ ушёл', author=self.user, post=post)
+        results = search.search('лещ')
+        self.assertEqual(results.count(), 1)
+        self.assertEqual([found.id for found in results[0:10]], [post.id])
+        first.text = 'Окунь клюёт'
+        first.save()
+        self.assertEqual(self.found('окунь'), [post.id])
+        self.assertEqual(self.found('клюёт'), [post.id])
+        first.delete()
+        self.assertEqual(self.found('окунь'), [])
+        self.assertEqual(self.found('лещ'), [post.id])
+        self.assertEqual(search.rebuild(), 1)
+        self.assertEqual(self.found('ушёл'), [post.id])
+
+    def test_ranking_and_filters(self):
+        in_comment = Post.objects.create(text='Просто пост',
+                                         author=self.other)
+        Comment.objects.create(text='Комментарий про кошек',
+                               author=self.user, post=in_comment)
+        in_text = Post.objects.create(text='Пост про кошек и собак',
+                                      author=self.user, group=self.group)
+        old = Post.objects.create(text='Старый пост про кошек',
+                                  author=self.user)
+        Post.objects.filter(pk=old.pk).update(
+            pub_date=timezone.now() - timedelta(days=30))
+        self.assertEqual(self.found('кошек')[-1], in_comment.id)
+        self.assertEqual(self.found('кошек', group=self.group), [in_text.id])
+        self.assertEqual(self.found('кошек', author='other'),
+                         [in_comment.id])
+        week_ago = (timezone.now() - timedelta(days=7)).date()
+        self.assertNotIn(old.id, self.found('кошек', date_from=week_ago))
+        self.assertEqual(self.found('кошек', date_to=week_ago), [old.id])
+
+    def test_search_page_escapes_and_highlights(self):
+        Post.objects.create(text='<b>Жирный</b> кот', author=self.user)
+        response = self.client.get(reverse('posts:search'),
+                                   {'q': '"кот*'})
+        self.assertEqual(response.context['page_obj'].paginator.count, 1)
+        self.assertContains(response, '&lt;b&gt;Жирный&lt;/b&gt; '
+                                      '<mark>кот</mark>')
+
+    @override_settings(
+        POST_SEARCH_BACKEND='posts.search.database.DatabaseBackend')
+    def test_database_backend(self):
+        post = Post.objects.create(text='Про рыбалку', author=self.user)
+        self.assertEqual(self.found('РЫБАЛКУ'), [post.id])
+        self.assertEqual(self.found('рыбалку', author='other'), [])
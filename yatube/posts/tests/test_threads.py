@@ -0,0 +1,77 @@
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Comment, Post, User
+
+
+class CommentThreadsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='gleb')
+        cls.post = Post.objects.create(text='Пост', author=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def reply(self, parent=None, text='Коммент'):
+        data = {'text': text}
+        if parent is not None:
+            data['parent'] = parent.id
+        self.client.post(reverse('posts:add_comment',
+                                 kwargs={'post_id': self.post.id}), data)
+        return Comment.objects.latest('id')
+
+    def replies_url(self, comment):
+        return reverse('posts:comment_replies',
+                       kwargs={'post_id': self.post.id,
+                               'comment_id': comment.id})
+
+    def test_replies_build_paths_and_counts(self):
+        root = self.reply()
+        child = self.reply(root)
+        grandchild = self.reply(child)
+        self.assertEqual(grandchild.parent, child)
+        self.assertEqual(grandchild.path.split('/'),
+                         [str(c.id).zfill(10) for c in (root, child,
+                                                        grandchild)])
+        root.refresh_from_db()
+        self.assertEqual(root.replies_count, 2)
+        child.delete()
+        root.refresh_from_db()
+        self.assertEqual(root.replies_count, 0)
+
+    @override_settings(COMMENT_MAX_DEPTH=2)
+    def test_deep_reply_attaches_to_allowed_depth(self):
+        root = self.reply()
+        child = self.reply(root)
+        self.assertEqual(self.reply(child).parent, root)
+
+    @override_settings(COMMENTS_PER_PAGE=2)
+    def test_post_detail_pages_root_comments(self):
+        roots = [self.reply(text=f'Корень {number}') for number in range(3)]
+        self.reply(roots[0], text='Ответ')
+        url = reverse('posts:post_detail', kwargs={'post_id': self.post.id})
+        page = self.client.get(url).context['comments']
+        self.assertEqual(list(page), roots[:2])
+        cursor = page.paginator.next_cursor
+        page = self.client.get(url, {'after': cursor}).context['comments']
+        self.assertEqual(list(page), roots[2:])
+
+    @override_settings(COMMENT_REPLIES_PER_PAGE=2)
+    def test_replies_fragment_is_paginated_in_thread_order(self):
+        root = self.reply()
+        first = self.reply(root, text='Первый ответ')
+        nested = self.reply(first, text='Ответ на ответ')
+        second = self.reply(root, text='Второй ответ')
+        response = self.client.get(self.replies_url(root))
+        self.assertEqual(response.context['replies'], [first, nested])
+        self.assertEqual(response.context['replies'][1].indent, 1)
+        self.assertNotContains(response, '<html')
+        response = self.client.get(self.replies_url(root),
+                                   {'after': response.context['next_after']})
+        self.assertEqual(response.context['replies'], [second])
+        self.assertIsNone(response.context['next_after'])
@@ -0,0 +1,134 @@
+import json
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts import thumbnails
+from posts.models import Post, User
+from posts.templatetags.post_images import PENDING_TIMEOUT, card_timeout
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp()
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, POST_THUMBNAIL_WORKERS=0)
+class ThumbnailPipelineTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='gleb')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        on_commit = mock.patch('django.db.transaction.on_commit',
+                               lambda func: func())
+        on_commit.start()
+        self.addCleanup(on_commit.stop)
+
+    def create_post(self, name):
+        return Post.objects.create(
+            text='Пост с картинкой',
+            author=self.user,
+            image=SimpleUploadedFile(name, SMALL_GIF, 'image/gif'),
+        )
+
+    @override_settings(POST_IMAGE_WIDTHS=(320, 640),
+                       POST_IMAGE_FORMATS=('avif', 'webp', 'png', 'jpeg'))
+    def test_variants_are_prepared_on_save(self):
+        self.create_post('ready.gif')
+        post = Post.objects.get()
+        meta = thumbnails.variants(post)
+        formats = thumbnails.formats()
+        self.assertEqual(formats[-1], 'jpeg')
+        self.assertNotIn('png', formats)
+        # Оригинал уже самой малой ширины: нарезается только она.
+        self.assertEqual(len(meta['variants']), len(formats))
+        for item in meta['variants']:
+            self.assertEqual((item['width'], item['height']), (320, 113))
+            self.assertEqual(default_storage.size(item['name']),
+                             item['size'])
+        picture = thumbnails.picture(post)
+        with mock.patch.object(default_storage, 'open') as storage_open:
+            response = self.client.get(reverse('posts:index'))
+        storage_open.assert_not_called()
+        self.assertContains(response, f'srcset="{picture["srcset"]}"')
+        self.assertContains(response, 'width="320" height="113"')
+
+    def test_new_image_replaces_variants(self):
+        post = self.create_post('first.gif')
+        post.refresh_from_db()
+        post.image = SimpleUploadedFile('second.gif', SMALL_GIF, 'image/gif')
+        post.save()
+        post.refresh_from_db()
+        self.assertEqual(thumbnails.variants(post)['source'],
+                         post.image.name)
+
+    def test_render_again_replaces_files(self):
+        """Повторная нарезка переписывает файлы, а не копит копии."""
+        name = self.create_post('first.gif').image.name
+        directory = thumbnails.variants_dir(name)
+        files = sorted(default_storage.listdir(directory)[1])
+        thumbnails.render(name)
+        thumbnails.render(name)
+        self.assertEqual(sorted(default_storage.listdir(directory)[1]),
+                         files)
+
+    def test_build_all_renders_again(self):
+        """--all нарезает заново и картинки с готовыми вариантами."""
+        self.create_post('first.gif')
+        self.create_post('copy.gif')
+        with mock.patch('posts.thumbnails.render',
+                        wraps=thumbnails.render) as render:
+            call_command('build_image_variants', stdout=StringIO())
+            render.assert_not_called()
+            call_command('build_image_variants', all=True,
+                         stdout=StringIO())
+        render.assert_called_once_with(Post.objects.first().image.name)
+
+    def test_feed_never_resizes_inline(self):
+        """Пока миниатюры нет, лента выводит заглушку и ставит задачу."""
+        with mock.patch('posts.thumbnails.schedule') as schedule:
+            post = self.create_post('pending.gif')
+            schedule.reset_mock()
+            with mock.patch('posts.thumbnails.render') as render:
+                response = self.client.get(reverse('posts:index'))
+        render.assert_not_called()
+        schedule.assert_called_once_with(post.image)
+        self.assertContains(response, 'aspect-ratio: 960 / 339')
+        self.assertNotContains(response, '<picture>')
+
+    def test_scheduled_after_commit_with_short_card_cache(self):
+        callbacks = []
+        with mock.patch('django.db.transaction.on_commit', callbacks.append):
+            with mock.patch('posts.thumbnails.schedule') as schedule:
+                post = self.create_post('commit.gif')
+                # Строка поста ещё не зафиксирована.
+                schedule.assert_not_called()
+                for callback in callbacks:
+                    callback()
+        schedule.assert_called_once_with(post.image.name)
+        self.assertEqual(card_timeout(post), PENDING_TIMEOUT)
+        post.image_variants = json.dumps(
+            {'source': post.image.name, 'variants': []})
+        self.assertIsNone(card_timeout(post))
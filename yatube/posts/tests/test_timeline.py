@@ -0,0 +1,107 @@
+import threading
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from jobs import worker
+from posts.models import Follow, Post, TimelineEntry, User
+from posts.timeline import CELEBRITIES_KEY
+
+
+class TimelineTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='reader')
+        cls.author = User.objects.create_user(username='author')
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def feed_ids(self):
+        response = self.client.get(reverse('posts:follow_index'))
+        return [post.id for post in response.context['page_obj']]
+
+    def test_new_post_is_fanned_out(self):
+        """Новый пост автора попадает в ленту подписчика."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        post = Post.objects.create(text='Новый пост', author=self.author)
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=self.reader, post=post).exists())
+        self.assertEqual(self.feed_ids(), [post.id])
+
+    def test_follow_backfills_and_unfollow_purges(self):
+        post = Post.objects.create(text='Старый пост', author=self.author)
+        self.client.get(reverse('posts:profile_follow',
+                                kwargs={'username': 'author'}))
+        self.assertEqual(self.feed_ids(), [post.id])
+        self.client.get(reverse('posts:profile_unfollow',
+                                kwargs={'username': 'author'}))
+        self.assertFalse(TimelineEntry.objects.exists())
+        self.assertEqual(self.feed_ids(), [])
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=0)
+    def test_celebrity_is_read_on_request(self):
+        """Посты знаменитостей не рассылаются, но видны в ленте."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        cache.delete(CELEBRITIES_KEY)
+        post = Post.objects.create(text='Пост звезды', author=self.author)
+        self.assertFalse(TimelineEntry.objects.exists())
+        self.assertEqual(self.feed_ids(), [post.id])
+
+    def test_rebuild_command(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        post = Post.objects.create(text='Пост', author=self.author)
+        TimelineEntry.objects.all().delete()
+        call_command('rebuild_timelines', stdout=StringIO())
+        self.assertEqual(self.feed_ids(), [post.id])
+
+    @override_settings(TIMELINE_LENGTH=2)
+    def test_fan_out_trims_timeline(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        posts = [Post.objects.create(text=f'Пост {number}',
+                                     author=self.author)
+                 for number in range(4)]
+        worker.work(threading.Event(), burst=True)
+        self.assertEqual(
+            set(TimelineEntry.objects.values_list('post_id', flat=True)),
+            {posts[3].id, posts[2].id})
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=1)
+    def test_feed_merges_timeline_and_celebrities(self):
+        star = User.objects.create_user(username='star')
+        fan = User.objects.create_user(username='fan')
+        Follow.objects.create(user=self.reader, author=self.author)
+        Follow.objects.create(user=self.reader, author=star)
+        Follow.objects.create(user=fan, author=star)
+        cache.delete(CELEBRITIES_KEY)
+        authors = (star, self.author)
+        posts = [Post.objects.create(text=f'Пост {number}',
+                                     author=authors[number % 2])
+                 for number in range(15)]
+        self.assertEqual(TimelineEntry.objects.count(), 7)
+        url = reverse('posts:follow_index')
+        page_obj = self.client.get(url).context['page_obj']
+        cursor = page_obj.paginator.next_cursor
+        second = self.client.get(url, {'after': cursor}).context['page_obj']
+        self.assertEqual([post.id for post in [*page_obj, *second]],
+                         [post.id for post in reversed(posts)])
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=1)
+    def test_former_celebrity_posts_are_backfilled(self):
+        fan = User.objects.create_user(username='fan')
+        Follow.objects.create(user=self.reader, author=self.author)
+        Follow.objects.create(user=fan, author=self.author)
+        cache.delete(CELEBRITIES_KEY)
+        post = Post.objects.create(text='Пост звезды', author=self.author)
+        self.assertFalse(TimelineEntry.objects.exists())
+        Follow.objects.filter(user=fan).delete()
+        worker.work(threading.Event(), burst=True)
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=self.reader, post=post).exists())
+        self.assertEqual(self.feed_ids(), [post.id])
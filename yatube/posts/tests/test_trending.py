@@ -0,0 +1,78 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from posts import trending
+from posts.models import (Comment, Follow, Group, Post, TrendingGroup,
+                          TrendingPost, User)
+
+
+class TrendingTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='gleb')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовый заголовок',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def comment(self, post, count=1):
+        for _ in range(count):
+            Comment.objects.create(text='Коммент', author=self.reader,
+                                   post=post)
+
+    def test_scores_rank_posts_and_groups(self):
+        quiet = Post.objects.create(text='Тихий пост', author=self.reader)
+        loud = Post.objects.create(text='Громкий пост', author=self.user,
+                                   group=self.group)
+        self.comment(quiet)
+        self.comment(loud, 2)
+        Follow.objects.create(user=self.reader, author=self.user)
+        call_command('update_trending', stdout=StringIO())
+        self.assertEqual(list(trending.posts()), [loud, quiet])
+        self.assertAlmostEqual(TrendingPost.objects.get(post=loud).score,
+                               3 * 2 + 2, 3)
+        self.assertEqual(list(trending.groups(5)), [self.group])
+        response = self.client.get(reverse('posts:trending'))
+        self.assertEqual(list(response.context['page_obj']), [loud, quiet])
+        self.assertContains(response, self.group.title)
+
+    def test_update_reads_only_new_events_and_decays(self):
+        post = Post.objects.create(text='Пост', author=self.user,
+                                   group=self.group)
+        self.comment(post)
+        now = timezone.now()
+        trending.update(now)
+        trending.update(now)
+        self.assertAlmostEqual(TrendingPost.objects.get().score, 3, 3)
+        later = now + timedelta(hours=6)
+        with self.settings(TRENDING_HALF_LIFE=6 * 60 * 60):
+            trending.update(later)
+        self.assertAlmostEqual(TrendingPost.objects.get().score, 1.5, 3)
+        self.assertAlmostEqual(TrendingGroup.objects.get().score, 1.5, 3)
+        trending.update(later + timedelta(days=30))
+        self.assertFalse(TrendingPost.objects.exists())
+
+    def test_trending_page_reads_the_score_index(self):
+        post = Post.objects.create(text='Пост', author=self.user)
+        self.comment(post)
+        trending.update()
+        sql, params = trending.posts()[:10].query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            plan = ' '.join(row[-1] for row in cursor.fetchall())
+        self.assertIn('trending_post_score_idx', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
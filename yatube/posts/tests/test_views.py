@@ -3,16 +3,15 @@ import tempfile
 from django.test import TestCase, Client, override_settings
 from django.urls import reverse
 from django import forms
-from django.conf import settings
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.core.cache import cache
 
 from posts.models import Post, Group, User
 
-TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+TEMP_MEDIA_ROOT = tempfile.mkdtemp()
 
 
-@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, POST_THUMBNAIL_WORKERS=0)
 class PagesTest(TestCase):
     text_for_test = 'Тестовое текст'
 
@@ -173,6 +172,36 @@ class PagesTest(TestCase):
 
     def test_paginator_second_page(self):
         self._bulk_create_posts(2)
+        response = self.authorizade_user.get(reverse('posts:index'))
+        cursor = response.context['page_obj'].paginator.next_cursor
         response = self.authorizade_user.get(reverse('posts:index')
-                                             + '?page=2')
+                                             + f'?after={cursor}')
         self.assertEqual(len(response.context['page_obj']), 3)
+
+    def test_paginator_cursor_back(self):
+        """Курсор ?before= возвращает на предыдущую страницу."""
+        self._bulk_create_posts(20)
+        first = self.authorizade_user.get(reverse('posts:index'))
+        first_page = first.context['page_obj']
+        self.assertFalse(first_page.has_previous())
+        cursor = first_page.paginator.next_cursor
+        second = self.authorizade_user.get(reverse('posts:index')
+                                           + f'?after={cursor}')
+        second_page = second.context['page_obj']
+        self.assertTrue(second_page.has_previous())
+        self.assertTrue(second_page.has_next())
+        self.assertFalse(
+            {post.id for post in first_page}
+            & {post.id for post in second_page}
+        )
+        cursor = second_page.paginator.previous_cursor
+        back = self.authorizade_user.get(reverse('posts:index')
+                                         + f'?before={cursor}')
+        self.assertEqual([post.id for post in back.context['page_obj']],
+                         [post.id for post in first_page])
+
+    def test_paginator_bad_cursor(self):
+        self._bulk_create_posts(12)
+        response = self.authorizade_user.get(reverse('posts:index')
+                                             + '?after=мусор')
+        self.assertEqual(len(response.context['page_obj']), 10)
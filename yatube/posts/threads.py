@@ -0,0 +1,92 @@
+"""
+Ветки комментариев.
+
+Путь комментария (Comment.path) — id его предков и его самого,
+дополненные нулями до SEGMENT знаков, через «/». Корневые комментарии
+поста листаются курсором по дате, а ответы на комментарий читаются
+одним запросом по индексу (post, path): поддерево — это пути с общим
+префиксом, упорядоченные как при обходе дерева.
+"""
+import re
+
+from django.conf import settings
+from django.db.models import CharField, Value
+from django.db.models.functions import Cast, LPad
+
+from .models import Comment
+from .utils import get_page
+
+SEGMENT = 10
+PATH_RE = re.compile(r'^\d+(/\d+)*$')
+
+
+def segment(comment_id):
+    return str(comment_id).zfill(SEGMENT)
+
+
+def root_path():
+    """Выражение пути корневого комментария для UPDATE."""
+    return LPad(Cast('id', CharField()), SEGMENT, Value('0'))
+
+
+def ancestor_ids(path):
+    """id предков комментария по его пути."""
+    return [int(part) for part in path.split('/')[:-1]]
+
+
+def reply_parent(parent):
+    """
+    Комментарий, к которому на самом деле прикрепится ответ.
+
+    Глубже COMMENT_MAX_DEPTH ветка не растёт: ответ на слишком
+    глубокий комментарий становится ответом его предку.
+    """
+    parts = parent.path.split('/')
+    if len(parts) < settings.COMMENT_MAX_DEPTH:
+        return parent
+    return Comment.objects.get(pk=int(parts[settings.COMMENT_MAX_DEPTH - 2]))
+
+
+def build_path(comment):
+    own = segment(comment.pk)
+    if comment.parent_id is None:
+        return own
+    return f'{comment.parent.path}/{own}'
+
+
+def roots(request, post_id):
+    """Страница корневых комментариев поста, от старых к новым."""
+    top_level = Comment.objects.select_related('author').filter(
+        post_id=post_id, parent=None)
+    return get_page(request, top_level, field='created',
+                    per_page=settings.COMMENTS_PER_PAGE)
+
+
+def subtree(root, after=None):
+    """
+    Ответы на комментарий в порядке обхода ветки.
+
+    after — путь последнего показанного ответа: выборка начинается
+    сразу за ним.
+    """
+    rows = Comment.objects.filter(post_id=root.post_id,
+                                  path__startswith=f'{root.path}/')
+    if after and PATH_RE.match(after) and after.startswith(root.path):
+        rows = rows.filter(path__gt=after)
+    return rows.order_by('path')
+
+
+def replies(root, after=None):
+    """
+    Следующая страница ответов на комментарий.
+
+    Возвращает ответы и путь для следующей страницы или None.
+    """
+    per_page = settings.COMMENT_REPLIES_PER_PAGE
+    page = list(subtree(root, after).select_related('author')
+                [:per_page + 1])
+    next_after = page[per_page - 1].path if len(page) > per_page else None
+    page = page[:per_page]
+    for reply in page:
+        reply.indent = reply.depth - root.depth - 1
+    return page, next_after
@@ -0,0 +1,240 @@
+"""
+Адаптивные варианты картинок постов, которые готовятся вне запроса.
+
+Из оригинала нарезается кроп 960:339 нескольких ширин
+(POST_IMAGE_WIDTHS) в каждом формате из POST_IMAGE_FORMATS, который
+умеет сохранять установленный Pillow. Описание вариантов — имена,
+размеры в пикселях и байтах — хранится в Post.image_variants, так что
+шаблону не нужно ни открывать файлы, ни обращаться к хранилищу.
+Недостающие варианты ставятся в локальный пул потоков, а до их
+готовности выводится заглушка.
+"""
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.db import connections
+from django.db.models import F
+from PIL import Image, ImageOps
+
+from . import caching
+
+logger = logging.getLogger(__name__)
+
+RATIO = (960, 339)
+SIZES = '(max-width: 960px) 100vw, 960px'
+FALLBACK_WIDTH = 960
+VARIANTS_DIR = 'posts/variants'
+FAILED_TIMEOUT = 10 * 60
+
+# Формат Pillow, расширение, MIME-тип и параметры сохранения.
+FORMATS = {
+    'avif': ('AVIF', 'avif', 'image/avif', {'quality': 50}),
+    'webp': ('WEBP', 'webp', 'image/webp', {'quality': 75, 'method': 4}),
+    'jpeg': ('JPEG', 'jpg', 'image/jpeg',
+             {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+_lock = threading.Lock()
+_pending = set()
+_executor = None
+
+
+def _failed_key(name):
+    return f'thumbnail_failed:{hashlib.md5(name.encode()).hexdigest()}'
+
+
+def formats():
+    """Форматы из настроек, которые Pillow умеет сохранять."""
+    Image.init()
+    return [fmt for fmt in settings.POST_IMAGE_FORMATS
+            if fmt in FORMATS and FORMATS[fmt][0] in Image.SAVE]
+
+
+def variants(post):
+    """Описание готовых вариантов картинки поста или None."""
+    if not post.image or not post.image_variants:
+        return None
+    try:
+        meta = json.loads(post.image_variants)
+    except ValueError:
+        return None
+    # Варианты от прежней картинки считаются отсутствующими.
+    if not isinstance(meta, dict) or meta.get('source') != post.image.name:
+        return None
+    return meta
+
+
+def picture(post):
+    """
+    Данные для <picture>: источники по форматам и запасной <img>.
+
+    Возвращает None, если вариантов ещё нет.
+    """
+    meta = variants(post)
+    if meta is None:
+        return None
+    by_format = {}
+    for item in meta['variants']:
+        by_format.setdefault(item['format'], []).append(item)
+    sources = []
+    for fmt, items in by_format.items():
+        items.sort(key=lambda item: item['width'])
+        sources.append({
+            'type': FORMATS[fmt][2],
+            'srcset': ', '.join(
+                f"{default_storage.url(item['name'])} {item['width']}w"
+                for item in items),
+            'items': items,
+        })
+    # Последний формат в настройках — самый совместимый, им и
+    # заполняется <img> для браузеров без поддержки <picture>.
+    fallback = sources.pop()
+    src = next((item for item in reversed(fallback['items'])
+                if item['width'] <= FALLBACK_WIDTH), fallback['items'][0])
+    return {
+        'sources': sources,
+        'srcset': fallback['srcset'],
+        'src': default_storage.url(src['name']),
+        'width': src['width'],
+        'height': src['height'],
+        'sizes': SIZES,
+    }
+
+
+def variants_dir(name):
+    """Каталог вариантов; у одинакового содержимого он общий."""
+    stem = os.path.splitext(os.path.basename(name))[0]
+    return f'{VARIANTS_DIR}/{stem}'
+
+
+def _height(width):
+    return round(width * RATIO[1] / RATIO[0])
+
+
+def _replace(name, data):
+    """
+    Записывает файл варианта поверх старого.
+
+    Каталог вариантов общий для постов с одинаковой картинкой: файл
+    пишется под временным именем и переносится на место os.replace, так
+    что параллельная нарезка не оставляет копий с суффиксами, а читатель
+    видит либо старый файл, либо новый.
+    """
+    path = default_storage.path(name)
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    descriptor, temporary = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+    try:
+        with os.fdopen(descriptor, 'wb') as file:
+            file.write(data)
+        os.chmod(temporary, settings.FILE_UPLOAD_PERMISSIONS or 0o644)
+        os.replace(temporary, path)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+
+
+def render(name):
+    """Нарезает варианты оригинала и возвращает их описание."""
+    with default_storage.open(name) as source:
+        original = Image.open(source)
+        original.load()
+    widths = ([width for width in settings.POST_IMAGE_WIDTHS
+               if width <= original.width]
+              or [min(settings.POST_IMAGE_WIDTHS)])
+    widest = max(widths)
+    base = ImageOps.fit(original.convert('RGB'), (widest, _height(widest)),
+                        Image.LANCZOS)
+    directory = variants_dir(name)
+    items = []
+    for width in sorted(widths):
+        image = (base if width == widest
+                 else base.resize((width, _height(width)), Image.LANCZOS))
+        for fmt in formats():
+            pillow_format, extension, _, options = FORMATS[fmt]
+            target = f'{directory}/{width}.{extension}'
+            buffer = BytesIO()
+            image.save(buffer, pillow_format, **options)
+            _replace(target, buffer.getvalue())
+            items.append({'format': fmt, 'width': width,
+                          'height': image.height, 'size': buffer.tell(),
+                          'name': target})
+    return {'source': name, 'variants': items}
+
+
+def generate(name, force=False):
+    """
+    Создаёт варианты и сбрасывает кэш лент, где виден пост.
+
+    force — нарезать заново, даже если у другого поста с той же
+    картинкой варианты уже есть: нужно после смены ширин или форматов.
+    """
+    from .models import Post
+
+    posts = Post.objects.filter(image=name)
+    meta = None
+    if not force:
+        # Одинаковые загрузки делят один файл: готовые варианты другого
+        # поста подходят и этому.
+        done = (posts.exclude(image_variants='')
+                .only('image', 'image_variants'))
+        meta = variants(done[0]) if done else None
+    try:
+        meta = meta or render(name)
+    except Exception:
+        logger.exception('Не удалось подготовить картинку %s', name)
+        cache.set(_failed_key(name), True, FAILED_TIMEOUT)
+        return
+    posts.update(image_variants=json.dumps(meta),
+                 version=F('version') + 1)
+    for post in posts.select_related('author', 'group'):
+        caching.bump(*caching.post_scopes(post))
+
+
+def _work(name):
+    try:
+        generate(name)
+    finally:
+        with _lock:
+            _pending.discard(name)
+        connections.close_all()
+
+
+def _get_executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.POST_THUMBNAIL_WORKERS,
+                thread_name_prefix='thumbnails',
+            )
+        return _executor
+
+
+def schedule(image):
+    """
+    Ставит нарезку вариантов в пул потоков.
+
+    При POST_THUMBNAIL_WORKERS = 0 варианты создаются сразу.
+    """
+    name = getattr(image, 'name', image)
+    if not name or cache.get(_failed_key(name)):
+        return
+    if not settings.POST_THUMBNAIL_WORKERS:
+        generate(name)
+        return
+    executor = _get_executor()
+    with _lock:
+        if name in _pending:
+            return
+        _pending.add(name)
+    executor.submit(_work, name)
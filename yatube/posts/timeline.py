@@ -0,0 +1,210 @@
+"""
+Ленты подписок с рассылкой при записи (fan-out-on-write).
+
+Новый пост раскладывается в TimelineEntry каждого подписчика вместе с
+датой публикации, и страница follow_index — срез индекса (user,
+-pub_date, -post), а не выборка всех записей пользователя с
+сортировкой. Лента хранит не больше TIMELINE_LENGTH постов: лишние
+обрезает задача из очереди после каждой рассылки.
+
+Посты авторов с очень большим числом подписчиков не рассылаются: при
+чтении к срезу ленты подмешиваются срезы каждого такого автора из
+подписок по индексу (author, -pub_date, -id). Когда у автора
+становится меньше подписчиков, чем TIMELINE_FANOUT_LIMIT, его
+последние посты раскладываются подписчикам задним числом.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import F, IntegerField, Q, Value
+
+from jobs.queue import enqueue, task
+
+from . import follow_graph
+from .models import Follow, Post, TimelineEntry, UserStats
+from .utils import PUB_COUNT, CursorPaginator
+
+CELEBRITIES_KEY = 'timeline:celebrities'
+CELEBRITIES_TIMEOUT = 10 * 60
+BATCH_SIZE = 500
+
+
+def celebrity_ids():
+    """Авторы, чьи посты читаются без рассылки."""
+    ids = cache.get(CELEBRITIES_KEY)
+    if ids is None:
+        ids = set(
+            UserStats.objects
+            .filter(followers_count__gt=settings.TIMELINE_FANOUT_LIMIT)
+            .values_list('user_id', flat=True)
+        )
+        cache.set(CELEBRITIES_KEY, ids, CELEBRITIES_TIMEOUT)
+    return ids
+
+
+def _insert(rows):
+    TimelineEntry.objects.bulk_create(
+        (TimelineEntry(user_id=user_id, post_id=post_id, pub_date=pub_date)
+         for user_id, post_id, pub_date in rows),
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def _chunks(ids):
+    for start in range(0, len(ids), BATCH_SIZE):
+        yield ids[start:start + BATCH_SIZE]
+
+
+def _copy(cursor, user_id, posts):
+    """
+    Кладёт в ленту последние TIMELINE_LENGTH постов из posts.
+
+    INSERT ... SELECT: строки ленты не проходят через Python.
+    """
+    table = connection.ops.quote_name(TimelineEntry._meta.db_table)
+    insert = connection.ops.insert_statement(ignore_conflicts=True)
+    # Все столбцы — аннотации, чтобы их порядок в SELECT был явным.
+    posts = (posts.annotate(reader=Value(user_id, IntegerField()),
+                            entry=F('id'), published=F('pub_date'))
+             .order_by('-pub_date', '-id')
+             .values_list('reader', 'entry', 'published')
+             [:settings.TIMELINE_LENGTH])
+    sql, params = posts.query.sql_with_params()
+    cursor.execute(f'{insert} {table} (user_id, post_id, pub_date) {sql}',
+                   params)
+
+
+def fan_out(post):
+    """Кладёт новый пост в ленты подписчиков автора."""
+    if post.author_id in celebrity_ids():
+        return
+    followers = list(Follow.objects.filter(author_id=post.author_id)
+                     .values_list('user_id', flat=True))
+    _insert((user_id, post.id, post.pub_date) for user_id in followers)
+    # Обрезка читает TIMELINE_LENGTH строк индекса на подписчика —
+    # запрос публикации её не ждёт.
+    for chunk in _chunks(followers):
+        enqueue(trim, user_ids=chunk)
+
+
+@task
+def trim(user_ids):
+    """Оставляет в лентах не больше TIMELINE_LENGTH последних постов."""
+    trimmed = 0
+    length = settings.TIMELINE_LENGTH
+    for user_id in user_ids:
+        entries = TimelineEntry.objects.filter(user_id=user_id)
+        edge = list(entries.order_by('-pub_date', '-post_id')
+                    .values_list('pub_date', 'post_id')[length:length + 1])
+        if edge:
+            pub_date, post_id = edge[0]
+            trimmed += entries.filter(
+                Q(pub_date__lt=pub_date)
+                | Q(pub_date=pub_date, post_id__lte=post_id)
+            ).delete()[0]
+    return trimmed
+
+
+def backfill(user_id, author_id):
+    """Добавляет в ленту последние посты нового автора из подписок."""
+    if author_id in celebrity_ids():
+        return
+    with connection.cursor() as cursor:
+        _copy(cursor, user_id, Post.objects.filter(author_id=author_id))
+    trim([user_id])
+
+
+def fanout_ended(author_id):
+    """
+    Вызывается, когда подписчиков автора стало TIMELINE_FANOUT_LIMIT.
+
+    Его посты больше не подмешиваются при чтении, поэтому те, что не
+    рассылались, нужно разложить по лентам.
+    """
+    if author_id in celebrity_ids():
+        enqueue(backfill_followers, author_id=author_id)
+
+
+@task
+def backfill_followers(author_id):
+    """Раскладывает последние посты автора всем его подписчикам."""
+    followers = list(Follow.objects.filter(author_id=author_id)
+                     .values_list('user_id', flat=True))
+    with connection.cursor() as cursor:
+        for user_id in followers:
+            _copy(cursor, user_id, Post.objects.filter(author_id=author_id))
+    trim(followers)
+    # Посты уже в лентах: автор больше не читается отдельно.
+    cache.delete(CELEBRITIES_KEY)
+    return len(followers)
+
+
+def purge(user_id, author_id):
+    """Убирает из ленты посты автора, от которого отписались."""
+    TimelineEntry.objects.filter(
+        user_id=user_id, post__author_id=author_id
+    ).delete()
+
+
+def rebuild(user_ids=None):
+    """Пересобирает ленты с нуля по текущим подпискам."""
+    follows = Follow.objects.exclude(author_id__in=celebrity_ids())
+    entries = TimelineEntry.objects.all()
+    if user_ids is not None:
+        follows = follows.filter(user_id__in=user_ids)
+        entries = entries.filter(user_id__in=user_ids)
+    entries.delete()
+    authors = {}
+    for user_id, author_id in follows.values_list('user_id', 'author_id'):
+        authors.setdefault(user_id, []).append(author_id)
+    with connection.cursor() as cursor:
+        for user_id, author_ids in authors.items():
+            _copy(cursor, user_id,
+                  Post.objects.filter(author_id__in=author_ids))
+    return len(authors)
+
+
+class TimelinePaginator(CursorPaginator):
+    """
+    Страница ленты подписок.
+
+    Ключи страницы (pub_date, id) читаются срезом индекса ленты и
+    срезами знаменитостей из подписок, сливаются, а сами посты
+    читаются из object_list по первичному ключу — object_list может
+    быть и выборкой .values(), как в API.
+    """
+
+    def __init__(self, object_list, per_page, user):
+        super().__init__(object_list, per_page)
+        self.user = user
+
+    def _rows(self, forward, position):
+        entries = TimelineEntry.objects.filter(user_id=self.user.id)
+        keys = set(self._slice(entries, forward, position, key='post_id')
+                   .values_list('pub_date', 'post_id'))
+        # Пост мог попасть в ленту до того, как автор стал знаменитостью:
+        # множество убирает повторы.
+        for author_id in followed_celebrities(self.user):
+            posts = Post.objects.filter(author_id=author_id)
+            keys.update(self._slice(posts, forward, position, key='id')
+                        .values_list('pub_date', 'id'))
+        keys = sorted(keys, reverse=self.descending == forward)
+        ids = [post_id for _, post_id in keys[:self.per_page + 1]]
+        rows = {row['id'] if isinstance(row, dict) else row.pk: row
+                for row in self.object_list.filter(id__in=ids)}
+        return [rows[post_id] for post_id in ids if post_id in rows]
+
+
+def followed_celebrities(user):
+    """Знаменитости из подписок — из графа подписок, без запроса."""
+    ids = follow_graph.following(user.id)
+    return sorted(author_id for author_id in celebrity_ids()
+                  if follow_graph.contains(ids, author_id))
+
+
+def get_page(request, post_list, user, per_page=PUB_COUNT):
+    """Страница ленты подписок user из постов post_list."""
+    paginator = TimelinePaginator(post_list, per_page, user)
+    return paginator.get_page(after=request.GET.get('after'),
+                              before=request.GET.get('before'))
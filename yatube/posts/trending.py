@@ -0,0 +1,154 @@
+"""
+Популярные посты и группы.
+
+Счёт складывается из событий — новых комментариев к посту, новых
+подписчиков его автора и просмотров — с весами TRENDING_WEIGHTS, и
+каждое событие затухает вдвое за TRENDING_HALF_LIFE секунд. update()
+запускается периодически (команда update_trending): умножает
+накопленные счета на затухание с прошлого запуска, добавляет только
+события после курсоров TrendingCursor и удаляет счета, ставшие
+пренебрежимо малыми. Страница популярного читает готовую таблицу по
+индексу.
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from . import caching
+from .models import (Comment, Follow, Group, Post, TrendingCursor,
+                     TrendingGroup, TrendingPost, ViewBatch)
+
+MIN_SCORE = 0.01
+DECAY = 'decay'
+
+
+def _decay(seconds):
+    return 0.5 ** (max(seconds, 0) / settings.TRENDING_HALF_LIFE)
+
+
+def _cursor(source):
+    cursor, _ = TrendingCursor.objects.get_or_create(source=source)
+    return cursor
+
+
+class _Scores:
+    """Прибавки к счетам постов и их групп за один запуск."""
+
+    def __init__(self, now):
+        self.now = now
+        self.posts = defaultdict(float)
+        self.groups = defaultdict(float)
+
+    def add(self, post_id, group_id, weight, moment):
+        value = weight * _decay((self.now - moment).total_seconds())
+        self.posts[post_id] += value
+        if group_id:
+            self.groups[group_id] += value
+
+
+def _read(source, queryset, fields):
+    """События источника после курсора; курсор сдвигается."""
+    cursor = _cursor(source)
+    rows = list(queryset.filter(id__gt=cursor.position).order_by('id')
+                .values_list('id', *fields))
+    if rows:
+        cursor.position = rows[-1][0]
+    cursor.updated = timezone.now()
+    cursor.save()
+    return rows
+
+
+def _comments(scores, since):
+    weight = settings.TRENDING_WEIGHTS['comment']
+    rows = _read('comment', Comment.objects.filter(created__gte=since),
+                 ('post_id', 'post__group_id', 'created'))
+    for _, post_id, group_id, created in rows:
+        if post_id:
+            scores.add(post_id, group_id, weight, created)
+    return len(rows)
+
+
+def _follows(scores, since):
+    """Новый подписчик автора поднимает его свежие посты."""
+    weight = settings.TRENDING_WEIGHTS['follow']
+    rows = _read('follow', Follow.objects.filter(created__gte=since),
+                 ('author_id', 'created'))
+    follows = defaultdict(list)
+    for _, author_id, created in rows:
+        follows[author_id].append(created)
+    fresh = Post.objects.filter(
+        author_id__in=list(follows),
+        pub_date__gte=scores.now - timedelta(days=settings.TRENDING_WINDOW),
+    ).values_list('id', 'author_id', 'group_id')
+    for post_id, author_id, group_id in fresh.iterator():
+        for created in follows[author_id]:
+            scores.add(post_id, group_id, weight, created)
+    return len(rows)
+
+
+def _views(scores, since):
+    weight = settings.TRENDING_WEIGHTS['view']
+    rows = _read('view', ViewBatch.objects.filter(created__gte=since),
+                 ('post_id', 'post__group_id', 'count', 'created'))
+    for _, post_id, group_id, count, created in rows:
+        scores.add(post_id, group_id, weight * count, created)
+    if rows:
+        # Просмотры уже в Post.views_count, пачки нужны только здесь.
+        ViewBatch.objects.filter(id__lte=rows[-1][0]).delete()
+    return len(rows)
+
+
+def _apply(model, key, deltas):
+    model.objects.bulk_create(
+        (model(**{key: pk}) for pk in deltas),
+        batch_size=500,
+        ignore_conflicts=True,
+    )
+    for pk, delta in deltas.items():
+        model.objects.filter(pk=pk).update(score=F('score') + delta)
+
+
+@transaction.atomic
+def update(now=None):
+    """Пересчитывает популярное по событиям с прошлого запуска."""
+    now = now or timezone.now()
+    state = _cursor(DECAY)
+    if state.updated is not None:
+        factor = _decay((now - state.updated).total_seconds())
+        for model in (TrendingPost, TrendingGroup):
+            model.objects.update(score=F('score') * factor)
+            model.objects.filter(score__lt=MIN_SCORE).delete()
+    state.updated = now
+    state.save()
+    # События старше горизонта уже затухли; граница спасает первый
+    # запуск от чтения всей истории.
+    since = now - timedelta(seconds=settings.TRENDING_HALF_LIFE
+                            * settings.TRENDING_HORIZON)
+    scores = _Scores(now)
+    events = {
+        'comments': _comments(scores, since),
+        'follows': _follows(scores, since),
+        'views': _views(scores, since),
+    }
+    _apply(TrendingPost, 'post_id', scores.posts)
+    _apply(TrendingGroup, 'group_id', scores.groups)
+    transaction.on_commit(lambda: caching.bump(caching.TRENDING_SCOPE))
+    return events
+
+
+def posts():
+    """Популярные посты по убыванию счёта."""
+    # Равные счета упорядочены по возрастанию id, как в индексе по
+    # счёту, иначе SQLite досортировывает выборку.
+    return (Post.objects.filter(trending__isnull=False)
+            .select_related('author', 'group')
+            .order_by('-trending__score', 'trending__pk'))
+
+
+def groups(limit):
+    return Group.objects.filter(trending__isnull=False).order_by(
+        '-trending__score')[:limit]
@@ -1,8 +1,109 @@
-from django.core.paginator import Paginator
+import base64
+import binascii
+
+from django.core.paginator import Page, Paginator
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
 from yatube.settings import PUB_COUNT
 
 
-def get_page(request, post_list):
-    paginator = Paginator(post_list, PUB_COUNT)
-    page_numbers = request.GET.get('page')
-    return paginator.get_page(page_numbers)
+class CursorPaginator(Paginator):
+    """
+    Постраничный вывод по ключу (field, id) вместо OFFSET.
+
+    Не выполняет COUNT(*) и не пропускает строки: каждая страница
+    читается одним запросом от позиции из курсора ?after= / ?before=,
+    поэтому время ответа не зависит от глубины листания.
+    Экземпляр хранит состояние одной страницы и создаётся на запрос.
+    """
+    is_cursor = True
+
+    def __init__(self, object_list, per_page, field='-pub_date', key='pk'):
+        super().__init__(object_list, per_page)
+        self.descending = field.startswith('-')
+        self.field = field.lstrip('-')
+        self.key = key
+        self.next_cursor = None
+        self.previous_cursor = None
+        self.page_number = 1
+
+    def _check_object_list_is_ordered(self):
+        # Порядок задаётся самим паджинатором в get_page.
+        pass
+
+    @property
+    def num_pages(self):
+        """Хватает, чтобы Page.has_next/has_previous работали без COUNT."""
+        return self.page_number + (1 if self.next_cursor else 0)
+
+    def encode(self, obj):
+        # Страницы из .values() состоят из словарей.
+        if isinstance(obj, dict):
+            value, pk = obj[self.field], obj['id']
+        else:
+            value, pk = getattr(obj, self.field), obj.pk
+        raw = f'{value.isoformat()}|{pk}'.encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+    def decode(self, cursor):
+        if not cursor:
+            return None
+        try:
+            raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+            value, pk = raw.decode().split('|')
+            value = parse_datetime(value)
+            pk = int(pk)
+        except (binascii.Error, UnicodeDecodeError, ValueError):
+            return None
+        if value is None:
+            return None
+        return value, pk
+
+    def _ordering(self, forward, key=None):
+        prefix = '-' if self.descending == forward else ''
+        return f'{prefix}{self.field}', f'{prefix}{key or self.key}'
+
+    def _seek(self, position, forward, key=None):
+        value, pk = position
+        key = key or self.key
+        lookup = 'lt' if self.descending == forward else 'gt'
+        return (Q(**{f'{self.field}__{lookup}': value})
+                | Q(**{self.field: value, f'{key}__{lookup}': pk}))
+
+    def _slice(self, queryset, forward, position, key=None):
+        """Следующие per_page + 1 строк от позиции в порядке листания."""
+        queryset = queryset.order_by(*self._ordering(forward, key))
+        if position is not None:
+            queryset = queryset.filter(self._seek(position, forward, key))
+        return queryset[:self.per_page + 1]
+
+    def _rows(self, forward, position):
+        return list(self._slice(self.object_list, forward, position))
+
+    def get_page(self, after=None, before=None):
+        forward = not before
+        position = self.decode(after if forward else before)
+        if not forward and position is None:
+            return self.get_page()
+        rows = self._rows(forward, position)
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if forward:
+            has_previous, has_next = position is not None, has_more
+        else:
+            if not has_more:
+                return self.get_page()
+            rows.reverse()
+            has_previous = has_next = True
+        if rows and has_next:
+            self.next_cursor = self.encode(rows[-1])
+        if rows and has_previous:
+            self.previous_cursor = self.encode(rows[0])
+        self.page_number = 2 if has_previous else 1
+        return Page(rows, self.page_number, self)
+
+
+def get_page(request, post_list, field='-pub_date', per_page=PUB_COUNT):
+    paginator = CursorPaginator(post_list, per_page, field)
+    return paginator.get_page(after=request.GET.get('after'),
+                              before=request.GET.get('before'))
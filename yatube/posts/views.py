@@ -1,25 +1,71 @@
 from django.shortcuts import render, get_object_or_404, redirect
 from .models import Post, Group, User, Comment, Follow
 from django.contrib.auth.decorators import login_required
-from .forms import PostForm, CommentForm
+from django.db import transaction
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.views.decorators.http import condition
+from core import uploads
+from .forms import PostForm, CommentForm, SearchForm
+from . import follow_graph, hits, threads
+from .conditional import feed_etag, post_etag
+from . import search as post_search
+from . import trending as post_trending
 from .utils import get_page
-from django.views.decorators.cache import cache_page
+from . import timeline
+from .caching import (cache_feed, group_scope, author_scope, INDEX_SCOPE,
+                      TRENDING_SCOPE)
 
 
-@cache_page(20)
+@condition(etag_func=feed_etag(INDEX_SCOPE))
+@cache_feed(INDEX_SCOPE)
 def index(request):
-    post_roster = Post.objects.all().order_by('-pub_date')
+    post_roster = Post.objects.select_related('author', 'group')
     page_obj = get_page(request, post_roster)
+    follow_graph.mark(request.user, page_obj)
     context = {
         'page_obj': page_obj,
     }
     return render(request, 'posts/index.html', context)
 
 
+@cache_feed(TRENDING_SCOPE)
+def trending(request):
+    paginator = Paginator(post_trending.posts(), settings.PUB_COUNT)
+    page_obj = paginator.get_page(request.GET.get('page'))
+    follow_graph.mark(request.user, page_obj)
+    context = {
+        'page_obj': page_obj,
+        'groups': post_trending.groups(settings.TRENDING_GROUPS),
+    }
+    return render(request, 'posts/trending.html', context)
+
+
+def search(request):
+    form = SearchForm(request.GET or None)
+    page_obj = None
+    if form.is_valid():
+        data = form.cleaned_data
+        results = post_search.search(data['q'], data['group'],
+                                     data['author'], data['date_from'],
+                                     data['date_to'])
+        paginator = Paginator(results, settings.PUB_COUNT)
+        page_obj = paginator.get_page(request.GET.get('page'))
+    context = {
+        'form': form,
+        'page_obj': page_obj,
+    }
+    return render(request, 'posts/search.html', context)
+
+
+@condition(etag_func=feed_etag(group_scope))
+@cache_feed(group_scope)
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    post_roster = Post.objects.filter(group=group).order_by('-pub_date')
+    post_roster = (Post.objects.select_related('author', 'group').
+                   filter(group=group))
     page_obj = get_page(request, post_roster)
+    follow_graph.mark(request.user, page_obj)
     context = {
         'group': group,
         'page_obj': page_obj,
@@ -27,18 +73,15 @@ def group_posts(request, slug):
     return render(request, 'posts/group_list.html', context)
 
 
+@condition(etag_func=feed_etag(author_scope))
+@cache_feed(author_scope)
 def profile(request, username):
-    author = (get_object_or_404(User.objects.
-              prefetch_related('posts', 'posts__group'),
-              username=username))
-    post_roster = (Post.objects.all().
-                   filter(author=author).order_by('-pub_date'))
+    author = get_object_or_404(User.objects.select_related('stats'),
+                               username=username)
+    post_roster = (Post.objects.select_related('author', 'group').
+                   filter(author=author))
     page_obj = get_page(request, post_roster)
-    if (not Follow.objects.
-            filter(user__id=request.user.id, author=author).exists()):
-        following = False
-    else:
-        following = True
+    following = follow_graph.is_following(request.user.id, author.id)
     context = {
         'author': author,
         'page_obj': page_obj,
@@ -47,23 +90,44 @@ def profile(request, username):
     return render(request, 'posts/profile.html', context)
 
 
+@hits.counted
+@condition(etag_func=post_etag)
 def post_detail(request, post_id):
     form = CommentForm(request.POST or None)
-    post = get_object_or_404(Post, id=post_id)
-    comments = Comment.objects.all().filter(post=post_id)
+    post = get_object_or_404(
+        Post.objects.select_related('author__stats', 'group'), id=post_id)
+    comments = threads.roots(request, post_id)
+    reply_to = None
+    if request.GET.get('reply_to', '').isdigit():
+        reply_to = Comment.objects.select_related('author').filter(
+            post=post_id, id=request.GET['reply_to']).first()
     context = {
         'post': post,
         'form': form,
         'comments': comments,
+        'reply_to': reply_to,
     }
     return render(request, 'posts/post_detail.html', context)
 
 
+def comment_replies(request, post_id, comment_id):
+    """Фрагмент HTML со следующей страницей ответов на комментарий."""
+    root = get_object_or_404(Comment, id=comment_id, post=post_id)
+    replies, next_after = threads.replies(root, request.GET.get('after'))
+    context = {
+        'root': root,
+        'replies': replies,
+        'next_after': next_after,
+    }
+    return render(request, 'posts/comment_replies.html', context)
+
+
 @login_required
+@transaction.atomic
 def post_create(request):
     form = PostForm(
         request.POST or None,
-        files=request.FILES or None)
+        files=uploads.files(request) or None)
     if form.is_valid():
         post = form.save(commit=False)
         post.author = request.user
@@ -79,7 +143,7 @@ def post_edit(request, post_id):
         return render(request, 'posts:post_detail', post_id=post.id)
     form = PostForm(
         request.POST or None,
-        files=request.FILES or None,
+        files=uploads.files(request) or None,
         instance=post
     )
     if form.is_valid():
@@ -97,6 +161,7 @@ def post_edit(request, post_id):
 
 
 @login_required
+@transaction.atomic
 def add_comment(request, post_id):
     post = get_object_or_404(Post, id=post_id)
     form = CommentForm(request.POST or None)
@@ -104,25 +169,31 @@ def add_comment(request, post_id):
         comment = form.save(commit=False)
         comment.author = request.user
         comment.post = post
+        parent = request.POST.get('parent', '')
+        if parent.isdigit():
+            comment.parent = threads.reply_parent(
+                get_object_or_404(Comment, id=parent, post=post))
         comment.save()
     return redirect('posts:post_detail', post_id=post_id)
 
 
 @login_required
 def follow_index(request):
-    post_roster = (Post.objects.all().
-                   filter(author__following__user=request.user).
-                   order_by('-pub_date'))
-    page_obj = get_page(request, post_roster)
-    follower_user = Follow.objects.all()
+    post_roster = Post.objects.select_related('author', 'group')
+    page_obj = timeline.get_page(request, post_roster, request.user)
+    suggested = follow_graph.suggestions(request.user.id,
+                                         settings.FOLLOW_SUGGESTIONS)
+    authors = User.objects.in_bulk(suggested)
     context = {
-        'follower_user': follower_user,
+        'following_count': len(follow_graph.following(request.user.id)),
         'page_obj': page_obj,
+        'suggested': [authors[pk] for pk in suggested if pk in authors],
     }
     return render(request, 'posts/follow.html', context)
 
 
 @login_required
+@transaction.atomic
 def profile_follow(request, username):
     author = get_object_or_404(User, username=username)
     if author != request.user:
@@ -131,6 +202,7 @@ def profile_follow(request, username):
 
 
 @login_required
+@transaction.atomic
 def profile_unfollow(request, username):
     author = get_object_or_404(User, username=username)
     Follow.objects.filter(user=request.user, author=author).delete()
@@ -8,6 +8,7 @@ from django.contrib.auth.views import (LoginView,
                                        PasswordResetCompleteView)
 from django.urls import path
 from . import views
+from .forms import QueuedPasswordResetForm
 
 app_name = 'users'
 
@@ -32,7 +33,8 @@ urlpatterns = [
          name='passsword_change_done'),
     path('password_reset_form/',
          PasswordResetView.
-         as_view(template_name='users/password_reset_form.html'),
+         as_view(template_name='users/password_reset_form.html',
+                 form_class=QueuedPasswordResetForm),
          name='password_reset'),
     path('password_reset/done/',
          PasswordResetDoneView.
@@ -39,6 +39,9 @@ INSTALLED_APPS = [
     'core.apps.CoreConfig',
     'users.apps.UsersConfig',
     'posts.apps.PostsConfig',
+    'api.apps.ApiConfig',
+    'jobs.apps.JobsConfig',
+    'notifications.apps.NotificationsConfig',
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
@@ -49,7 +52,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.ReplicaMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -63,7 +68,7 @@ ROOT_URLCONF = 'yatube.urls'
 TEMPLATES_DIRS = os.path.join(BASE_DIR, 'templates')
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'core.template_backends.DjangoTemplates',
         'DIRS': [TEMPLATES_DIRS],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -73,6 +78,7 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
                 'core.context_processors.year.year',
+                'notifications.context_processors.unread',
             ],
         },
     },
@@ -80,17 +86,55 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'yatube.wsgi.application'
 
+# Компилировать шаблоны и строить таблицы URL при старте воркера,
+# а не в первом запросе (см. core.warmup).
+STARTUP_WARMUP: bool = False
+
 
 # Database
 # https://docs.djangoproject.com/en/2.2/ref/settings/#databases
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'core.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
     }
 }
 
+# PRAGMA каждого нового соединения SQLite (см. core.backends.sqlite3):
+# WAL, чтобы запись не блокировала чтение, ожидание блокировки вместо
+# ошибки «database is locked», страничный кэш (отрицательное — в КиБ)
+# и отображение файла в память.
+SQLITE_PRAGMAS: dict = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'cache_size': -32000,
+    'mmap_size': 256 * 1024 * 1024,
+    'temp_store': 'MEMORY',
+}
+
+# Реплики только для чтения. Локально YATUBE_REPLICAS=2 добавляет базы
+# replica1 и replica2 — копии db.sqlite3, которые обновляет
+# manage.py sync_replicas (интервал синхронизации и есть отставание).
+DATABASE_REPLICAS: list = [
+    f'replica{number}'
+    for number in range(1, int(os.environ.get('YATUBE_REPLICAS', 0)) + 1)
+]
+for _alias in DATABASE_REPLICAS:
+    DATABASES[_alias] = {
+        'ENGINE': 'core.backends.sqlite3',
+        'NAME': os.path.join(BASE_DIR, f'db-{_alias}.sqlite3'),
+        # В тестах реплика — то же соединение, что и основная база.
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+# Приложения, которые читают из реплик, и сколько секунд после записи
+# сессия читает из основной базы.
+REPLICA_APPS: tuple = ('posts',)
+REPLICA_STICKY_SECONDS: int = 5
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
@@ -140,13 +184,112 @@ EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
 PUB_COUNT: int = 10
 
+# Материализованные ленты подписок: сколько последних постов хранить
+# у читателя и с какого числа подписчиков автор читается без рассылки.
+TIMELINE_LENGTH: int = 1000
+TIMELINE_FANOUT_LIMIT: int = 1000
+
+# Страницы лент живут в кэше до изменения их содержимого, таймаут
+# ограничивает срок хранения неиспользуемых страниц. Версии поднимает
+# процесс, в котором случилось изменение, поэтому долгий срок годится
+# только для общего кэша (settings_production); с LocMemCache чужой
+# процесс — run_jobs, send_digests — увидит изменение лишь по таймауту.
+FEED_CACHE_TIMEOUT: int = 20
+# Версии областей кэша живут дольше страниц, но не вечно: иначе ключ
+# версии остаётся в кэше у каждой когда-либо запрошенной области.
+FEED_VERSION_TIMEOUT: int = 2 * FEED_CACHE_TIMEOUT
+
+# Потоки, создающие миниатюры постов вне запроса; 0 — создавать сразу.
+POST_THUMBNAIL_WORKERS: int = 2
+# Ширины вариантов картинки и форматы в порядке предпочтения; форматы,
+# которые не умеет сохранять установленный Pillow, пропускаются.
+POST_IMAGE_WIDTHS: tuple = (320, 640, 960, 1920)
+POST_IMAGE_FORMATS: tuple = ('avif', 'webp', 'jpeg')
+# Пределы загружаемой картинки; число пикселей проверяется по
+# заголовку файла, до декодирования.
+POST_IMAGE_MAX_PIXELS: int = 40_000_000
+
+# Комментарии: корневых на странице поста, ответов в одной подгрузке
+# и наибольшая глубина ветки.
+COMMENTS_PER_PAGE: int = 20
+COMMENT_REPLIES_PER_PAGE: int = 20
+COMMENT_MAX_DEPTH: int = 8
+
+# Рекомендации «кого почитать» на странице подписок: сколько авторов
+# показать и по скольким подпискам пользователя их искать.
+FOLLOW_SUGGESTIONS: int = 5
+FOLLOW_SUGGESTIONS_SCAN: int = 200
+# Массивы подписок в кэше. Отписка сбрасывает массив только в кэше
+# своего процесса; с LocMemCache другие процессы увидят её по таймауту.
+FOLLOW_GRAPH_TIMEOUT: int = 60
+
+# Популярное: событие затухает вдвое за TRENDING_HALF_LIFE секунд,
+# события старше TRENDING_HORIZON полупериодов не читаются, подписка
+# поднимает посты автора не старше TRENDING_WINDOW дней.
+TRENDING_HALF_LIFE: int = 6 * 60 * 60
+TRENDING_HORIZON: int = 10
+TRENDING_WINDOW: int = 3
+TRENDING_WEIGHTS: dict = {'comment': 3.0, 'follow': 2.0, 'view': 0.1}
+TRENDING_GROUPS: int = 10
+
+# Просмотры постов копятся в памяти процесса и пишутся в базу раз в
+# POST_VIEWS_FLUSH_INTERVAL секунд или при стольких разных постах.
+POST_VIEWS_FLUSH_INTERVAL: int = 10
+POST_VIEWS_FLUSH_SIZE: int = 500
+
+# JSON API: постов на странице по умолчанию и наибольшее значение
+# параметра ?limit=.
+API_PAGE_SIZE: int = 20
+API_MAX_PAGE: int = 100
+
+# Поисковый индекс постов; posts.search.database.DatabaseBackend
+# работает на любой базе, но без индекса.
+POST_SEARCH_BACKEND: str = 'posts.search.sqlite.SQLiteBackend'
+
+FILE_UPLOAD_HANDLERS = ['core.uploads.LimitedTemporaryFileUploadHandler']
+FILE_UPLOAD_MAX_BYTES: int = 10 * 1024 * 1024
+
+# Очередь фоновых задач (jobs): пауза воркера при пустой очереди,
+# сколько секунд задача числится за воркером, число попыток и
+# задержка первого повтора, которая дальше удваивается до предела.
+JOB_POLL_INTERVAL: float = 1.0
+JOB_TIMEOUT: int = 5 * 60
+JOB_MAX_ATTEMPTS: int = 5
+JOB_RETRY_DELAY: int = 10
+JOB_RETRY_MAX_DELAY: int = 60 * 60
+
+# Уведомления копятся в дайджест: не чаще одного дайджеста на
+# пользователя в NOTIFICATION_DIGEST_INTERVAL секунд, в дайджесте —
+# последние NOTIFICATION_DIGEST_ITEMS событий, за запуск собирается не
+# больше NOTIFICATION_BATCH дайджестов, разобранные события хранятся
+# NOTIFICATION_RETENTION дней.
+NOTIFICATION_DIGEST_INTERVAL: int = 60 * 60
+NOTIFICATION_DIGEST_ITEMS: int = 10
+NOTIFICATION_BATCH: int = 500
+NOTIFICATION_RETENTION: int = 7
+# Счётчик непрочитанных в шапке кэшируется; сброс из send_digests
+# доходит до веб-воркеров только через общий кэш, поэтому с LocMemCache
+# счётчик обновится не позже этого срока.
+NOTIFICATION_UNREAD_TIMEOUT: int = 20
+
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Свой у каждого процесса: годится для runserver и тестов. Сбросы
+# кэша из сигналов доходят до других процессов только через общий
+# кэш, он настроен в settings_production.
 CACHES = {
     'default': {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
     }
 }
+
+# Замеры запросов (core.middleware.RequestMetricsMiddleware):
+# доля замеряемых запросов, журнал для manage.py request_metrics
+# и число самых медленных SQL-запросов в замере.
+REQUEST_METRICS_ENABLED: bool = False
+REQUEST_METRICS_SAMPLE_RATE: float = 1.0
+REQUEST_METRICS_FILE = os.path.join(BASE_DIR, 'metrics', 'requests.jsonl')
+REQUEST_METRICS_SLOWEST: int = 3
@@ -0,0 +1,55 @@
+"""
+Настройки для боевого окружения поверх yatube.settings.
+
+Запуск: DJANGO_SETTINGS_MODULE=yatube.settings_production.
+"""
+import os
+
+from .settings import *  # noqa: F401,F403
+from .settings import BASE_DIR, DATABASES, TEMPLATES
+
+DEBUG = False
+
+SECRET_KEY = os.environ.get('DJANGO_SECRET_KEY', SECRET_KEY)  # noqa: F405
+
+ALLOWED_HOSTS = os.environ.get(
+    'DJANGO_ALLOWED_HOSTS', ','.join(ALLOWED_HOSTS)  # noqa: F405
+).split(',')
+
+# Соединение с базой живёт между запросами воркера: PRAGMA и открытие
+# файла не повторяются на каждый запрос.
+for _database in DATABASES.values():
+    _database['CONN_MAX_AGE'] = 600
+
+# Общий для всех процессов хоста кэш: воркеры, run_jobs и send_digests
+# видят версии лент, графы подписок и счётчики уведомлений друг друга.
+# При нескольких хостах здесь нужен memcached.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('DJANGO_CACHE_DIR',
+                                   os.path.join(BASE_DIR, 'cache')),
+        'OPTIONS': {'MAX_ENTRIES': 50000},
+    }
+}
+# С общим кэшем страница живёт до изменения, а не до таймаута.
+FEED_CACHE_TIMEOUT = 60 * 60
+FEED_VERSION_TIMEOUT = 2 * FEED_CACHE_TIMEOUT
+FOLLOW_GRAPH_TIMEOUT = 60 * 60
+NOTIFICATION_UNREAD_TIMEOUT = 60 * 60
+
+# Шаблоны разбираются один раз на процесс и дальше берутся из памяти.
+# С явным списком загрузчиков APP_DIRS должен быть выключен.
+TEMPLATES = [dict(
+    TEMPLATES[0],
+    APP_DIRS=False,
+    OPTIONS=dict(TEMPLATES[0]['OPTIONS'], loaders=[
+        ('django.template.loaders.cached.Loader', [
+            'django.template.loaders.filesystem.Loader',
+            'django.template.loaders.app_directories.Loader',
+        ]),
+    ]),
+)]
+
+# Шаблоны и таблицы URL готовятся при старте воркера (yatube/wsgi.py).
+STARTUP_WARMUP = True
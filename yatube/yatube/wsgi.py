@@ -7,6 +7,7 @@ For more information on this file, see
 https://docs.djangoproject.com/en/2.2/howto/deployment/wsgi/
 """
 
+import atexit
 import os
 
 from django.core.wsgi import get_wsgi_application
@@ -14,3 +15,16 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
 
 application = get_wsgi_application()
+
+# Буфер просмотров постов дописывается в базу при остановке воркера.
+from posts import hits  # noqa: E402
+
+atexit.register(hits.flush)
+
+# Первый запрос после деплоя не должен разбирать шаблоны.
+from django.conf import settings  # noqa: E402
+
+if settings.STARTUP_WARMUP:
+    from core import warmup
+
+    warmup.run()